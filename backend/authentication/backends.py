@@ -0,0 +1,77 @@
+"""
+JWT authentication without a per-request user lookup.
+
+Tokens from ClaimsRefreshToken carry `role` and `username` next to the user id,
+so the request user is built from the claims as a `User` instance whose other
+fields are deferred (touching one of them loads it from the database). It still
+works in ORM filters and foreign keys.
+
+Role changes and deactivations must not wait for the token to expire. Each
+user's current `role` / `is_active` is therefore kept, with the names that
+get_full_name() needs (e.g. when registering), in the `auth` cache alias
+for JWT_USER_STATE_TTL seconds. That alias is an in-process LRU bounded by
+JWT_USER_STATE_MAX_ENTRIES. Saving or deleting a user drops its entry, so a
+process sees a change immediately and others within the TTL. Tokens issued
+before the role claim existed fall back to simplejwt's database lookup.
+"""
+
+import uuid
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+User = get_user_model()
+
+
+USER_STATE_FIELDS = ('role', 'is_active', 'first_name', 'last_name')
+
+
+def _state_key(user_id):
+    return f"user-state:{user_id}"
+
+
+def get_user_state(user_id):
+    """{'role', 'is_active', 'first_name', 'last_name'} for the user, cached; None when the user doesn't exist."""
+    cache = caches[settings.JWT_USER_STATE_CACHE_ALIAS]
+    key = _state_key(user_id)
+    state = cache.get(key)
+    if state is None:
+        state = User.objects.filter(pk=user_id).values(*USER_STATE_FIELDS).first() or {}
+        cache.set(key, state)
+    return state or None
+
+
+@receiver([post_save, post_delete], sender=User)
+def _user_changed(sender, instance, **kwargs):
+    caches[settings.JWT_USER_STATE_CACHE_ALIAS].delete(_state_key(instance.pk))
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    def get_user(self, validated_token):
+        if 'role' not in validated_token:
+            return super().get_user(validated_token)
+
+        try:
+            user_id = uuid.UUID(str(validated_token[api_settings.USER_ID_CLAIM]))
+        except (KeyError, ValueError) as e:
+            raise InvalidToken(_("Token contained no recognizable user identification")) from e
+
+        state = get_user_state(user_id)
+        if state is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+        if api_settings.CHECK_USER_IS_ACTIVE and not state['is_active']:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        # the cached role wins over the claim, so role changes apply before the token expires
+        values = {'id': user_id, 'username': validated_token.get('username', ''), **state}
+        # from_db() takes the loaded values in model field order; the rest stay deferred
+        field_names = [f.attname for f in User._meta.concrete_fields if f.attname in values]
+        return User.from_db(DEFAULT_DB_ALIAS, field_names, [values[name] for name in field_names])
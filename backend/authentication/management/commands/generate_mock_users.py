@@ -6,14 +6,21 @@ Usage:
     python manage.py generate_mock_users --count 20   # Generate specific number
     python manage.py generate_mock_users --reset      # Delete and regenerate
     python manage.py generate_mock_users --clear      # Only delete mock users
+    python manage.py generate_mock_users --count 200000 --batch-size 10000
+
+Users are inserted with bulk_create in batches. The password is hashed once and the
+hash is shared by every mock user, so 100k attendees take seconds, not hours.
 """
 
 import random
 
 from authentication.models import User
-from django.core.management.base import BaseCommand
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
 from django.db import transaction
 
+MOCK_PASSWORD = "password123"  # Simple password for testing
+
 
 class Command(BaseCommand):
     help = "Generate mock attendee users for testing"
@@ -25,6 +32,12 @@ class Command(BaseCommand):
             default=10,
             help="Number of mock attendees to generate (default: 10)",
         )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Users inserted per query (default: 5000)",
+        )
         parser.add_argument(
             "--reset",
             action="store_true",
@@ -42,12 +55,15 @@ class Command(BaseCommand):
         should_reset = options["reset"]
         should_clear = options["clear"]
 
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be at least 1")
+
         if should_reset or should_clear:
             self.clear_mock_users()
 
         if not should_clear:
             self.stdout.write("Generating mock attendee users...")
-            users_created = self.create_mock_attendees(count)
+            users_created = self.create_mock_attendees(count, options["batch_size"])
             self.stdout.write(
                 self.style.SUCCESS(f"✓ Created {users_created} mock attendee users")
             )
@@ -66,7 +82,7 @@ class Command(BaseCommand):
 
         self.stdout.write(f"  - Deleted {deleted_count} mock attendee users")
 
-    def create_mock_attendees(self, count):
+    def create_mock_attendees(self, count, batch_size=5000):
         """Create mock attendee users"""
         first_names = [
             "Andi",
@@ -114,26 +130,38 @@ class Command(BaseCommand):
             "Firmansyah",
         ]
 
+        # One PBKDF2 run for all of them: hashing per user is what made large counts take hours
+        password = make_password(MOCK_PASSWORD)
+        existing = set(
+            User.objects.filter(username__startswith="attendee_").values_list("username", flat=True)
+        )
+
         users_created = 0
+        batch = []
 
         for i in range(1, count + 1):
-            first_name = random.choice(first_names)
-            last_name = random.choice(last_names)
             username = f"attendee_{i:03d}"
-            email = f"{username}@example.com"
 
-            # Check if user already exists
-            if User.objects.filter(username=username).exists():
+            # Skip users that already exist
+            if username in existing:
                 continue
 
-            user = User.objects.create_user(
-                username=username,
-                email=email,
-                password="password123",  # Simple password for testing
-                first_name=first_name,
-                last_name=last_name,
-                role=User.ATTENDEE,
+            batch.append(
+                User(
+                    username=username,
+                    email=f"{username}@example.com",
+                    password=password,
+                    first_name=random.choice(first_names),
+                    last_name=random.choice(last_names),
+                    role=User.ATTENDEE,
+                )
             )
-            users_created += 1
+            if len(batch) >= batch_size:
+                users_created += len(User.objects.bulk_create(batch))
+                batch = []
+                self.stdout.write(f"  - {users_created} users created ({i}/{count})")
+
+        if batch:
+            users_created += len(User.objects.bulk_create(batch))
 
         return users_created
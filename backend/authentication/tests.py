@@ -1,3 +1,78 @@
-from django.test import TestCase
+from django.conf import settings
+from django.core.cache import caches
+from django.test import TestCase, override_settings
 
-# Create your tests here.
+from core.testing import QueryBudgetMixin
+
+from .backends import ClaimsJWTAuthentication
+from .models import User
+from .tokens import ClaimsRefreshToken
+
+PASSWORD = "Budget-pass-123"
+
+
+# the budgets are about queries; PBKDF2's deliberate slowness would only add noise to the timings
+@override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
+class QueryBudgetTests(QueryBudgetMixin, TestCase):
+    """SQL query and wall-time budgets of every authentication route (see core/testing.py)."""
+    urlconf = "authentication.urls"
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create(username="admin", role=User.ADMIN)
+        cls.attendee = User.objects.create_user(username="ana", password=PASSWORD)
+        cls.rows = 0
+
+    def grow(self, n):
+        User.objects.bulk_create(
+            User(username=f"user-{self.rows + i}", email=f"user-{self.rows + i}@example.com")
+            for i in range(n)
+        )
+        self.rows += n
+
+    def budget_requests(self):
+        def register():
+            self.rows += 1
+            return "POST", "/api/auth/register", {
+                "username": f"new-{self.rows}", "password": PASSWORD, "password2": PASSWORD,
+                "email": f"new-{self.rows}@example.com", "first_name": "New", "last_name": "User",
+            }, None
+
+        return {
+            "POST register": register,
+            "POST login": lambda: ("POST", "/api/auth/login", {"username": "ana", "password": PASSWORD}, None),
+            "POST token_refresh": lambda: (
+                "POST", "/api/auth/token/refresh", {"refresh": str(ClaimsRefreshToken.for_user(self.attendee))}, None,
+            ),
+            "GET user-list": lambda: ("GET", "/api/auth/users", None, self.admin),
+            "GET user-detail": lambda: ("GET", f"/api/auth/users/{self.attendee.pk}", None, self.attendee),
+        }
+
+
+class ClaimsJWTAuthenticationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username="ana", first_name="Ana", last_name="Lima")
+
+    def setUp(self):
+        # rolling back a test's saves doesn't drop the states it cached
+        caches[settings.JWT_USER_STATE_CACHE_ALIAS].clear()
+        self.client.defaults["HTTP_AUTHORIZATION"] = f"Bearer {ClaimsRefreshToken.for_user(self.user).access_token}"
+
+    def test_role_changes_apply_before_the_token_expires(self):
+        self.assertEqual(self.client.get("/api/auth/users").status_code, 403)
+        self.user.role = User.ADMIN
+        self.user.save()
+        self.assertEqual(self.client.get("/api/auth/users").status_code, 200)
+
+    def test_deactivation_applies_before_the_token_expires(self):
+        self.assertEqual(self.client.get(f"/api/auth/users/{self.user.pk}").status_code, 200)
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get(f"/api/auth/users/{self.user.pk}").status_code, 401)
+
+    def test_full_name_is_loaded_with_the_user_state(self):
+        token = ClaimsRefreshToken.for_user(self.user).access_token
+        user = ClaimsJWTAuthentication().get_user(token)
+        with self.assertNumQueries(0):
+            self.assertEqual(user.get_full_name(), "Ana Lima")
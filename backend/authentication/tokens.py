@@ -0,0 +1,12 @@
+from rest_framework_simplejwt.tokens import RefreshToken
+
+
+class ClaimsRefreshToken(RefreshToken):
+    """Refresh token whose access tokens carry the user's role and username (see backends.py)."""
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token['role'] = user.role
+        token['username'] = user.username
+        return token
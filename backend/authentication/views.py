@@ -1,11 +1,11 @@
 from django.contrib.auth import authenticate, get_user_model
-from rest_framework import permissions, status
+from rest_framework import generics, permissions, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework_simplejwt.tokens import RefreshToken
 
 from .serializers import (UserListSerializer, UserLoginSerializer,
                           UserRegistrationSerializer)
+from .tokens import ClaimsRefreshToken
 
 User = get_user_model()
 
@@ -16,7 +16,7 @@ class RegisterView(APIView):
         serializer = UserRegistrationSerializer(data=request.data)
         if serializer.is_valid():
             user = serializer.save()
-            refresh = RefreshToken.for_user(user)
+            refresh = ClaimsRefreshToken.for_user(user)
             return Response({
                 'refresh': str(refresh),
                 'access': str(refresh.access_token),
@@ -39,7 +39,7 @@ class LoginView(APIView):
             user = authenticate(username=username, password=password)
             
             if user:
-                refresh = RefreshToken.for_user(user)
+                refresh = ClaimsRefreshToken.for_user(user)
                 return Response({
                     'refresh': str(refresh),
                     'access': str(refresh.access_token),
@@ -54,15 +54,17 @@ class LoginView(APIView):
             }, status=status.HTTP_401_UNAUTHORIZED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-class UserListView(APIView):
-    def get(self, request):
+class UserListView(generics.ListAPIView):
+    queryset = User.objects.all()
+    serializer_class = UserListSerializer
+    cursor_ordering = ('date_joined', 'id')
+
+    def get(self, request, *args, **kwargs):
         # Only admin users can list all users
         if not request.user.role == 'admin':
             return Response({"error": "Permission denied"}, status=status.HTTP_403_FORBIDDEN)
-        
-        users = User.objects.all()
-        serializer = UserListSerializer(users, many=True)
-        return Response(serializer.data)
+
+        return super().get(request, *args, **kwargs)
 
 class UserDetailView(APIView):
     def get(self, request, pk):
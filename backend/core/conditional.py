@@ -0,0 +1,51 @@
+"""
+Conditional GET for read endpoints.
+
+Views compute cheap validators for a response (timestamps and row counts from a
+single aggregate query) and hand them to `conditional_get`, which answers
+If-None-Match / If-Modified-Since with 304 Not Modified before the body is
+built. Only when the client's copy is stale does the view run its queryset and
+serializer; the validators are then attached as ETag / Last-Modified headers.
+"""
+
+import hashlib
+
+from django.utils.cache import (get_conditional_response, patch_cache_control,
+                                patch_vary_headers)
+from django.utils.http import http_date, quote_etag
+
+
+def make_etag(*parts):
+    """Strong ETag over the validator values."""
+    return quote_etag(hashlib.md5(repr(parts).encode('utf-8')).hexdigest())
+
+
+def latest(*timestamps):
+    """The most recent of the given datetimes, ignoring None."""
+    timestamps = [ts for ts in timestamps if ts is not None]
+    return max(timestamps) if timestamps else None
+
+
+def conditional_get(request, etag, last_modified, respond):
+    """
+    Return 304 when the client's validators match, otherwise `respond()` with
+    ETag and Last-Modified set. `last_modified` is a datetime or None.
+    """
+    response = get_conditional_response(
+        request,
+        etag=etag,
+        last_modified=int(last_modified.timestamp()) if last_modified else None,
+    )
+    if response is None:
+        response = respond()
+        if not 200 <= response.status_code < 300:
+            return response
+
+    response['ETag'] = etag
+    if last_modified:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    # browsers keep the body but revalidate every time, so the SPA gets 304s for free;
+    # visibility depends on the caller, so shared caches must key on the credentials
+    patch_cache_control(response, private=True, no_cache=True)
+    patch_vary_headers(response, ('Authorization',))
+    return response
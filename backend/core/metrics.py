@@ -0,0 +1,189 @@
+"""
+Request metrics in the Prometheus text format, served at /api/metrics.
+
+metrics_middleware records, per route (the resolved view name, e.g.
+`event-registrations-list`, so ids in paths don't explode the label space):
+request count by status, latency, SQL queries and SQL time per request,
+response size, and, for requests that lock rows (`FOR UPDATE`: registration,
+cancellation), the time spent in the statements that may wait for those locks.
+That time bounds their lock wait from above; `SKIP LOCKED` statements never
+wait, so they count as zero.
+
+SQL is counted by an execute wrapper installed on every database connection. It
+only reads a context variable when no request is being measured, and the
+per-request totals are plain attribute updates, so the hot path pays a few
+microseconds per query and per request.
+
+The endpoint is off unless METRICS_ENABLED is set. It then requires
+`Authorization: Bearer <METRICS_TOKEN>`, or, with no token configured, an
+admin's JWT or admin-site session, since route names and timings describe the
+deployment.
+
+Under gunicorn each worker has its own counters. Set PROMETHEUS_MULTIPROC_DIR to
+an empty, writable directory to have any worker answer the scrape with the
+totals of all of them (gunicorn.conf.py cleans up after exited workers).
+"""
+
+import hmac
+import os
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import Http404, HttpResponse
+from django.utils.decorators import sync_and_async_middleware
+from prometheus_client import (CONTENT_TYPE_LATEST, REGISTRY,
+                               CollectorRegistry, Counter, Histogram,
+                               generate_latest, multiprocess)
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+
+from authentication.backends import ClaimsJWTAuthentication
+from authentication.models import User
+
+REQUESTS = Counter(
+    'http_requests_total', 'HTTP requests by route, method and status.', ['route', 'method', 'status'],
+)
+LATENCY = Histogram(
+    'http_request_duration_seconds', 'Time until the response is returned (headers, for streams).',
+    ['route', 'method'],
+)
+QUERIES = Histogram(
+    'http_request_db_queries', 'SQL statements per request.', ['route'],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89),
+)
+DB_TIME = Histogram(
+    'http_request_db_seconds', 'Time spent in SQL statements per request.', ['route'],
+    buckets=(.001, .0025, .005, .01, .025, .05, .1, .25, .5, 1, 2.5),
+)
+LOCK_WAIT = Histogram(
+    'http_request_db_lock_wait_seconds', 'Time in statements that may wait for row locks, per request locking rows.',
+    ['route'], buckets=(.0005, .001, .0025, .005, .01, .025, .05, .1, .25, .5, 1, 2.5),
+)
+RESPONSE_SIZE = Histogram(
+    'http_response_size_bytes', 'Response body size (streams excluded).', ['route'],
+    buckets=(256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304),
+)
+
+UNMATCHED_ROUTE = '<unmatched>'
+
+
+class RequestStats:
+    __slots__ = ('queries', 'db_seconds', 'lock_seconds', 'locked')
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.lock_seconds = 0.0
+        self.locked = False
+
+
+# set while a request is measured; sync views see it too, since sync_to_async copies the context
+_request_stats = ContextVar('request_stats', default=None)
+
+
+def record_queries(execute, sql, params, many, context):
+    stats = _request_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed = time.perf_counter() - started
+        stats.queries += 1
+        stats.db_seconds += elapsed
+        if 'FOR UPDATE' in sql:
+            stats.locked = True
+            if 'SKIP LOCKED' not in sql:
+                stats.lock_seconds += elapsed
+
+
+def _install_wrapper(sender, connection, **kwargs):
+    # fires on every (re)connect of the same wrapper object, so install once
+    if record_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_queries)
+
+
+def _observe(request, response, stats, started):
+    duration = time.perf_counter() - started
+    match = getattr(request, 'resolver_match', None)
+    route = match.view_name if match is not None else UNMATCHED_ROUTE
+
+    REQUESTS.labels(route, request.method, response.status_code).inc()
+    LATENCY.labels(route, request.method).observe(duration)
+    QUERIES.labels(route).observe(stats.queries)
+    DB_TIME.labels(route).observe(stats.db_seconds)
+    if stats.locked:
+        LOCK_WAIT.labels(route).observe(stats.lock_seconds)
+    if not response.streaming:
+        RESPONSE_SIZE.labels(route).observe(len(response.content))
+
+
+@sync_and_async_middleware
+def metrics_middleware(get_response):
+    """Records the request metrics above; first in MIDDLEWARE so the timing covers the others."""
+    if not settings.METRICS_ENABLED:
+        raise MiddlewareNotUsed
+    connection_created.connect(_install_wrapper, dispatch_uid='core.metrics')
+    for connection in connections.all(initialized_only=True):
+        _install_wrapper(None, connection)
+
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            started = time.perf_counter()
+            stats = RequestStats()
+            token = _request_stats.set(stats)
+            try:
+                response = await get_response(request)
+            finally:
+                _request_stats.reset(token)
+            _observe(request, response, stats, started)
+            return response
+    else:
+        def middleware(request):
+            started = time.perf_counter()
+            stats = RequestStats()
+            token = _request_stats.set(stats)
+            try:
+                response = get_response(request)
+            finally:
+                _request_stats.reset(token)
+            _observe(request, response, stats, started)
+            return response
+    return middleware
+
+
+def _is_admin(request):
+    user = request.user
+    if not user.is_authenticated:
+        # a plain view, so DRF's authentication hasn't run
+        try:
+            authenticated = ClaimsJWTAuthentication().authenticate(request)
+        except AuthenticationFailed:
+            return False
+        user = authenticated[0] if authenticated else user
+    return getattr(user, 'role', None) == User.ADMIN
+
+
+def metrics_view(request):
+    """Prometheus scrape endpoint; requires METRICS_TOKEN as a bearer token, or an admin when it is unset."""
+    if not settings.METRICS_ENABLED:
+        raise Http404
+    if settings.METRICS_TOKEN:
+        scheme, _, token = request.headers.get('Authorization', '').partition(' ')
+        if scheme != 'Bearer' or not hmac.compare_digest(token.encode(), settings.METRICS_TOKEN.encode()):
+            return HttpResponse('Unauthorized', status=401, content_type='text/plain')
+    elif not _is_admin(request):
+        return HttpResponse('Forbidden', status=403, content_type='text/plain')
+
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return HttpResponse(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,63 @@
+import asyncio
+import threading
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils.decorators import sync_and_async_middleware
+
+from . import routers
+
+
+@sync_and_async_middleware
+def concurrency_limit_middleware(get_response):
+    """
+    Serves at most MAX_CONCURRENT_REQUESTS requests at once in this process; the
+    others wait for a turn. Under ASGI every request runs its sync code in a
+    thread of its own, so this is what keeps the threads, and the database
+    connections they hold, within the pool. A streaming response gives its turn
+    back once the view returns it, not when the stream ends.
+    """
+    if settings.MAX_CONCURRENT_REQUESTS <= 0:
+        raise MiddlewareNotUsed
+
+    if iscoroutinefunction(get_response):
+        slots = asyncio.Semaphore(settings.MAX_CONCURRENT_REQUESTS)
+
+        async def middleware(request):
+            async with slots:
+                return await get_response(request)
+    else:
+        slots = threading.BoundedSemaphore(settings.MAX_CONCURRENT_REQUESTS)
+
+        def middleware(request):
+            with slots:
+                return get_response(request)
+    return middleware
+
+
+@sync_and_async_middleware
+def replica_routing_middleware(get_response):
+    """Scopes core.routers.ReplicaRouter's replica reads and primary pinning to each request."""
+    if not settings.DATABASE_REPLICAS:
+        raise MiddlewareNotUsed
+
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            token = routers.begin_request(await sync_to_async(routers.may_read_replica)(request))
+            try:
+                response = await get_response(request)
+            finally:
+                routers.end_request(token)
+            await sync_to_async(routers.pin_after_write)(request, response)
+            return response
+    else:
+        def middleware(request):
+            token = routers.begin_request(routers.may_read_replica(request))
+            try:
+                response = get_response(request)
+            finally:
+                routers.end_request(token)
+            routers.pin_after_write(request, response)
+            return response
+    return middleware
@@ -0,0 +1,179 @@
+"""
+Keyset (cursor) pagination shared by every list endpoint.
+
+Pages are fetched with a `WHERE (ordering) > (last row seen)` filter instead of
+OFFSET, so the cost of a page stays proportional to the page size no matter how
+deep the client has scrolled. Views pick their ordering with a `cursor_ordering`
+attribute; the trailing field must be unique (usually `id`) so the order is total.
+"""
+
+import json
+from base64 import b64decode, b64encode
+from collections import OrderedDict, namedtuple
+
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Q
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, _positive_int
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+Cursor = namedtuple('Cursor', ['reverse', 'position'])
+
+
+def _encode_value(value):
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    if isinstance(value, (int, float, str)) or value is None:
+        return value
+    return str(value)
+
+
+class KeysetPagination(BasePagination):
+    cursor_query_param = 'cursor'
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = getattr(settings, 'API_MAX_PAGE_SIZE', 100)
+    ordering = ('pk',)
+    invalid_cursor_message = _('Invalid cursor')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.ordering = self.get_ordering(view)
+        self.cursor = self.decode_cursor(request, queryset.model)
+        reverse = self.cursor.reverse if self.cursor else False
+
+        order = self._reverse_ordering(self.ordering) if reverse else self.ordering
+        queryset = queryset.order_by(*order)
+        if self.cursor:
+            queryset = queryset.filter(self._after_position(order, self.cursor.position))
+
+        # fetch one extra row to know whether another page follows
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        self.page = results[:self.page_size]
+
+        if reverse:
+            self.page.reverse()
+            self.has_next = True
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = self.cursor is not None
+        return self.page
+
+    def get_page_size(self, request):
+        if self.page_size_query_param:
+            try:
+                return _positive_int(
+                    request.query_params[self.page_size_query_param],
+                    strict=True,
+                    cutoff=self.max_page_size
+                )
+            except (KeyError, ValueError):
+                pass
+        return self.page_size
+
+    def get_ordering(self, view):
+        ordering = getattr(view, 'cursor_ordering', None) or self.ordering
+        return tuple(ordering)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(Cursor(reverse=False, position=self._position(self.page[-1])))
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(Cursor(reverse=True, position=self._position(self.page[0])))
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def decode_cursor(self, request, model):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        try:
+            payload = json.loads(b64decode(encoded.encode('ascii')).decode('utf-8'))
+            position = payload['p']
+            if not isinstance(position, list) or len(position) != len(self.ordering):
+                raise ValueError
+            # coerce each value with its field, so a tampered cursor can't reach the query
+            position = [self._to_python(model, field, value) for field, value in zip(self.ordering, position)]
+            return Cursor(reverse=bool(payload.get('r')), position=position)
+        except (TypeError, ValueError, KeyError, UnicodeError, DjangoValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, cursor):
+        payload = {'p': [_encode_value(value) for value in cursor.position]}
+        if cursor.reverse:
+            payload['r'] = 1
+        encoded = b64encode(json.dumps(payload, separators=(',', ':')).encode('utf-8')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def _position(self, instance):
+        # pages are model instances, or dicts when a view paginates .values() rows
+        if isinstance(instance, dict):
+            return [instance[field.lstrip('-')] for field in self.ordering]
+        return [getattr(instance, field.lstrip('-')) for field in self.ordering]
+
+    @staticmethod
+    def _to_python(model, field_path, value):
+        if value is None:
+            raise ValueError
+        opts = model._meta
+        *relations, name = field_path.lstrip('-').split('__')
+        for relation in relations:
+            opts = opts.get_field(relation).related_model._meta
+        field = opts.pk if name == 'pk' else opts.get_field(name)
+        return field.to_python(value)
+
+    @staticmethod
+    def _reverse_ordering(ordering):
+        return tuple(field[1:] if field.startswith('-') else '-' + field for field in ordering)
+
+    @staticmethod
+    def _after_position(order, position):
+        """
+        Build `(a, b, c) > (x, y, z)` as
+        a >= x AND (a > x OR (a = x AND b > y) OR (a = x AND b = y AND c > z)),
+        honouring each field's direction. The leading range keeps the first
+        column usable as an index bound.
+        """
+        def lookup(field, strict):
+            name = field.lstrip('-')
+            op = 'lt' if field.startswith('-') else 'gt'
+            return name + '__' + (op if strict else op + 'e')
+
+        condition = Q()
+        equal_prefix = Q()
+        for field, value in zip(order, position):
+            condition |= equal_prefix & Q(**{lookup(field, strict=True): value})
+            equal_prefix &= Q(**{field.lstrip('-'): value})
+
+        return Q(**{lookup(order[0], strict=False): position[0]}) & condition
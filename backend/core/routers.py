@@ -0,0 +1,151 @@
+"""
+Read-replica routing.
+
+Reads of events and authentication models made while serving a GET/HEAD/OPTIONS
+request go to a replica (SQL_REPLICA_HOSTS). Everything else uses the primary:
+writes, reads inside a transaction, unsafe requests, management commands and the
+registration worker. One replica is picked per request, so a response never mixes
+two replicas' snapshots.
+
+Read-your-writes: when an unsafe request by an authenticated user succeeds, that
+user is pinned to the primary for REPLICA_PIN_SECONDS. Their next GET (e.g.
+/my-registrations right after registering) then can't hit a replica that hasn't
+replayed the write yet. Pins live in the REPLICA_PIN_CACHE_ALIAS cache, which
+has to be shared (e.g. Redis) when there is more than one worker process.
+
+A replica whose replay lag exceeds REPLICA_MAX_LAG_SECONDS, or that can't be
+reached, is skipped. The lag is checked at most every REPLICA_LAG_CHECK_INTERVAL
+seconds per process. With no usable replica, reads fall back to the primary.
+"""
+
+import random
+import time
+from contextvars import ContextVar
+
+import jwt
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from rest_framework_simplejwt.settings import api_settings
+
+REPLICA_APPS = {'events', 'authentication'}
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+LAG_SQL = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+"""
+
+_UNDECIDED = object()
+
+# per request: _UNDECIDED until the first routed read, then the replica alias (None = primary);
+# unset outside requests that may read from a replica
+_request_replica = ContextVar('request_replica', default=None)
+
+# replica alias -> (monotonic time checked, lag in seconds or None when unreachable)
+_lag_checks = {}
+
+
+def replica_lag(alias):
+    """Seconds `alias` is behind the primary, or None when it can't be reached."""
+    now = time.monotonic()
+    checked = _lag_checks.get(alias)
+    if checked is not None and now - checked[0] < settings.REPLICA_LAG_CHECK_INTERVAL:
+        return checked[1]
+
+    try:
+        with connections[alias].cursor() as cursor:
+            cursor.execute(LAG_SQL)
+            lag = float(cursor.fetchone()[0])
+    except DatabaseError:
+        lag = None
+    _lag_checks[alias] = (now, lag)
+    return lag
+
+
+def pick_replica():
+    """A random replica that is within REPLICA_MAX_LAG_SECONDS, or None."""
+    replicas = list(settings.DATABASE_REPLICAS)
+    random.shuffle(replicas)
+    for alias in replicas:
+        lag = replica_lag(alias)
+        if lag is not None and lag <= settings.REPLICA_MAX_LAG_SECONDS:
+            return alias
+    return None
+
+
+def _pin_key(user_id):
+    return f"replica-pin:{user_id}"
+
+
+def pin_to_primary(user_id):
+    caches[settings.REPLICA_PIN_CACHE_ALIAS].set(_pin_key(user_id), 1, settings.REPLICA_PIN_SECONDS)
+
+
+def _claimed_user_id(request):
+    # Only decides where this request reads from, so the token isn't verified here;
+    # authentication still verifies it. A forged claim can at most move reads to the primary.
+    scheme, _, raw_token = request.headers.get('Authorization', '').partition(' ')
+    if scheme not in api_settings.AUTH_HEADER_TYPES or not raw_token:
+        return None
+    try:
+        return jwt.decode(raw_token, options={'verify_signature': False}).get(api_settings.USER_ID_CLAIM)
+    except jwt.InvalidTokenError:
+        return None
+
+
+def may_read_replica(request):
+    """Whether the request may read from a replica: a safe method from a user who isn't pinned."""
+    if request.method not in SAFE_METHODS:
+        return False
+    user_id = _claimed_user_id(request)
+    return user_id is None or caches[settings.REPLICA_PIN_CACHE_ALIAS].get(_pin_key(user_id)) is None
+
+
+def begin_request(replica_allowed):
+    return _request_replica.set(_UNDECIDED if replica_allowed else None)
+
+
+def end_request(token):
+    _request_replica.reset(token)
+
+
+def pin_after_write(request, response):
+    """Pin the user to the primary once an unsafe request of theirs has succeeded."""
+    if request.method in SAFE_METHODS or response.status_code >= 400:
+        return
+    # DRF stores the authenticated user on the underlying request
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        pin_to_primary(user.pk)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        replica = _request_replica.get()
+        if replica is None or model._meta.app_label not in REPLICA_APPS:
+            return DEFAULT_DB_ALIAS
+        # reads inside a transaction must see its writes (and may lock rows)
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        if replica is _UNDECIDED:
+            replica = pick_replica()
+            _request_replica.set(replica)
+        return replica or DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        # explicit, or saving an instance read from a replica would write to that replica
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # replicas receive the schema through replication
+        return db == DEFAULT_DB_ALIAS
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import copy
 import os
 from datetime import timedelta
 from pathlib import Path
@@ -51,6 +52,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.metrics.metrics_middleware',
+    'core.slowqueries.slow_query_middleware',
+    'core.middleware.concurrency_limit_middleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -59,6 +63,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.middleware.replica_routing_middleware',
 ]
 
 ROOT_URLCONF = 'core.urls'
@@ -92,9 +97,60 @@ DATABASES = {
         'PASSWORD': os.environ.get('SQL_PASSWORD', 'event_manager_password'),
         'HOST': os.environ.get('SQL_HOST', 'localhost'),
         'PORT': os.environ.get('SQL_PORT', '5432'),
+        # ping a reused connection before handing it out, so a restarted database costs one retry, not an error
+        'CONN_HEALTH_CHECKS': bool(int(os.environ.get('DB_CONN_HEALTH_CHECKS', 1))),
     }
 }
 
+# Connection pooling (psycopg 3). Each worker process keeps a pool of up to
+# DB_POOL_MAX_SIZE connections shared by its request threads instead of opening
+# one per request; see "Production Server" in README.md for sizing.
+DB_POOL = bool(int(os.environ.get('DB_POOL', 1)))
+DB_POOL_MAX_SIZE = int(os.environ.get('DB_POOL_MAX_SIZE', 10))
+
+if DB_POOL and DATABASES['default']['ENGINE'] == 'django.db.backends.postgresql':
+    DATABASES['default']['OPTIONS'] = {
+        'pool': {
+            'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', 2)),
+            'max_size': DB_POOL_MAX_SIZE,
+            # seconds a request waits for a free connection before failing
+            'timeout': float(os.environ.get('DB_POOL_TIMEOUT', 10)),
+            # idle connections above min_size are closed after this many seconds
+            'max_idle': float(os.environ.get('DB_POOL_MAX_IDLE', 300)),
+        },
+    }
+else:
+    # without a pool, keep each thread's connection open between requests
+    DATABASES['default']['CONN_MAX_AGE'] = int(os.environ.get('DB_CONN_MAX_AGE', 60))
+
+# Requests each worker process serves at once (core.middleware.concurrency_limit_middleware);
+# the rest wait for a turn. Django's ASGI handler gives every request its own
+# thread for sync code, so nothing else bounds them. Defaults to the pool size,
+# so a request never waits on the pool; 0 turns the cap off.
+MAX_CONCURRENT_REQUESTS = int(os.environ.get('MAX_CONCURRENT_REQUESTS', DB_POOL_MAX_SIZE))
+
+# Read replicas (core/routers.py): space-separated host[:port] list, using the
+# primary's database name and credentials. GET requests read events and
+# authentication data from a replica lagging at most REPLICA_MAX_LAG_SECONDS; a
+# user is pinned to the primary for REPLICA_PIN_SECONDS after each write of theirs.
+DATABASE_REPLICAS = []
+for _number, _host in enumerate(os.environ.get('SQL_REPLICA_HOSTS', '').split(), start=1):
+    _host, _, _port = _host.partition(':')
+    DATABASES[f'replica{_number}'] = {
+        **copy.deepcopy(DATABASES['default']),
+        'HOST': _host,
+        'PORT': _port or DATABASES['default']['PORT'],
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(f'replica{_number}')
+
+if DATABASE_REPLICAS:
+    DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+
+REPLICA_MAX_LAG_SECONDS = float(os.environ.get('REPLICA_MAX_LAG_SECONDS', 2))
+REPLICA_LAG_CHECK_INTERVAL = float(os.environ.get('REPLICA_LAG_CHECK_INTERVAL', 1))
+REPLICA_PIN_SECONDS = int(os.environ.get('REPLICA_PIN_SECONDS', 10))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -132,6 +188,23 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# Prometheus request metrics at /api/metrics (core/metrics.py), off by default. With a
+# token set, scrapers have to send it as `Authorization: Bearer <token>`; without
+# one, only admins can read them
+METRICS_ENABLED = bool(int(os.environ.get('METRICS_ENABLED', 0)))
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
+# Slow-query sampler (core/slowqueries.py), off unless SLOW_QUERY_MS > 0: statements
+# slower than that are logged with their route and call site, and a share of the
+# slow SELECTs is re-run under EXPLAIN (ANALYZE, BUFFERS), which doubles their cost
+SLOW_QUERY_MS = float(os.environ.get('SLOW_QUERY_MS', 0))
+SLOW_QUERY_EXPLAIN_RATE = float(os.environ.get('SLOW_QUERY_EXPLAIN_RATE', 0.1))
+# each process logs to its own file (pid before the extension) and rotates it itself
+SLOW_QUERY_LOG = os.environ.get('SLOW_QUERY_LOG', str(BASE_DIR / 'logs' / 'slow_queries.log'))
+SLOW_QUERY_LOG_MAX_BYTES = int(os.environ.get('SLOW_QUERY_LOG_MAX_BYTES', 10 * 1024 * 1024))
+SLOW_QUERY_LOG_BACKUPS = int(os.environ.get('SLOW_QUERY_LOG_BACKUPS', 5))
+SLOW_QUERY_LOG_MAX_AGE_DAYS = float(os.environ.get('SLOW_QUERY_LOG_MAX_AGE_DAYS', 7))
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -140,16 +213,29 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # Custom user model
 AUTH_USER_MODEL = 'authentication.User'
 
+# Serve hot list endpoints from .values() rows (events/rows.py) and render JSON
+# with orjson; both produce the same bytes as the ModelSerializer/JSONRenderer path
+API_FAST_SERIALIZATION = bool(int(os.environ.get('API_FAST_SERIALIZATION', 1)))
+
 # REST Framework settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'authentication.backends.ClaimsJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
+    'DEFAULT_RENDERER_CLASSES': (
+        'core.renderers.ORJSONRenderer' if API_FAST_SERIALIZATION else 'rest_framework.renderers.JSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PAGINATION_CLASS': 'core.pagination.KeysetPagination',
+    'PAGE_SIZE': int(os.environ.get('API_PAGE_SIZE', 50)),
 }
 
+# Upper bound for the ?page_size= override on paginated list endpoints
+API_MAX_PAGE_SIZE = int(os.environ.get('API_MAX_PAGE_SIZE', 200))
+
 # JWT settings
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=int(os.environ.get('JWT_ACCESS_TOKEN_LIFETIME', 60))),
@@ -159,6 +245,58 @@ SIMPLE_JWT = {
     'AUTH_HEADER_TYPES': ('Bearer',),
 }
 
+# Role/active state of JWT users, cached so requests don't load the user row
+# (authentication/backends.py); role changes and deactivations apply within the TTL
+JWT_USER_STATE_CACHE_ALIAS = 'auth'
+
+# Number of counter slots per event. Registrations for one event spread their
+# writes across this many rows, so more slots means less lock contention on a
+# hot event (see events.models.EventCounterSlot).
+REGISTRATION_COUNTER_SLOTS = int(os.environ.get('REGISTRATION_COUNTER_SLOTS', 8))
+
+# NOTIFY listeners (the live availability stream) after every registration change
+EVENT_AVAILABILITY_NOTIFY = bool(int(os.environ.get('EVENT_AVAILABILITY_NOTIFY', 1)))
+
+# Queued (flash-sale) registration: max pending requests per event before new
+# ones are turned away, and how many requests the worker admits per transaction
+REGISTRATION_QUEUE_LIMIT = int(os.environ.get('REGISTRATION_QUEUE_LIMIT', 5000))
+REGISTRATION_QUEUE_BATCH_SIZE = int(os.environ.get('REGISTRATION_QUEUE_BATCH_SIZE', 200))
+
+# Read-through cache for event detail and schedule responses (events/cache.py).
+# Defaults to an in-process LRU; point RESPONSE_CACHE_BACKEND/LOCATION at a shared
+# backend such as django.core.cache.backends.redis.RedisCache to share it.
+RESPONSE_CACHE_ALIAS = 'responses'
+RESPONSE_CACHE_BACKEND = os.environ.get('RESPONSE_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache')
+
+# Read-your-writes pins for the replica router (core/routers.py). Must be shared
+# between worker processes once there is more than one, e.g. RedisCache.
+REPLICA_PIN_CACHE_ALIAS = 'replica-pins'
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    JWT_USER_STATE_CACHE_ALIAS: {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'auth',
+        'TIMEOUT': int(os.environ.get('JWT_USER_STATE_TTL', 30)),
+        'OPTIONS': {'MAX_ENTRIES': int(os.environ.get('JWT_USER_STATE_MAX_ENTRIES', 10000))},
+    },
+    REPLICA_PIN_CACHE_ALIAS: {
+        'BACKEND': os.environ.get('REPLICA_PIN_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('REPLICA_PIN_CACHE_LOCATION', 'replica-pins'),
+    },
+    RESPONSE_CACHE_ALIAS: {
+        'BACKEND': RESPONSE_CACHE_BACKEND,
+        'LOCATION': os.environ.get('RESPONSE_CACHE_LOCATION', 'responses'),
+        'TIMEOUT': int(os.environ.get('RESPONSE_CACHE_TIMEOUT', 3600)),
+    },
+}
+if RESPONSE_CACHE_BACKEND.endswith('LocMemCache'):
+    CACHES[RESPONSE_CACHE_ALIAS]['OPTIONS'] = {
+        'MAX_ENTRIES': int(os.environ.get('RESPONSE_CACHE_MAX_ENTRIES', 5000)),
+    }
+
 # CORS settings
 CORS_ALLOW_ALL_ORIGINS = bool(os.environ.get('CORS_ALLOW_ALL_ORIGINS', False))  # Set to True for development
 CORS_ALLOW_CREDENTIALS = bool(os.environ.get('CORS_ALLOW_CREDENTIALS', True))
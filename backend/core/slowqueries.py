@@ -0,0 +1,264 @@
+"""
+Opt-in slow-query sampler (SLOW_QUERY_MS > 0).
+
+While a request is served, every SQL statement slower than SLOW_QUERY_MS is
+written as one JSON line to this process's log file with the route (resolved view name) and the
+first frame of project code that ran it, e.g. `events/serializers.py:62 in
+get_speakers`. For a SLOW_QUERY_EXPLAIN_RATE share of the slow SELECTs the
+statement is run again under EXPLAIN (ANALYZE, BUFFERS) and the plan is logged
+with it. Writes and locking reads are never explained, since ANALYZE executes
+the statement.
+
+Each process writes and rotates its own file, SLOW_QUERY_LOG with the pid
+before the extension (`slow_queries.<pid>.log`), rotated at
+SLOW_QUERY_LOG_MAX_BYTES with SLOW_QUERY_LOG_BACKUPS files kept; workers sharing
+one file would each rotate it from under the others. Files of other processes
+untouched for SLOW_QUERY_LOG_MAX_AGE_DAYS are removed when a process opens its
+own, so recycled gunicorn workers don't leave them behind forever.
+
+GET /api/slow-queries (admin only) groups the logged statements of all the
+files by their SQL text and lists the worst ones first.
+"""
+
+import json
+import logging
+import os
+import random
+import re
+import sys
+import time
+from contextvars import ContextVar
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DatabaseError, connections, transaction
+from django.db.backends.signals import connection_created
+from django.utils import timezone
+from django.utils.decorators import sync_and_async_middleware
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from authentication.models import User
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+PROJECT_DIR = str(settings.BASE_DIR) + '/'
+# frames of installed packages (e.g. a virtualenv inside the project) and of the
+# instrumentation wrapping cursor.execute aren't call sites
+SKIPPED_FILES = ('/site-packages/', __file__, metrics.__file__)
+# `IN (%s, %s, ...)` of any length is the same statement
+PLACEHOLDER_LIST = re.compile(r'%s(?:\s*,\s*%s)+')
+ORDERINGS = {'total': 'total_ms', 'max': 'max_ms', 'count': 'count'}
+
+# the request being served; unset outside requests and while our own EXPLAIN runs
+_current_request = ContextVar('slow_query_request', default=None)
+# the process the log handler was opened for
+_log_pid = None
+
+
+def _route(request):
+    match = getattr(request, 'resolver_match', None)
+    return match.view_name if match is not None else None
+
+
+def call_site():
+    """`path:line in function` of the innermost project frame on the stack, or None."""
+    frame = sys._getframe(1)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if filename.startswith(PROJECT_DIR) and not any(skipped in filename for skipped in SKIPPED_FILES):
+            return f"{filename[len(PROJECT_DIR):]}:{frame.f_lineno} in {frame.f_code.co_name}"
+        frame = frame.f_back
+    return None
+
+
+def fingerprint(sql):
+    return PLACEHOLDER_LIST.sub('%s, ...', ' '.join(sql.split()))
+
+
+def explainable(sql):
+    statement = sql.lstrip().upper()
+    return statement.startswith('SELECT') and ' FOR UPDATE' not in statement and ' FOR SHARE' not in statement
+
+
+def explain(connection, sql, params):
+    token = _current_request.set(None)
+    try:
+        # a savepoint, so a failing EXPLAIN can't break the request's transaction
+        with transaction.atomic(using=connection.alias):
+            with connection.cursor() as cursor:
+                cursor.execute(f"EXPLAIN (ANALYZE, BUFFERS) {sql}", params)
+                return '\n'.join(row[0] for row in cursor.fetchall())
+    except DatabaseError as exc:
+        return f"EXPLAIN failed: {exc}"
+    finally:
+        _current_request.reset(token)
+
+
+def sample_slow_queries(execute, sql, params, many, context):
+    request = _current_request.get()
+    if request is None:
+        return execute(sql, params, many, context)
+
+    started = time.perf_counter()
+    result = execute(sql, params, many, context)
+    duration_ms = (time.perf_counter() - started) * 1000
+    if duration_ms < settings.SLOW_QUERY_MS:
+        return result
+
+    entry = {
+        'at': timezone.now().isoformat(),
+        'duration_ms': round(duration_ms, 2),
+        'route': _route(request),
+        'method': request.method,
+        'call_site': call_site(),
+        'sql': fingerprint(sql),
+    }
+    if not many and explainable(sql) and random.random() < settings.SLOW_QUERY_EXPLAIN_RATE:
+        entry['plan'] = explain(context['connection'], sql, params)
+    # a worker forked after the middleware was built still holds the master's handler
+    if _log_pid != os.getpid():
+        _configure_log()
+    logger.info(json.dumps(entry))
+    return result
+
+
+def _install_wrapper(sender, connection, **kwargs):
+    if sample_slow_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(sample_slow_queries)
+
+
+def log_files():
+    """The log files of every process, backups included."""
+    path = Path(settings.SLOW_QUERY_LOG)
+    return path.parent.glob(f"{path.stem}.*{path.suffix}*")
+
+
+def _configure_log():
+    global _log_pid
+    _log_pid = os.getpid()
+    path = Path(settings.SLOW_QUERY_LOG).resolve()
+    path = path.with_name(f"{path.stem}.{os.getpid()}{path.suffix}")
+    for handler in logger.handlers[:]:
+        if handler.baseFilename == str(path):
+            return
+        logger.removeHandler(handler)
+        handler.close()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    expired = time.time() - settings.SLOW_QUERY_LOG_MAX_AGE_DAYS * 86400
+    for log_file in log_files():
+        try:
+            if log_file.stat().st_mtime < expired:
+                log_file.unlink()
+        except FileNotFoundError:
+            continue
+    # delay: the gunicorn master builds the middleware before forking, and must not create a file of its own
+    handler = RotatingFileHandler(
+        path, maxBytes=settings.SLOW_QUERY_LOG_MAX_BYTES, backupCount=settings.SLOW_QUERY_LOG_BACKUPS, delay=True,
+    )
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+
+@sync_and_async_middleware
+def slow_query_middleware(get_response):
+    """Scopes the sampler to requests, so each logged query knows its route."""
+    if settings.SLOW_QUERY_MS <= 0:
+        raise MiddlewareNotUsed
+    _configure_log()
+    connection_created.connect(_install_wrapper, dispatch_uid='core.slowqueries')
+    for connection in connections.all(initialized_only=True):
+        _install_wrapper(None, connection)
+
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            token = _current_request.set(request)
+            try:
+                return await get_response(request)
+            finally:
+                _current_request.reset(token)
+    else:
+        def middleware(request):
+            token = _current_request.set(request)
+            try:
+                return get_response(request)
+            finally:
+                _current_request.reset(token)
+    return middleware
+
+
+def read_log():
+    """Logged entries of every process's log file and its backups."""
+    for log_file in log_files():
+        try:
+            with open(log_file) as f:
+                for line in f:
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        # a line cut short by a concurrent write or rotation
+                        continue
+        except FileNotFoundError:
+            continue
+
+
+def top_offenders(entries, order='total', route=None, limit=20):
+    """Group entries by statement, worst first by total time, max time or count."""
+    groups = {}
+    for entry in entries:
+        if route and entry.get('route') != route:
+            continue
+        group = groups.setdefault(entry['sql'], {
+            'sql': entry['sql'], 'count': 0, 'total_ms': 0.0, 'max_ms': 0.0,
+            'last_seen': None, 'routes': set(), 'call_sites': set(), 'plan': None, 'plan_ms': None,
+        })
+        group['count'] += 1
+        group['total_ms'] += entry['duration_ms']
+        group['max_ms'] = max(group['max_ms'], entry['duration_ms'])
+        group['last_seen'] = max(group['last_seen'] or entry['at'], entry['at'])
+        group['routes'].add(entry.get('route'))
+        group['call_sites'].add(entry.get('call_site'))
+        # keep the plan of the slowest explained execution
+        if entry.get('plan') and (group['plan_ms'] is None or entry['duration_ms'] > group['plan_ms']):
+            group['plan'], group['plan_ms'] = entry['plan'], entry['duration_ms']
+
+    worst = sorted(groups.values(), key=lambda group: group[ORDERINGS[order]], reverse=True)[:limit]
+    for group in worst:
+        group['total_ms'] = round(group['total_ms'], 2)
+        group['mean_ms'] = round(group['total_ms'] / group['count'], 2)
+        group['routes'] = sorted(r for r in group['routes'] if r)
+        group['call_sites'] = sorted(s for s in group['call_sites'] if s)
+    return worst
+
+
+class SlowQueryListView(APIView):
+    """
+    Slowest logged statements (admin only).
+    ?order=total|max|count (default total), ?route=<view name>, ?limit=<n> (default 20, max 200)
+    """
+
+    def get(self, request):
+        if getattr(request.user, 'role', None) != User.ADMIN:
+            return Response({"error": "Permission denied"}, status=status.HTTP_403_FORBIDDEN)
+
+        order = request.query_params.get('order', 'total')
+        if order not in ORDERINGS:
+            return Response({"order": f"Must be one of: {', '.join(ORDERINGS)}."}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = min(max(int(request.query_params.get('limit', 20)), 1), 200)
+        except ValueError:
+            return Response({"limit": "Must be an integer."}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            'enabled': settings.SLOW_QUERY_MS > 0,
+            'threshold_ms': settings.SLOW_QUERY_MS,
+            'results': top_offenders(read_log(), order, request.query_params.get('route'), limit),
+        })
@@ -0,0 +1,141 @@
+"""
+Per-route query and latency budgets for the API test suites.
+
+Each app's QueryBudgetTests request every route it serves twice: once against
+the seeded data and once after `grow()` has added BUDGET_GROWTH more rows of
+every kind. A route must run the same number of SQL queries both times (a count
+that grows with the rows is an N+1), and no more than its budget in
+query_budgets.json. The budget also has a wall-time cap, `max_ms`, to catch a
+route that turns into a table scan or a per-row loop in Python. Timings depend
+on the machine, so it is only checked on request, on a quiet one:
+
+    QUERY_BUDGET_TIMING=1 python manage.py test
+
+After an intended change in a route's query count, rewrite the budgets with
+
+    QUERY_BUDGET_UPDATE=1 python manage.py test
+
+and commit query_budgets.json with the change, so reviewers see the new count.
+"""
+
+import abc
+import json
+import os
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, URLResolver, get_resolver
+from rest_framework.test import APIClient
+
+from authentication.tokens import ClaimsRefreshToken
+
+BUDGETS_PATH = settings.BASE_DIR / 'query_budgets.json'
+BUDGET_GROWTH = 10
+DEFAULT_MAX_MS = 500
+
+
+def load_budgets():
+    try:
+        with open(BUDGETS_PATH) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def url_names(urlconf):
+    """Names of the routes in `urlconf`, including included and router-generated ones."""
+    def walk(patterns):
+        for pattern in patterns:
+            if isinstance(pattern, URLResolver):
+                yield from walk(pattern.url_patterns)
+            elif isinstance(pattern, URLPattern) and pattern.name:
+                yield pattern.name
+    return set(walk(get_resolver(urlconf).url_patterns))
+
+
+class QueryBudgetMixin(abc.ABC):
+    """
+    Mixed into a TestCase. Subclasses set `urlconf`, implement `grow(n)` and
+    `budget_requests()`, and list routes they can't measure in `unmeasured`
+    with the reason.
+    """
+    urlconf = None
+    unmeasured = {}
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.update_budgets = os.environ.get('QUERY_BUDGET_UPDATE') == '1'
+        cls.check_timing = os.environ.get('QUERY_BUDGET_TIMING') == '1'
+        cls.measured = {}
+
+    @classmethod
+    def tearDownClass(cls):
+        if cls.update_budgets and cls.measured:
+            budgets = load_budgets()
+            for key, queries in cls.measured.items():
+                budgets[key] = {'queries': queries, 'max_ms': budgets.get(key, {}).get('max_ms', DEFAULT_MAX_MS)}
+            with open(BUDGETS_PATH, 'w') as f:
+                json.dump(dict(sorted(budgets.items())), f, indent=2)
+                f.write('\n')
+        super().tearDownClass()
+
+    @abc.abstractmethod
+    def grow(self, n):
+        """Add `n` more rows of every kind the routes list or embed."""
+
+    @abc.abstractmethod
+    def budget_requests(self):
+        """
+        {"METHOD url-name[ variant]": make_request}. make_request() runs outside the
+        measurement and returns (method, path, data, user); user may be None.
+        """
+
+    def measure(self, make_request):
+        method, path, data, user = make_request()
+        client = APIClient()
+        if user is not None:
+            client.credentials(HTTP_AUTHORIZATION=f'Bearer {ClaimsRefreshToken.for_user(user).access_token}')
+        # cold caches: measure the queries a route runs when nothing is cached
+        for cache in caches.all():
+            cache.clear()
+
+        with CaptureQueriesContext(connections[DEFAULT_DB_ALIAS]) as queries:
+            started = time.perf_counter()
+            response = getattr(client, method.lower())(path, data, format='json')
+            elapsed_ms = (time.perf_counter() - started) * 1000
+        self.assertLess(response.status_code, 400, getattr(response, 'data', response))
+        return len(queries), elapsed_ms, queries
+
+    def test_query_budgets(self):
+        budgets = load_budgets()
+        for key, make_request in self.budget_requests().items():
+            with self.subTest(key), transaction.atomic():
+                seeded, _, _ = self.measure(make_request)
+                self.grow(BUDGET_GROWTH)
+                grown, elapsed_ms, queries = self.measure(make_request)
+                transaction.set_rollback(True)
+
+                sql = '\n'.join(query['sql'] for query in queries.captured_queries)
+                self.assertEqual(
+                    grown, seeded,
+                    f"{key} ran {seeded} queries, then {grown} after adding {BUDGET_GROWTH} rows "
+                    f"of each kind (N+1?):\n{sql}",
+                )
+                if self.update_budgets:
+                    self.measured[key] = grown
+                    continue
+
+                self.assertIn(key, budgets, f"{key} has no budget in {BUDGETS_PATH.name}")
+                budget = budgets[key]
+                self.assertLessEqual(grown, budget['queries'], f"{key} exceeds its query budget:\n{sql}")
+                if self.check_timing:
+                    self.assertLessEqual(elapsed_ms, budget['max_ms'], f"{key} took {elapsed_ms:.0f} ms")
+
+    def test_every_route_is_measured(self):
+        measured = {key.split()[1] for key in self.budget_requests()}
+        missing = url_names(self.urlconf) - measured - set(self.unmeasured)
+        self.assertFalse(missing, f"routes without a query budget: {sorted(missing)}")
@@ -17,8 +17,13 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import include, path
 
+from .metrics import metrics_view
+from .slowqueries import SlowQueryListView
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/auth/', include('authentication.urls')),
+    path('api/metrics', metrics_view, name='metrics'),
+    path('api/slow-queries', SlowQueryListView.as_view(), name='slow-queries'),
     path('api/', include('events.urls')),
 ]
@@ -0,0 +1,252 @@
+"""
+Bulk agenda import and speaker double-booking checks.
+
+Creating sessions one by one costs a full_clean() (event window, uniqueness)
+and an exclusion-constraint check per row, and stops at the first overlap. An
+import instead checks a whole agenda in memory: every session against the event
+window, then, per track and per speaker, against the sessions already booked
+(binary search over them, sorted by start) and against the other imported
+sessions (sort by start, sweep keeping the accepted session that ends last).
+All conflicts are reported at once; the sessions, any new tracks and the speaker
+rows are then inserted with bulk_create in one transaction. The exclusion
+constraint still guards against track overlaps added concurrently.
+
+Speakers have no such constraint: a speaker can be booked into two sessions at
+once, in different tracks or events. Session writes and imports check the
+speakers' other sessions with a GiST-indexed `time_range &&` lookup, and
+speaker_conflicts() finds the double bookings already stored with the same
+sort-and-sweep in SQL, so it reads each booking once instead of pairing up all
+sessions of every speaker.
+"""
+
+from bisect import bisect_left
+from collections import defaultdict
+
+from django.db import connection, transaction
+from django.db.models import F
+
+from .cache import touch_events
+from .models import Session, Speaker, Track
+
+
+def _conflict(position, item, error, **with_):
+    conflict = {'index': position, 'title': item['title'], 'error': error}
+    if with_:
+        conflict['conflicts_with'] = with_
+    return conflict
+
+
+def _sweep(items, indexes, booked, conflicts, existing_error, imported_error):
+    """
+    Flag the `indexes` of `items` that overlap a `booked` session (dicts with id,
+    title, start_time, end_time; they may overlap each other) or an earlier
+    accepted item. Items already in `conflicts` are skipped and block nothing.
+    """
+    booked = sorted(booked, key=lambda session: session['start_time'])
+    starts = [session['start_time'] for session in booked]
+    # ends_last[i]: of booked[:i + 1], the session that ends last
+    ends_last, latest = [], None
+    for session in booked:
+        if latest is None or session['end_time'] > latest['end_time']:
+            latest = session
+        ends_last.append(latest)
+
+    last = None
+    for index in sorted(indexes, key=lambda i: (items[i]['start_time'], items[i]['end_time'])):
+        if index in conflicts:
+            continue
+        item = items[index]
+        # booked[:position] start before this item ends; one of them overlaps iff the last to end does
+        position = bisect_left(starts, item['end_time'])
+        if position and ends_last[position - 1]['end_time'] > item['start_time']:
+            session = ends_last[position - 1]
+            conflicts[index] = _conflict(index, item, existing_error, id=str(session['id']), title=session['title'])
+        elif last is not None and item['start_time'] < items[last]['end_time']:
+            conflicts[index] = _conflict(index, item, imported_error, index=last, title=items[last]['title'])
+        elif last is None or item['end_time'] > items[last]['end_time']:
+            last = index
+
+
+def find_conflicts(event, items, existing, speakers, bookings=()):
+    """
+    Conflicts of the imported `items` (validated session dicts, in payload order)
+    with `event`'s window, unknown speakers ({id: name} of the known ones),
+    `existing` sessions of their tracks (dicts with id, title, track_name,
+    start_time, end_time), the other sessions of their speakers in any event
+    (`bookings`, the same dicts with speaker_id instead of track_name) and each
+    other. Sessions without a track never overlap by track.
+    """
+    conflicts = {}
+    for index, item in enumerate(items):
+        if item['start_time'] < event.start_time or item['end_time'] > event.end_time:
+            conflicts[index] = _conflict(index, item, "Session times must be inside parent event times")
+            continue
+        unknown = [str(pk) for pk in item['speakers_ids'] if pk not in speakers]
+        if unknown:
+            conflicts[index] = _conflict(index, item, f"Unknown speakers: {', '.join(unknown)}")
+
+    booked = defaultdict(list)
+    for session in existing:
+        booked[session['track_name']].append(session)
+    imported = defaultdict(list)
+    for index, item in enumerate(items):
+        if item['track']:
+            imported[item['track']].append(index)
+    for track, indexes in imported.items():
+        _sweep(
+            items, indexes, booked[track], conflicts,
+            "Overlaps an existing session in the track", "Overlaps another imported session in the track",
+        )
+
+    booked = defaultdict(list)
+    for session in bookings:
+        booked[session['speaker_id']].append(session)
+    imported = defaultdict(list)
+    for index, item in enumerate(items):
+        for speaker_id in dict.fromkeys(item['speakers_ids']):
+            imported[speaker_id].append(index)
+    for speaker_id, indexes in imported.items():
+        if speaker_id in speakers:
+            message = f"{speakers[speaker_id]} has another session at that time"
+            _sweep(items, indexes, booked[speaker_id], conflicts, message, message)
+    return [conflicts[index] for index in sorted(conflicts)]
+
+
+def import_agenda(event, items, partial=False):
+    """
+    Insert `items` (AgendaSessionSerializer data) as sessions of `event`. Returns
+    (created sessions, conflicts). With conflicts nothing is inserted, unless
+    `partial`, which inserts the sessions that have none.
+    """
+    speaker_ids = {pk for item in items for pk in item['speakers_ids']}
+    speakers = dict(Speaker.objects.filter(pk__in=speaker_ids).values_list('pk', 'name')) if speaker_ids else {}
+    track_names = {item['track'] for item in items if item['track']}
+    existing = Session.objects.filter(event=event, track__name__in=track_names).values(
+        'id', 'title', 'start_time', 'end_time', track_name=F('track__name'),
+    ) if track_names else []
+
+    # one row per booked session and speaker; values() reuses the filter's speakers join
+    bookings = Session.objects.filter(
+        speakers__in=speakers,
+        time_range__overlap=(min(item['start_time'] for item in items), max(item['end_time'] for item in items)),
+    ).order_by().values('id', 'title', 'start_time', 'end_time', speaker_id=F('speakers')) if speakers else []
+
+    conflicts = find_conflicts(event, items, existing, speakers, bookings)
+    if conflicts and not partial:
+        return [], conflicts
+    skipped = {conflict['index'] for conflict in conflicts}
+    accepted = [item for index, item in enumerate(items) if index not in skipped]
+    if not accepted:
+        return [], conflicts
+
+    with transaction.atomic():
+        tracks = {track.name: track for track in Track.objects.filter(event=event, name__in=track_names)}
+        new_tracks = [
+            Track(event=event, name=name)
+            for name in sorted({item['track'] for item in accepted if item['track']} - tracks.keys())
+        ]
+        Track.objects.bulk_create(new_tracks)
+        tracks.update((track.name, track) for track in new_tracks)
+
+        # bulk_create skips save(), which fills in time_range for the exclusion constraint
+        sessions = Session.objects.bulk_create([
+            Session(
+                event=event,
+                track=tracks.get(item['track']),
+                title=item['title'],
+                description=item['description'],
+                start_time=item['start_time'],
+                end_time=item['end_time'],
+                time_range=(item['start_time'], item['end_time']),
+                room=item['room'],
+                metadata=item['metadata'],
+            )
+            for item in accepted
+        ])
+        Session.speakers.through.objects.bulk_create([
+            Session.speakers.through(session_id=session.pk, speaker_id=speaker_id)
+            for session, item in zip(sessions, accepted)
+            for speaker_id in dict.fromkeys(item['speakers_ids'])
+        ])
+        # bulk writes send no signals, so move the cache version by hand
+        touch_events(pk=event.pk)
+    return sessions, conflicts
+
+
+# speaker_conflicts() sessions, keyed like SessionSerializer output
+SESSION_COLUMNS = {
+    'id': 'id', 'title': 'title', 'event': 'event_id', 'track': 'track_id',
+    'room': 'room', 'start_time': 'start_time', 'end_time': 'end_time',
+}
+
+
+def speaker_conflicts(speaker_id=None, event_id=None, limit=100):
+    """
+    Pairs of overlapping sessions that share a speaker, in the order the
+    overlaps begin: all of them, those of one speaker, or those with at least one
+    session in one event. Each pair is [earlier session, later session].
+    """
+    through, sessions = Session.speakers.through._meta.db_table, Session._meta.db_table
+    speakers, speaker_params = [], []
+    if speaker_id is not None:
+        speakers.append("a.speaker_id = %s")
+        speaker_params.append(speaker_id)
+    if event_id is not None:
+        speakers.append(
+            f"a.speaker_id IN (SELECT t.speaker_id FROM {through} t "
+            f"JOIN {sessions} e ON e.id = t.session_id WHERE e.event_id = %s)"
+        )
+        speaker_params.append(event_id)
+        # the later session of a pair may be in another event, so filter the pairs
+        flagged_limit, flagged_params = "", []
+        pair_filter, pair_params = "AND (s1.event_id = %s OR s2.event_id = %s)", [event_id, event_id]
+    else:
+        # each flagged booking makes at least one pair, so the first `limit` hold the first `limit` pairs
+        flagged_limit, flagged_params = "LIMIT %s", [limit]
+        pair_filter, pair_params = "", []
+    where = f"WHERE {' AND '.join(speakers)}" if speakers else ""
+    columns = ', '.join(f"{alias}.{column}" for alias in ('s1', 's2') for column in SESSION_COLUMNS.values())
+
+    # Sort each speaker's sessions by start and sweep: a session starting before
+    # the latest end of the earlier ones overlaps one of them. Only those are
+    # joined back (time_range &&) to the earlier sessions they overlap.
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            WITH bookings AS (
+                SELECT a.speaker_id, a.session_id, s.time_range,
+                       max(upper(s.time_range)) OVER (
+                           PARTITION BY a.speaker_id ORDER BY lower(s.time_range), a.session_id
+                           ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING
+                       ) AS busy_until
+                FROM {through} a
+                JOIN {sessions} s ON s.id = a.session_id
+                {where}
+            ), late AS (
+                SELECT speaker_id, session_id, time_range FROM bookings
+                WHERE lower(time_range) < busy_until
+                ORDER BY lower(time_range), speaker_id, session_id
+                {flagged_limit}
+            )
+            SELECT sp.id, sp.name, {columns}
+            FROM late
+            JOIN {through} b ON b.speaker_id = late.speaker_id AND b.session_id <> late.session_id
+            JOIN {sessions} s1 ON s1.id = b.session_id AND s1.time_range && late.time_range
+            JOIN {sessions} s2 ON s2.id = late.session_id
+            JOIN {Speaker._meta.db_table} sp ON sp.id = late.speaker_id
+            WHERE (lower(s1.time_range), s1.id) < (lower(late.time_range), late.session_id) {pair_filter}
+            ORDER BY lower(late.time_range), late.speaker_id, late.session_id, lower(s1.time_range), s1.id
+            LIMIT %s
+            """,
+            [*speaker_params, *flagged_params, *pair_params, limit],
+        )
+        rows = cursor.fetchall()
+
+    size = len(SESSION_COLUMNS)
+    return [
+        {
+            'speaker': {'id': row[0], 'name': row[1]},
+            'sessions': [dict(zip(SESSION_COLUMNS, row[2:2 + size])), dict(zip(SESSION_COLUMNS, row[2 + size:]))],
+        }
+        for row in rows
+    ]
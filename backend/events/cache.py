@@ -0,0 +1,114 @@
+"""
+Versioned read-through cache for event detail and schedule responses.
+
+Entries are keyed on the event id plus the event's version stamp, its
+`updated_at`. Saving an event moves the stamp itself; saving or deleting one of
+its tracks, sessions or speakers (or its venue) touches `updated_at` through the
+signal handlers below. A stale entry is therefore never read again and simply
+ages out of the cache backend. A deleted event has no stamp to look up, so
+nothing is served for it.
+
+The backend is the `responses` alias in settings.CACHES. By default that is an
+in-process LocMemCache, an LRU that evicts once it holds RESPONSE_CACHE_MAX_ENTRIES
+entries. Any Django cache backend (e.g. Redis) can replace it.
+"""
+
+import hashlib
+import threading
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_delete)
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import Event, Session, Speaker, Track, Venue
+
+
+class CacheStats:
+    """Per-process hit/miss counters, by response kind."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = Counter()
+
+    def record(self, kind, hit):
+        with self._lock:
+            self._counts[(kind, "hits" if hit else "misses")] += 1
+
+    def snapshot(self):
+        with self._lock:
+            counts = dict(self._counts)
+        stats = {}
+        for (kind, outcome), value in counts.items():
+            stats.setdefault(kind, {"hits": 0, "misses": 0})[outcome] = value
+        return stats
+
+    def reset(self):
+        with self._lock:
+            self._counts.clear()
+
+
+cache_stats = CacheStats()
+
+
+def response_cache():
+    return caches[settings.RESPONSE_CACHE_ALIAS]
+
+
+def cache_key(kind, event_id, version, variant=""):
+    # the variant (e.g. a full URL with cursor/page_size) is hashed to keep keys short and backend-safe
+    digest = hashlib.md5(variant.encode("utf-8")).hexdigest() if variant else "-"
+    return f"{kind}:{event_id}:{version.timestamp():.6f}:{digest}"
+
+
+def read_through(kind, event_id, version, build, variant=""):
+    """Return the cached data for this event version, building and storing it on a miss."""
+    cache = response_cache()
+    key = cache_key(kind, event_id, version, variant)
+    data = cache.get(key)
+    if data is not None:
+        cache_stats.record(kind, hit=True)
+        return data
+
+    cache_stats.record(kind, hit=False)
+    data = build()
+    cache.set(key, data)
+    return data
+
+
+def touch_events(**filters):
+    """Move the version stamp of the matching events so their cached responses go stale."""
+    Event.objects.filter(**filters).update(updated_at=timezone.now())
+
+
+@receiver([post_save, post_delete], sender=Track)
+@receiver([post_save, post_delete], sender=Session)
+def _schedule_changed(sender, instance, **kwargs):
+    touch_events(pk=instance.event_id)
+
+
+@receiver(m2m_changed, sender=Session.speakers.through)
+def _session_speakers_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action in ("post_add", "post_remove", "post_clear"):
+            touch_events(pk=instance.event_id)
+    elif action == "pre_clear":
+        # speaker.sessions.clear(): pk_set is not provided, find the sessions before they go
+        touch_events(sessions__speakers=instance)
+    elif action in ("post_add", "post_remove") and pk_set:
+        touch_events(sessions__in=pk_set)
+
+
+@receiver(post_save, sender=Speaker)
+@receiver(pre_delete, sender=Speaker)
+def _speaker_changed(sender, instance, **kwargs):
+    # speakers are embedded in the sessions of every event they speak at
+    touch_events(sessions__speakers=instance)
+
+
+@receiver(post_save, sender=Venue)
+def _venue_changed(sender, instance, **kwargs):
+    touch_events(venue=instance)
@@ -0,0 +1,100 @@
+import re
+import uuid
+from datetime import datetime, time
+
+from django.contrib.postgres.search import SearchQuery
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework import serializers
+from rest_framework.filters import BaseFilterBackend
+
+from .models import Event
+
+TRUE_VALUES = ('1', 'true', 'yes')
+FALSE_VALUES = ('0', 'false', 'no')
+
+
+def build_prefix_search_query(text):
+    """
+    Turn free text into a prefix tsquery so "conf jak" matches "Conference in Jakarta".
+    Returns None when the text has no searchable words.
+    """
+    words = re.findall(r"\w+", text.lower())
+    if not words:
+        return None
+    raw = " & ".join(f"{word}:*" for word in words)
+    return SearchQuery(raw, config="english", search_type="raw")
+
+
+def parse_datetime_param(name, value, end_of_day=False):
+    """Accept either an ISO datetime or a plain date (YYYY-MM-DD)."""
+    # a plain date first: parse_datetime() would also accept it, as midnight
+    try:
+        day = parse_date(value)
+        parsed = parse_datetime(value) if day is None else None
+    except ValueError:
+        parsed = day = None
+    if day is not None:
+        parsed = datetime.combine(day, time.max if end_of_day else time.min)
+    elif parsed is None:
+        raise serializers.ValidationError({name: "Enter a valid ISO date or datetime."})
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def parse_id_list_param(value, limit):
+    """Parse a comma-separated list of UUIDs; raises ValueError with a client-facing message."""
+    raw_ids = [item.strip() for item in value.split(',') if item.strip()]
+    if not raw_ids:
+        raise ValueError("Provide a comma-separated list of event ids.")
+    if len(raw_ids) > limit:
+        raise ValueError(f"At most {limit} event ids per request.")
+    try:
+        return {uuid.UUID(item) for item in raw_ids}
+    except ValueError:
+        raise ValueError("Event ids must be UUIDs.")
+
+
+class EventSearchFilter(BaseFilterBackend):
+    """
+    Server-side filtering for the event list:
+    ?q=, ?city=, ?start_after=, ?start_before=, ?status=, ?has_capacity=
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        params = request.query_params
+
+        q = params.get('q', '').strip()
+        if q:
+            query = build_prefix_search_query(q)
+            if query is not None:
+                queryset = queryset.filter(search_vector=query)
+
+        city = params.get('city')
+        if city:
+            queryset = queryset.filter(venue__city=city)
+
+        start_after = params.get('start_after')
+        if start_after:
+            queryset = queryset.filter(start_time__gte=parse_datetime_param('start_after', start_after))
+
+        start_before = params.get('start_before')
+        if start_before:
+            queryset = queryset.filter(
+                start_time__lte=parse_datetime_param('start_before', start_before, end_of_day=True)
+            )
+
+        status = params.get('status')
+        if status:
+            if status not in dict(Event.STATUS_CHOICES):
+                raise serializers.ValidationError({'status': f"'{status}' is not a valid status."})
+            queryset = queryset.filter(status=status)
+
+        has_capacity = params.get('has_capacity', '').lower()
+        if has_capacity in TRUE_VALUES:
+            queryset = queryset.with_available_seats(True)
+        elif has_capacity in FALSE_VALUES:
+            queryset = queryset.with_available_seats(False)
+
+        return queryset
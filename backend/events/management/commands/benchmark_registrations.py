@@ -0,0 +1,436 @@
+"""
+Django management command to load-test registration under contention.
+
+Creates throwaway events and attendees (prefixed `bench_`) in the configured
+database. Concurrent workers then register and cancel against them through the
+full API stack: URL routing, middleware, JWT authentication, serializers and
+Registration.register. After the run it checks every event for oversell, and
+finally deletes what it created.
+
+Usage:
+    python manage.py benchmark_registrations                                   # 8 threads, 10s, one event
+    python manage.py benchmark_registrations --mode processes --concurrency 16
+    python manage.py benchmark_registrations --mode asyncio --concurrency 200 --events 5
+    python manage.py benchmark_registrations --capacity 50 --users 500 --cancel-ratio 0.3 --keep
+
+Modes:
+    threads    Threads calling Django's WSGI handler, as under a threaded server
+    processes  Forked processes calling the WSGI handler, like preforked workers
+    asyncio    Coroutines calling Django's ASGI handler, as under uvicorn
+
+Requests go through the same handler a server would call, so connections are
+returned to the pool (or closed) at the end of each request as in production.
+
+Lock wait time is sampled from pg_stat_activity every --sample-interval seconds.
+It is an estimate: backends waiting on a lock, times the interval.
+"""
+
+import asyncio
+import io
+import json
+import logging
+import multiprocessing
+import random
+import statistics
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import timedelta
+
+from authentication.models import User
+from authentication.tokens import ClaimsRefreshToken
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.db.models import Count, Q
+from django.test.utils import override_settings
+from django.utils import timezone
+from events.management.utils import close_db_connections
+from events.models import Event, Registration, Venue
+
+# what run_worker() needs besides its worker number; set in the parent before the workers start
+_job = None
+
+LOCK_WAITS_SQL = """
+    SELECT count(*) FROM pg_stat_activity
+    WHERE datname = current_database() AND wait_event_type = 'Lock'
+"""
+
+
+def wsgi_request(handler, method, path, token):
+    """Call the WSGI handler like a server would; returns (status code, body)."""
+    environ = {
+        "REQUEST_METHOD": method,
+        "PATH_INFO": path,
+        "QUERY_STRING": "",
+        "SERVER_NAME": "testserver",
+        "SERVER_PORT": "80",
+        "SERVER_PROTOCOL": "HTTP/1.1",
+        "HTTP_HOST": "testserver",
+        "HTTP_AUTHORIZATION": f"Bearer {token}",
+        "CONTENT_TYPE": "application/json",
+        "CONTENT_LENGTH": "2",
+        "wsgi.input": io.BytesIO(b"{}"),
+        "wsgi.errors": sys.stderr,
+        "wsgi.url_scheme": "http",
+        "wsgi.version": (1, 0),
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+    }
+    status = []
+    body = b"".join(handler(environ, lambda status_line, headers: status.append(status_line)))
+    return int(status[0].split()[0]), body
+
+
+async def asgi_request(application, method, path, token):
+    """Call the ASGI application like a server would; returns (status code, body)."""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [
+            (b"host", b"testserver"),
+            (b"authorization", f"Bearer {token}".encode()),
+            (b"content-type", b"application/json"),
+            (b"content-length", b"2"),
+        ],
+        "client": ("127.0.0.1", 0),
+        "server": ("testserver", 80),
+    }
+    messages = [{"type": "http.request", "body": b"{}", "more_body": False}]
+    # after the body the client stays connected: Django watches receive() for a disconnect
+    connected = asyncio.get_running_loop().create_future()
+
+    async def receive():
+        if messages:
+            return messages.pop(0)
+        return await connected
+
+    status, body = [], []
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            status.append(message["status"])
+        elif message["type"] == "http.response.body":
+            body.append(message.get("body", b""))
+
+    await application(scope, receive, send)
+    return status[0], b"".join(body)
+
+
+def _outcome(op, status, body):
+    """`register 201`, `register 400 Event capacity reached`, ..."""
+    outcome = f"{op} {status}"
+    if status >= 400:
+        try:
+            data = json.loads(body)
+        except ValueError:
+            return outcome
+        detail = data.get("non_field_errors") or data.get("detail") or next(iter(data.values()), "")
+        if isinstance(detail, list):
+            detail = detail[0] if detail else ""
+        outcome = f"{outcome} {str(detail)[:60]}"
+    return outcome
+
+
+class _Worker:
+    """One simulated client: its own attendees, their registrations, and a timed loop of requests."""
+
+    def __init__(self, number):
+        self.rng = random.Random(f"{_job['seed']}:{number}")
+        # attendees are split between workers so two workers never act for the same user
+        self.users = _job["users"][number::_job["concurrency"]]
+        self.registrations = {}
+        self.results = []
+
+    def next_request(self):
+        user_id, token = self.rng.choice(self.users)
+        event_id = self.rng.choice(_job["event_ids"])
+        registration_id = self.registrations.get((user_id, event_id))
+        if registration_id and self.rng.random() < _job["cancel_ratio"]:
+            return "cancel", (user_id, event_id), "DELETE", f"/api/events/{event_id}/registrations/{registration_id}", token
+        return "register", (user_id, event_id), "POST", f"/api/events/{event_id}/registrations", token
+
+    def record(self, op, key, status, body, latency):
+        if op == "register" and status == 201:
+            self.registrations[key] = json.loads(body)["id"]
+        elif op == "cancel" and status == 204:
+            del self.registrations[key]
+        self.results.append((_outcome(op, status, body), latency))
+
+    def run(self):
+        handler = WSGIHandler()
+        deadline = time.perf_counter() + _job["duration"]
+        try:
+            while time.perf_counter() < deadline:
+                op, key, method, path, token = self.next_request()
+                started = time.perf_counter()
+                status, body = wsgi_request(handler, method, path, token)
+                self.record(op, key, status, body, time.perf_counter() - started)
+        finally:
+            # a client thread's connection would otherwise stay checked out (or open) after it ends
+            connections.close_all()
+        return self.results
+
+    async def arun(self, application):
+        deadline = time.perf_counter() + _job["duration"]
+        while time.perf_counter() < deadline:
+            op, key, method, path, token = self.next_request()
+            started = time.perf_counter()
+            status, body = await asgi_request(application, method, path, token)
+            self.record(op, key, status, body, time.perf_counter() - started)
+        return self.results
+
+
+def run_worker(number):
+    return _Worker(number).run()
+
+
+async def run_async_workers(concurrency):
+    application = ASGIHandler()
+    results = await asyncio.gather(*(_Worker(number).arun(application) for number in range(concurrency)))
+    return [result for worker_results in results for result in worker_results]
+
+
+class LockWaitSampler(threading.Thread):
+    """Counts backends waiting on a lock, every `interval` seconds, on its own connection."""
+
+    def __init__(self, interval):
+        super().__init__(name="lock-wait-sampler", daemon=True)
+        self.interval = interval
+        self.samples = []
+        self.stopped = threading.Event()
+
+    def run(self):
+        try:
+            with connection.cursor() as cursor:
+                while not self.stopped.wait(self.interval):
+                    cursor.execute(LOCK_WAITS_SQL)
+                    self.samples.append(cursor.fetchone()[0])
+        finally:
+            connection.close()
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+        return sum(self.samples) * self.interval, max(self.samples, default=0)
+
+
+@contextmanager
+def _quiet_request_log():
+    # rejected registrations are expected here; don't log a warning for every one of them
+    logger = logging.getLogger("django.request")
+    level = logger.level
+    logger.setLevel(logging.ERROR)
+    try:
+        yield
+    finally:
+        logger.setLevel(level)
+
+
+class Command(BaseCommand):
+    help = "Load-test registration and cancellation through the API and check for oversell"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--mode",
+            choices=["threads", "processes", "asyncio"],
+            default="threads",
+            help="How concurrent clients are run (default: threads)",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=8,
+            help="Concurrent clients (default: 8)",
+        )
+        parser.add_argument(
+            "--duration",
+            type=float,
+            default=10,
+            help="Seconds to run (default: 10)",
+        )
+        parser.add_argument(
+            "--events",
+            type=int,
+            default=1,
+            help="Events registered against; fewer means more contention (default: 1)",
+        )
+        parser.add_argument(
+            "--capacity",
+            type=int,
+            default=100,
+            help="Seats per event (default: 100)",
+        )
+        parser.add_argument(
+            "--users",
+            type=int,
+            help="Attendees to create (default: 2x the seats of all events)",
+        )
+        parser.add_argument(
+            "--cancel-ratio",
+            type=float,
+            default=0.2,
+            help="Chance that a client cancels a registration it holds instead of registering (default: 0.2)",
+        )
+        parser.add_argument(
+            "--sample-interval",
+            type=float,
+            default=0.05,
+            help="Seconds between lock-wait samples (default: 0.05)",
+        )
+        parser.add_argument(
+            "--seed",
+            type=int,
+            default=0,
+            help="Random seed for the clients' choices (default: 0)",
+        )
+        parser.add_argument(
+            "--keep",
+            action="store_true",
+            help="Keep the benchmark events and users instead of deleting them",
+        )
+
+    def handle(self, *args, **options):
+        global _job
+
+        for name in ("concurrency", "events", "capacity"):
+            if options[name] < 1:
+                raise CommandError(f"--{name} must be at least 1")
+        if not 0 <= options["cancel_ratio"] <= 1:
+            raise CommandError("--cancel-ratio must be between 0 and 1")
+
+        run_id = uuid.uuid4().hex[:8]
+        users = options["users"] or 2 * options["events"] * options["capacity"]
+        users = max(users, options["concurrency"])
+
+        self.stdout.write(f"Setting up benchmark {run_id}...")
+        venue, events = self.create_events(run_id, options["events"], options["capacity"])
+        attendees = self.create_users(run_id, users)
+        self.stdout.write(f"  ✓ {len(events)} events x {options['capacity']} seats, {len(attendees)} attendees")
+
+        _job = {
+            "seed": options["seed"],
+            "concurrency": options["concurrency"],
+            "duration": options["duration"],
+            "cancel_ratio": options["cancel_ratio"],
+            "event_ids": [str(event.pk) for event in events],
+            "users": [
+                (user.pk, str(ClaimsRefreshToken.for_user(user).access_token)) for user in attendees
+            ],
+        }
+
+        try:
+            self.stdout.write(
+                f"Running {options['concurrency']} clients ({options['mode']}) for {options['duration']:g}s..."
+            )
+            sampler = LockWaitSampler(options["sample_interval"])
+            # the simulated requests are addressed to `testserver`
+            with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"]), _quiet_request_log():
+                sampler.start()
+                started = time.perf_counter()
+                results = self.run_clients(options["mode"], options["concurrency"])
+                elapsed = time.perf_counter() - started
+                lock_wait, peak_waiting = sampler.stop()
+
+            self.report(results, elapsed, lock_wait, peak_waiting)
+            oversold = self.check_oversell(events)
+        finally:
+            if not options["keep"]:
+                Event.objects.filter(pk__in=[event.pk for event in events]).delete()
+                venue.delete()
+                User.objects.filter(pk__in=[user.pk for user in attendees]).delete()
+
+        if oversold:
+            raise CommandError("Oversell detected")
+        self.stdout.write(self.style.SUCCESS("✓ No oversell"))
+
+    def create_events(self, run_id, count, capacity):
+        venue = Venue.objects.create(name=f"bench_{run_id}", city="Jakarta", capacity=capacity)
+        start_time = timezone.now() + timedelta(days=30)
+        events = [
+            Event.objects.create(
+                title=f"bench_{run_id} #{i + 1}",
+                slug=f"bench-{run_id}-{i + 1}",
+                start_time=start_time,
+                end_time=start_time + timedelta(hours=8),
+                capacity=capacity,
+                venue=venue,
+                status=Event.STATUS_PUBLISHED,
+            )
+            for i in range(count)
+        ]
+        return venue, events
+
+    def create_users(self, run_id, count):
+        # one password hash for all, like generate_mock_users
+        password = make_password(None)
+        return User.objects.bulk_create(
+            [
+                User(username=f"bench_{run_id}_{i}", password=password, role=User.ATTENDEE)
+                for i in range(count)
+            ],
+            batch_size=5000,
+        )
+
+    def run_clients(self, mode, concurrency):
+        """Run the clients; returns (outcome, latency) for every request."""
+        if mode == "asyncio":
+            return asyncio.run(run_async_workers(concurrency))
+
+        if mode == "processes":
+            # forked workers must not share the parent's sockets (or its connection pool)
+            close_db_connections()
+            with multiprocessing.get_context("fork").Pool(concurrency) as pool:
+                per_worker = pool.map(run_worker, range(concurrency), chunksize=1)
+        else:
+            with ThreadPoolExecutor(concurrency) as executor:
+                per_worker = list(executor.map(run_worker, range(concurrency)))
+        return [result for worker_results in per_worker for result in worker_results]
+
+    def report(self, results, elapsed, lock_wait, peak_waiting):
+        latencies = sorted(latency for _, latency in results)
+        self.stdout.write(f"  Requests:   {len(results)} in {elapsed:.1f}s ({len(results) / elapsed:.1f} req/s)")
+        if len(latencies) >= 2:
+            cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+            self.stdout.write(
+                f"  Latency:    p50 {cuts[49] * 1000:.1f} ms   p95 {cuts[94] * 1000:.1f} ms   "
+                f"p99 {cuts[98] * 1000:.1f} ms   max {latencies[-1] * 1000:.1f} ms"
+            )
+        self.stdout.write(f"  Lock waits: ~{lock_wait:.2f}s in total, at most {peak_waiting} backends waiting at once")
+        self.stdout.write("  Outcomes:")
+        for outcome, count in sorted(Counter(outcome for outcome, _ in results).items()):
+            self.stdout.write(f"    {count:>8}  {outcome}")
+
+    def check_oversell(self, events):
+        """Compare registered_count, confirmed rows and capacity per event; True if any is off."""
+        rows = (
+            Event.objects.filter(pk__in=[event.pk for event in events])
+            .with_live_counts()
+            .annotate(confirmed=Count("registrations", filter=Q(registrations__status=Registration.STATUS_CONFIRMED)))
+            .order_by("title")
+        )
+        failed = False
+        self.stdout.write("  Oversell check:")
+        for event in rows:
+            ok = event.live_registered_count == event.confirmed <= event.capacity
+            failed = failed or not ok
+            self.stdout.write(
+                f"    {'✓' if ok else '✗'} {event.title}: capacity {event.capacity}, "
+                f"registered_count {event.live_registered_count}, confirmed rows {event.confirmed}"
+            )
+        return failed
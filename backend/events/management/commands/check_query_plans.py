@@ -0,0 +1,374 @@
+"""
+Django management command to check the query plans of the API's canonical queries.
+
+Runs the list, detail and action requests every viewset serves (as an admin and
+as an attendee with registrations) against the configured database, captures
+the SELECTs they issue and EXPLAINs each one. Reported are:
+
+- sequential scans of tables with at least --min-rows rows,
+- sorts of at least --min-rows rows,
+- btree indexes made redundant by another index that starts with the same columns
+  (of two identical indexes, the one with the later name),
+- indexes never used since the statistics were last reset.
+
+Flagged queries are matched against CANDIDATE_INDEXES, the composite and partial
+indexes that fit the API's filters and keyset orderings. Candidates that are not
+in the database yet are proposed, with the Meta.indexes lines to add.
+--write-migration also writes an events migration creating them CONCURRENTLY.
+
+Run it against a copy of production data (or generate_mock_events output): on
+small tables Postgres prefers sequential scans and nothing gets flagged.
+
+Usage:
+    python manage.py check_query_plans
+    python manage.py check_query_plans --analyze --min-rows 1000
+    python manage.py check_query_plans --write-migration
+"""
+
+import json
+from collections import namedtuple
+
+from authentication.models import User
+from django.apps import apps
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, migrations, models
+from django.db.migrations.loader import MigrationLoader
+from django.db.migrations.writer import MigrationWriter
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from events.models import Event, Registration, Session
+
+Candidate = namedtuple("Candidate", ["model", "index", "serves", "reason"])
+
+# (label, path, who); {event} is the published event with the most registrations
+CANONICAL_REQUESTS = [
+    ("public event list", "/api/events", None),
+    ("organizer event list", "/api/events", "admin"),
+    ("upcoming events in a city", "/api/events?city=Jakarta&start_after={today}", None),
+    ("event search", "/api/events?q=tech", None),
+    ("recommendations", "/api/events/recommendations", None),
+    ("event detail", "/api/events/{event}", None),
+    ("event availability", "/api/events/{event}/availability", "admin"),
+    ("tracks", "/api/events/{event}/tracks", "admin"),
+    ("sessions", "/api/events/{event}/sessions", "admin"),
+    ("event registrations", "/api/events/{event}/registrations", "admin"),
+    ("registration requests", "/api/events/{event}/registration-requests", "admin"),
+    ("my registrations", "/api/my-registrations", "attendee"),
+    ("speakers", "/api/speakers", "admin"),
+    ("venues", "/api/venues", "admin"),
+    ("users", "/api/auth/users", "admin"),
+]
+
+# queries issued outside the API: oversell checks, counter recounts, mock data
+CANONICAL_QUERIES = [
+    ("confirmed seats of an event", lambda event: Registration.objects.filter(
+        event=event, status=Registration.STATUS_CONFIRMED
+    ).order_by().values("event").annotate(total=models.Count("id")).values("total")),
+]
+
+CANDIDATE_INDEXES = [
+    Candidate(
+        Event,
+        models.Index(fields=["start_time", "id"], condition=models.Q(status="published"),
+                     name="event_published_start_idx"),
+        ("public event list", "upcoming events in a city", "recommendations"),
+        "published + upcoming, in keyset order (start_time, id)",
+    ),
+    Candidate(
+        Registration,
+        models.Index(fields=["attendee", "created_at", "id"], name="registration_attendee_idx"),
+        ("my registrations",),
+        "an attendee's registrations in keyset order (created_at, id)",
+    ),
+    Candidate(
+        Registration,
+        models.Index(fields=["event", "created_at", "id"], name="registration_event_created_idx"),
+        ("event registrations",),
+        "an event's registrations in keyset order (created_at, id)",
+    ),
+    Candidate(
+        Registration,
+        models.Index(fields=["event"], condition=models.Q(status="confirmed"), name="registration_confirmed_idx"),
+        ("confirmed seats of an event",),
+        "confirmed-only registrations per event, counted from the index alone",
+    ),
+    Candidate(
+        Session,
+        models.Index(fields=["event", "start_time", "id"], name="session_event_start_idx"),
+        ("sessions",),
+        "an event's sessions in keyset order (start_time, id)",
+    ),
+]
+
+INDEXES_SQL = """
+    SELECT t.relname, i.relname, ix.indisunique, ix.indisprimary,
+           ix.indpred IS NOT NULL, ix.indexprs IS NOT NULL, am.amname,
+           EXISTS (
+               SELECT 1 FROM unnest(ix.indclass) AS c(opclass)
+               JOIN pg_opclass o ON o.oid = c.opclass WHERE NOT o.opcdefault
+           ),
+           ARRAY(
+               SELECT a.attname FROM unnest(ix.indkey) WITH ORDINALITY AS k(attnum, ord)
+               JOIN pg_attribute a ON a.attrelid = t.oid AND a.attnum = k.attnum
+               ORDER BY k.ord
+           ),
+           pg_relation_size(i.oid), s.idx_scan
+    FROM pg_index ix
+    JOIN pg_class t ON t.oid = ix.indrelid
+    JOIN pg_class i ON i.oid = ix.indexrelid
+    JOIN pg_am am ON am.oid = i.relam
+    JOIN pg_namespace n ON n.oid = t.relnamespace
+    LEFT JOIN pg_stat_user_indexes s ON s.indexrelid = ix.indexrelid
+    WHERE n.nspname = current_schema() AND t.relname = ANY(%s)
+    ORDER BY t.relname, i.relname
+"""
+
+IndexInfo = namedtuple(
+    "IndexInfo", [
+        "table", "name", "unique", "primary", "partial", "expressions", "method", "custom_opclass",
+        "columns", "size", "scans",
+    ],
+)
+
+
+def plan_nodes(node):
+    """Every node of an EXPLAIN (FORMAT JSON) plan tree."""
+    yield node
+    for child in node.get("Plans", ()):
+        yield from plan_nodes(child)
+
+
+def scanned_relation(node):
+    """The table a plan node reads, looking through sorts and other wrappers."""
+    for child in plan_nodes(node):
+        if "Relation Name" in child:
+            return child["Relation Name"]
+    return None
+
+
+class Command(BaseCommand):
+    help = "EXPLAIN the API's canonical queries and propose indexes"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--analyze",
+            action="store_true",
+            help="EXPLAIN (ANALYZE, BUFFERS): execute the queries and report actual rows and timings",
+        )
+        parser.add_argument(
+            "--min-rows",
+            type=int,
+            default=10000,
+            help="Flag sequential scans of tables, and sorts, with at least this many rows (default: 10000)",
+        )
+        parser.add_argument(
+            "--write-migration",
+            action="store_true",
+            help="Write an events migration creating the proposed indexes concurrently",
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("check_query_plans needs PostgreSQL")
+
+        self.options = options
+        self.row_estimates = self.load_row_estimates()
+        flagged = {}
+
+        self.stdout.write("Query plans:")
+        for label, sql in self.canonical_queries():
+            issues = self.check_plan(label, sql)
+            for table in issues:
+                flagged.setdefault(label, set()).add(table)
+
+        self.stdout.write("\nIndexes:")
+        indexes = self.load_indexes()
+        self.report_index_health(indexes)
+
+        proposals = self.propose(flagged, indexes)
+        if not proposals:
+            self.stdout.write(self.style.SUCCESS("✓ No index proposals"))
+            return
+
+        self.stdout.write("\nProposed indexes:")
+        for candidate in proposals:
+            self.stdout.write(
+                f"  - {candidate.model.__name__}.Meta.indexes: {self.index_source(candidate.index)}\n"
+                f"      for {', '.join(candidate.serves)}: {candidate.reason}"
+            )
+        if options["write_migration"]:
+            path = self.write_migration(proposals)
+            self.stdout.write(self.style.SUCCESS(f"✓ Wrote {path}"))
+            self.stdout.write("  Add the indexes above to the models' Meta.indexes in the same change.")
+
+    def canonical_queries(self):
+        """(label, sql) of every SELECT the canonical requests and queries issue."""
+        event = (
+            Event.objects.filter(status=Event.STATUS_PUBLISHED)
+            .annotate(registrations_total=models.Count("registrations"))
+            .order_by("-registrations_total")
+            .first()
+        )
+        if event is None:
+            raise CommandError("No published events; load data first (e.g. generate_mock_events)")
+        attendee = User.objects.filter(registrations__isnull=False).first()
+        users = {
+            None: None,
+            # never saved: admin requests don't filter on the user
+            "admin": User(username="check_query_plans", role=User.ADMIN),
+            "attendee": attendee,
+        }
+
+        no_caches = {alias: {"BACKEND": "django.core.cache.backends.dummy.DummyCache"} for alias in settings.CACHES}
+        # keep every read on the connection being captured and EXPLAINed, not on a replica
+        with override_settings(CACHES=no_caches, ALLOWED_HOSTS=["testserver"], SLOW_QUERY_MS=0, DATABASE_REPLICAS=[]):
+            for label, path, who in CANONICAL_REQUESTS:
+                if who == "attendee" and attendee is None:
+                    self.stdout.write(f"  - {label}: skipped, nobody has registered")
+                    continue
+                client = APIClient()
+                client.force_authenticate(users[who])
+                with CaptureQueriesContext(connection) as captured:
+                    response = client.get(path.format(event=event.pk, today=timezone.localdate()))
+                if response.status_code != 200:
+                    self.stdout.write(self.style.WARNING(f"  - {label}: HTTP {response.status_code}, skipped"))
+                    continue
+                seen = set()
+                for query in captured.captured_queries:
+                    sql = query["sql"]
+                    if sql.lstrip().upper().startswith("SELECT") and sql not in seen:
+                        seen.add(sql)
+                        yield label, sql
+
+        for label, build in CANONICAL_QUERIES:
+            sql, params = build(event).query.sql_with_params()
+            yield label, connection.ops.compose_sql(sql, params)
+
+    def check_plan(self, label, sql):
+        """Print the plan's problems; returns the tables they are on."""
+        explain = "EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON)" if self.options["analyze"] else "EXPLAIN (FORMAT JSON)"
+        with connection.cursor() as cursor:
+            cursor.execute(f"{explain} {sql}")
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        root = plan[0]["Plan"]
+
+        min_rows = self.options["min_rows"]
+        issues = []
+        for node in plan_nodes(root):
+            rows = node.get("Actual Rows", node["Plan Rows"])
+            if node["Node Type"] == "Seq Scan":
+                table = node["Relation Name"]
+                if self.row_estimates.get(table, 0) >= min_rows:
+                    issues.append((table, f"sequential scan of {table} (~{self.row_estimates[table]:,} rows)"))
+            elif node["Node Type"] in ("Sort", "Incremental Sort") and rows >= min_rows:
+                table = scanned_relation(node)
+                issues.append((table, f"sort of {rows:,} rows from {table} by {', '.join(node.get('Sort Key', []))}"))
+
+        cost = f"cost {root['Total Cost']:,.0f}"
+        if "Actual Total Time" in root:
+            cost += f", {root['Actual Total Time']:.1f} ms"
+        if not issues:
+            self.stdout.write(f"  ✓ {label} ({cost})")
+        for _, message in issues:
+            self.stdout.write(self.style.WARNING(f"  ! {label} ({cost}): {message}"))
+        return {table for table, _ in issues if table}
+
+    def tables(self):
+        return [
+            model._meta.db_table
+            for app_label in ("events", "authentication")
+            for model in apps.get_app_config(app_label).get_models()
+        ]
+
+    def load_row_estimates(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT relname, reltuples::bigint FROM pg_class WHERE relkind = 'r' AND relname = ANY(%s)",
+                [self.tables()],
+            )
+            return {table: max(rows, 0) for table, rows in cursor.fetchall()}
+
+    def load_indexes(self):
+        with connection.cursor() as cursor:
+            cursor.execute(INDEXES_SQL, [self.tables()])
+            return [IndexInfo(*row) for row in cursor.fetchall()]
+
+    def report_index_health(self, indexes):
+        healthy = True
+        for index in indexes:
+            if self.is_redundant(index, indexes):
+                healthy = False
+                covering = self.covering_index(index, indexes)
+                self.stdout.write(self.style.WARNING(
+                    f"  ! {index.name} ({', '.join(index.columns)}) is redundant with {covering.name} "
+                    f"({', '.join(covering.columns)}); dropping it frees {index.size // 1024:,} kB "
+                    f"and an index update per write"
+                ))
+            elif index.scans == 0 and not (index.unique or index.primary):
+                healthy = False
+                self.stdout.write(f"  - {index.name} on {index.table} has not been used since the stats reset")
+        if healthy:
+            self.stdout.write("  ✓ No redundant or unused indexes")
+
+    def is_plain_btree(self, index):
+        # partial, expression and e.g. varchar_pattern_ops (LIKE) indexes serve queries others can't
+        return index.method == "btree" and not (index.partial or index.expressions or index.custom_opclass)
+
+    def covering_index(self, index, indexes):
+        for other in indexes:
+            if (
+                other.name != index.name and other.table == index.table and self.is_plain_btree(other)
+                and other.columns[:len(index.columns)] == index.columns
+                # of two identical indexes only the later-named one is reported, as covered by the other
+                and (len(other.columns) > len(index.columns) or other.name < index.name)
+            ):
+                return other
+        return None
+
+    def is_redundant(self, index, indexes):
+        """A plain btree index whose columns lead another plain btree index on the same table."""
+        if not self.is_plain_btree(index) or index.unique or index.primary:
+            return False
+        return self.covering_index(index, indexes) is not None
+
+    def propose(self, flagged, indexes):
+        existing = {index.name for index in indexes}
+        proposals = []
+        for candidate in CANDIDATE_INDEXES:
+            table = candidate.model._meta.db_table
+            if candidate.index.name in existing:
+                continue
+            if any(table in flagged.get(label, ()) for label in candidate.serves):
+                proposals.append(candidate)
+        return proposals
+
+    def index_source(self, index):
+        return MigrationWriter.serialize(index)[0]
+
+    def write_migration(self, proposals):
+        loader = MigrationLoader(connection, ignore_no_migrations=True)
+        leaves = loader.graph.leaf_nodes("events")
+        if len(leaves) != 1:
+            raise CommandError(f"Expected one latest events migration, found {len(leaves)}")
+        number = int(leaves[0][1].split("_")[0]) + 1
+
+        migration = migrations.Migration(f"{number:04d}_query_plan_indexes", "events")
+        migration.dependencies = [leaves[0]]
+        migration.operations = [
+            AddIndexConcurrently(model_name=candidate.model._meta.model_name, index=candidate.index)
+            for candidate in proposals
+        ]
+        writer = MigrationWriter(migration)
+        # CREATE INDEX CONCURRENTLY doesn't block writes but can't run in a transaction
+        source = writer.as_string().replace(
+            "class Migration(migrations.Migration):\n",
+            "class Migration(migrations.Migration):\n    atomic = False\n",
+        )
+        with open(writer.path, "w") as f:
+            f.write(source)
+        return writer.path
@@ -0,0 +1,54 @@
+"""
+Django management command to fold striped registration counters back into
+Event.registered_count and re-split each event's remaining seats across its slots.
+
+Run it periodically (e.g. from cron every minute) during busy sales so slot
+allotments stay balanced and slot counts stay small.
+
+Usage:
+    python manage.py compact_registration_counters                 # Events with pending slot counts
+    python manage.py compact_registration_counters --all           # Every event
+    python manage.py compact_registration_counters --event <uuid>  # A single event
+"""
+
+from django.core.management.base import BaseCommand
+from events.models import Event, EventCounterSlot
+
+
+class Command(BaseCommand):
+    help = "Compact striped registration counters into Event.registered_count"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--event",
+            action="append",
+            dest="events",
+            help="Only compact this event (can be repeated)",
+        )
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Compact every event, including ones without pending slot counts",
+        )
+
+    def handle(self, *args, **options):
+        if options["events"]:
+            event_ids = options["events"]
+        elif options["all"]:
+            event_ids = Event.objects.values_list("id", flat=True)
+        else:
+            event_ids = (
+                EventCounterSlot.objects.exclude(count=0)
+                .values_list("event_id", flat=True)
+                .distinct()
+            )
+
+        compacted = 0
+        for event_id in event_ids:
+            registered = EventCounterSlot.compact(event_id)
+            compacted += 1
+            self.stdout.write(f"  - {event_id}: {registered} registered")
+
+        self.stdout.write(
+            self.style.SUCCESS(f"✓ Compacted counters for {compacted} events")
+        )
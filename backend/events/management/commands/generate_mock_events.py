@@ -5,18 +5,193 @@ Usage:
     python manage.py generate_mock_events          # Generate mock data
     python manage.py generate_mock_events --reset  # Reset and regenerate
     python manage.py generate_mock_events --clear  # Only clear existing mock data
+
+    # Capacity-testing dataset: 1000 events x 1000 registrations, 4 processes
+    python manage.py generate_mock_events --reset --events 1000 \\
+        --registrations-per-event 1000 --sessions-per-track 6 --seed 42 --workers 4
+
+Rows are built in Python and written with bulk_create (COPY for registrations),
+in transactions of about --chunk-size rows. With --seed the ids and contents are
+the same on every run; dates stay relative to the current day. Sessions and
+registrations are derived per event from the seed, so --workers doesn't change
+the output either.
 """
 
+import multiprocessing
 import random
-from datetime import datetime, timedelta
+import time
+import uuid
+from datetime import timedelta
 
 from authentication.models import User
-from django.core.management.base import BaseCommand
-from django.db import transaction
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.backends.postgresql.psycopg_any import DateTimeTZRange
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 from django.utils.text import slugify
+from events.management.utils import close_db_connections
 from events.models import Event, Registration, Session, Speaker, Track, Venue
 
+SESSION_TEMPLATES = [
+    {"title": "Opening Keynote", "duration_hours": 1.5},
+    {"title": "Workshop: Getting Started with {tech}", "duration_hours": 2},
+    {"title": "Panel Discussion: The Future of {topic}", "duration_hours": 1},
+    {"title": "Case Study: Building {product}", "duration_hours": 1},
+    {"title": "Deep Dive: {tech} Best Practices", "duration_hours": 1.5},
+    {"title": "Lightning Talks", "duration_hours": 1},
+    {"title": "Hands-on Lab: {tech}", "duration_hours": 2},
+    {"title": "Fireside Chat with {name}", "duration_hours": 0.75},
+    {"title": "Closing Keynote", "duration_hours": 1},
+]
+
+TECH_TOPICS = [
+    "React",
+    "Kubernetes",
+    "Machine Learning",
+    "TypeScript",
+    "GraphQL",
+    "Microservices",
+    "Flutter",
+    "Python",
+    "Cloud Architecture",
+    "Security",
+]
+GENERAL_TOPICS = [
+    "Tech",
+    "Development",
+    "Innovation",
+    "Digital Transformation",
+]
+
+DESCRIPTION = "An in-depth session covering key concepts and practical applications. Learn from industry experts and gain hands-on experience."
+
+# what fill_events() needs besides its batch; set in the parent before the workers fork
+_job = None
+
+
+def make_uuid(rng):
+    """A random (version 4) UUID drawn from `rng`, so seeded runs produce the same ids."""
+    return uuid.UUID(int=rng.getrandbits(128), version=4)
+
+
+def copy_rows(model, fields, rows):
+    """Stream `rows` (tuples in `fields` order) into the model's table with COPY."""
+    quote = connection.ops.quote_name
+    columns = ", ".join(quote(model._meta.get_field(name).column) for name in fields)
+    with connection.cursor() as cursor:
+        with cursor.copy(f"COPY {quote(model._meta.db_table)} ({columns}) FROM STDIN") as copy:
+            for row in rows:
+                copy.write_row(row)
+
+
+def build_sessions(event, rng, speakers):
+    """Unsaved sessions (with their speaker ids) for an event, back to back per track within 9:00-18:00."""
+    sessions = []
+    if not event["tracks"]:
+        return sessions
+
+    # Calculate event duration in days
+    event_duration = event["end_time"] - event["start_time"]
+    days = event_duration.days if event_duration.days > 0 else 1
+    per_track = _job["sessions_per_track"]
+
+    for track_id in event["tracks"]:
+        placed = 0
+        for day in range(days):
+            # Calculate day boundaries
+            day_start = event["start_time"] + timedelta(days=day)
+            day_start = day_start.replace(hour=9, minute=0, second=0, microsecond=0)
+
+            # Day ends at 6 PM or event end time, whichever is earlier
+            day_end = min(day_start.replace(hour=18), event["end_time"])
+
+            # Ensure we don't start before event start time
+            current_time = max(day_start, event["start_time"])
+            # without --sessions-per-track, up to 4 sessions per track per day
+            day_limit = 4 if per_track is None else per_track - placed
+
+            placed_today = 0
+            while placed_today < day_limit:
+                template = rng.choice(SESSION_TEMPLATES)
+                session_end = current_time + timedelta(hours=template["duration_hours"])
+                if session_end > day_end:
+                    # No more room today for this track
+                    break
+
+                # Select 1-2 random speakers
+                session_speakers = rng.sample(speakers, k=rng.randint(1, min(2, len(speakers))))
+
+                title = template["title"]
+                if "{tech}" in title:
+                    title = title.format(tech=rng.choice(TECH_TOPICS))
+                elif "{topic}" in title:
+                    title = title.format(topic=rng.choice(GENERAL_TOPICS))
+                elif "{product}" in title:
+                    title = title.format(product="Scalable Systems")
+                elif "{name}" in title:
+                    title = title.format(name=session_speakers[0][1].split()[0])
+
+                session = Session(
+                    id=make_uuid(rng),
+                    event_id=event["id"],
+                    track_id=track_id,
+                    title=title,
+                    description=DESCRIPTION,
+                    start_time=current_time,
+                    end_time=session_end,
+                    # bulk_create skips Session.save(), which normally fills this in
+                    time_range=DateTimeTZRange(current_time, session_end),
+                    room=f"Room {rng.choice(['A', 'B', 'C', 'D'])}",
+                )
+                sessions.append((session, [speaker_id for speaker_id, _ in session_speakers]))
+                placed_today += 1
+
+                # Move to next time slot with 15 min break
+                current_time = session_end + timedelta(minutes=15)
+
+            placed += placed_today
+            if per_track is not None and placed >= per_track:
+                break
+
+    return sessions
+
+
+REGISTRATION_FIELDS = ("id", "event", "attendee", "status", "created_at", "updated_at", "canceled_at", "metadata")
+
+
+def build_registrations(event, rng):
+    """Registration rows (REGISTRATION_FIELDS order) for `event["registrations"]` random attendees."""
+    now = _job["now"]
+    for attendee_id in rng.sample(_job["attendee_ids"], k=event["registrations"]):
+        yield (make_uuid(rng), event["id"], attendee_id, Registration.STATUS_CONFIRMED, now, now, None, "{}")
+
+
+def fill_events(batch):
+    """Insert the sessions and registrations of a batch of events in one transaction."""
+    sessions_count = registrations_count = 0
+    through = Session.speakers.through
+    with transaction.atomic():
+        for event in batch:
+            rng = random.Random(f"{_job['seed']}:{event['id']}")
+
+            sessions = build_sessions(event, rng, _job["speakers"])
+            Session.objects.bulk_create([session for session, _ in sessions], batch_size=_job["chunk_size"])
+            through.objects.bulk_create(
+                [
+                    through(session_id=session.id, speaker_id=speaker_id)
+                    for session, speaker_ids in sessions
+                    for speaker_id in speaker_ids
+                ],
+                batch_size=_job["chunk_size"],
+            )
+            sessions_count += len(sessions)
+
+            copy_rows(Registration, REGISTRATION_FIELDS, build_registrations(event, rng))
+            registrations_count += event["registrations"]
+    return sessions_count, registrations_count
+
 
 class Command(BaseCommand):
     help = "Generate mock technical event data for testing"
@@ -32,6 +207,38 @@ class Command(BaseCommand):
             action="store_true",
             help="Only clear existing mock data without generating new data",
         )
+        parser.add_argument(
+            "--events",
+            type=int,
+            help="Number of events to generate (default: one per built-in event, 10)",
+        )
+        parser.add_argument(
+            "--sessions-per-track",
+            type=int,
+            help="Sessions per track, as many as fit in the event's days (default: up to 4 per day)",
+        )
+        parser.add_argument(
+            "--registrations-per-event",
+            type=int,
+            help="Registrations per published event, capped by capacity and attendees (default: 30-70%% of capacity)",
+        )
+        parser.add_argument(
+            "--seed",
+            type=int,
+            help="Random seed; the same seed generates the same data",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=10000,
+            help="Rows per insert batch and transaction (default: 10000)",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Processes inserting sessions and registrations in parallel (default: 1)",
+        )
 
     def handle(self, *args, **options):
         if options["reset"] or options["clear"]:
@@ -42,62 +249,75 @@ class Command(BaseCommand):
                 )
                 return
 
+        for name in ("events", "sessions_per_track", "chunk_size", "workers"):
+            if options[name] is not None and options[name] < 1:
+                raise CommandError(f"--{name.replace('_', '-')} must be at least 1")
+        if (options["registrations_per_event"] or 0) < 0:
+            raise CommandError("--registrations-per-event can't be negative")
+
+        seed = options["seed"]
+        if seed is None:
+            seed = random.SystemRandom().getrandbits(32)
+        self.options = options
+        self.seed = seed
+        self.rng = random.Random(seed)
+        # seeded runs anchor dates at the start of the day so they come out the same
+        self.now = timezone.now()
+        if options["seed"] is not None:
+            self.now = self.now.replace(hour=0, minute=0, second=0, microsecond=0)
+
+        started = time.monotonic()
         self.generate_mock_data()
-        self.stdout.write(self.style.SUCCESS("✓ Mock data generated successfully"))
+        self.stdout.write(
+            self.style.SUCCESS(f"✓ Mock data generated successfully (seed {seed}, {time.monotonic() - started:.1f}s)")
+        )
 
-    @transaction.atomic
     def clear_mock_data(self):
         """Clear all existing mock data"""
         self.stdout.write("Clearing existing mock data...")
 
-        # Delete in order of dependencies
-        deleted_registrations = Registration.objects.all().delete()[0]
-        deleted_sessions = Session.objects.all().delete()[0]
-        deleted_tracks = Track.objects.all().delete()[0]
-        deleted_events = Event.objects.all().delete()[0]
-        deleted_speakers = Speaker.objects.all().delete()[0]
-        deleted_venues = Venue.objects.all().delete()[0]
-
-        self.stdout.write(f"  - Deleted {deleted_registrations} registrations")
-        self.stdout.write(f"  - Deleted {deleted_sessions} sessions")
-        self.stdout.write(f"  - Deleted {deleted_tracks} tracks")
-        self.stdout.write(f"  - Deleted {deleted_events} events")
-        self.stdout.write(f"  - Deleted {deleted_speakers} speakers")
-        self.stdout.write(f"  - Deleted {deleted_venues} venues")
-
-    @transaction.atomic
+        counts = {
+            "registrations": Registration.objects.count(),
+            "sessions": Session.objects.count(),
+            "tracks": Track.objects.count(),
+            "events": Event.objects.count(),
+            "speakers": Speaker.objects.count(),
+            "venues": Venue.objects.count(),
+        }
+        # one TRUNCATE instead of deleting (and sending signals for) every row;
+        # CASCADE takes the tables hanging off these (registrations, sessions, ...)
+        quote = connection.ops.quote_name
+        tables = ", ".join(quote(model._meta.db_table) for model in (Event, Speaker, Venue))
+        with connection.cursor() as cursor:
+            cursor.execute(f"TRUNCATE {tables} CASCADE")
+
+        for name, count in counts.items():
+            self.stdout.write(f"  - Deleted {count} {name}")
+
     def generate_mock_data(self):
         """Generate comprehensive mock data for technical events"""
         self.stdout.write("Generating mock data...")
 
-        # Create venues
-        venues = self.create_venues()
-        self.stdout.write(f"  ✓ Created {len(venues)} venues")
+        with transaction.atomic():
+            # Create venues
+            venues = self.create_venues()
+            self.stdout.write(f"  ✓ Created {len(venues)} venues")
 
-        # Create speakers
-        speakers = self.create_speakers()
-        self.stdout.write(f"  ✓ Created {len(speakers)} speakers")
+            # Create speakers
+            speakers = self.create_speakers()
+            self.stdout.write(f"  ✓ Created {len(speakers)} speakers")
 
-        # Create events
-        events = self.create_events(venues)
-        self.stdout.write(f"  ✓ Created {len(events)} events")
+            # Create events
+            events = self.create_events(venues)
+            self.stdout.write(f"  ✓ Created {len(events)} events")
 
-        # Create tracks for each event
-        tracks_count = 0
-        for event in events:
-            tracks = self.create_tracks(event)
-            tracks_count += len(tracks)
-        self.stdout.write(f"  ✓ Created {tracks_count} tracks")
+            # Create tracks for each event
+            tracks = self.create_tracks(events)
+            self.stdout.write(f"  ✓ Created {len(tracks)} tracks")
 
-        # Create sessions for each event
-        sessions_count = 0
-        for event in events:
-            sessions = self.create_sessions(event, speakers)
-            sessions_count += len(sessions)
+        # Create sessions and registrations for each event
+        sessions_count, registrations_count = self.create_schedules_and_registrations(events, tracks, speakers)
         self.stdout.write(f"  ✓ Created {sessions_count} sessions")
-
-        # Create registrations
-        registrations_count = self.create_registrations(events)
         self.stdout.write(f"  ✓ Created {registrations_count} registrations")
 
     def create_venues(self):
@@ -153,12 +373,8 @@ class Command(BaseCommand):
             },
         ]
 
-        venues = []
-        for data in venues_data:
-            venue = Venue.objects.create(**data)
-            venues.append(venue)
-
-        return venues
+        venues = [Venue(id=make_uuid(self.rng), **data) for data in venues_data]
+        return Venue.objects.bulk_create(venues)
 
     def create_speakers(self):
         """Create mock speakers for technical events"""
@@ -225,16 +441,12 @@ class Command(BaseCommand):
             },
         ]
 
-        speakers = []
-        for data in speakers_data:
-            speaker = Speaker.objects.create(**data)
-            speakers.append(speaker)
-
-        return speakers
+        speakers = [Speaker(id=make_uuid(self.rng), **data) for data in speakers_data]
+        return Speaker.objects.bulk_create(speakers)
 
     def create_events(self, venues):
-        """Create mock technical events"""
-        now = timezone.now()
+        """Create mock technical events; past the built-in ten they repeat, a week later per round"""
+        now = self.now
 
         events_data = [
             {
@@ -320,51 +532,58 @@ class Command(BaseCommand):
         ]
 
         # Get an organizer user (create one if doesn't exist)
-        organizer = User.objects.filter(role=User.ORGANIZER).first()
+        organizer = User.objects.filter(role=User.ORGANIZER).order_by("date_joined", "id").first()
         if not organizer:
             # Try to get any user
-            organizer = User.objects.first()
+            organizer = User.objects.order_by("date_joined", "id").first()
 
-        events = []
-        for i, data in enumerate(events_data):
-            days_from_now = data.pop("days_from_now")
-            duration_days = data.pop("duration_days")
+        count = self.options["events"] or len(events_data)
+        planned = []
+        for i in range(count):
+            data = events_data[i % len(events_data)]
+            round_number = i // len(events_data)
 
-            start_time = now + timedelta(days=days_from_now)
-            end_time = start_time + timedelta(days=duration_days)
+            start_time = now + timedelta(days=data["days_from_now"] + 7 * round_number)
+            end_time = start_time + timedelta(days=data["duration_days"])
 
             # Select venue based on capacity
             suitable_venues = [v for v in venues if v.capacity >= data["capacity"]]
-            venue = random.choice(suitable_venues if suitable_venues else venues)
+            venue = self.rng.choice(suitable_venues if suitable_venues else venues)
+
+            title = data["title"] if not round_number else f"{data['title']} #{round_number + 1}"
+            planned.append((title, start_time, end_time, venue, data))
 
-            title = data.pop("title")
-            slug = slugify(title)
+        # Make slugs unique against existing events (one query instead of one per event)
+        slugs = [slugify(title) for title, *_ in planned]
+        taken = set(Event.objects.filter(slug__in=slugs).values_list("slug", flat=True))
 
-            # Make slug unique
+        events = []
+        for slug, (title, start_time, end_time, venue, data) in zip(slugs, planned):
             base_slug = slug
             counter = 1
-            while Event.objects.filter(slug=slug).exists():
+            while slug in taken:
                 slug = f"{base_slug}-{counter}"
                 counter += 1
+            taken.add(slug)
 
-            event = Event.objects.create(
+            events.append(Event(
+                id=make_uuid(self.rng),
                 title=title,
                 slug=slug,
-                description=data.pop("description"),
+                description=data["description"],
                 start_time=start_time,
                 end_time=end_time,
-                capacity=data.pop("capacity"),
+                capacity=data["capacity"],
                 venue=venue,
-                status=data.pop("status"),
+                status=data["status"],
                 organizer=organizer,
-                **data,
-            )
-            events.append(event)
+            ))
 
-        return events
+        # bulk_create skips Event.save(): counter slots are set up on the first registration
+        return Event.objects.bulk_create(events, batch_size=self.options["chunk_size"])
 
-    def create_tracks(self, event):
-        """Create tracks for an event"""
+    def create_tracks(self, events):
+        """Create tracks for each event"""
         # Different track sets for different event types
         track_sets = [
             [
@@ -401,192 +620,95 @@ class Command(BaseCommand):
             ],
         ]
 
-        # Select track set based on event duration
-        if (event.end_time - event.start_time).days >= 3:
-            selected_tracks = track_sets[0] + track_sets[1][:2]
-        elif (event.end_time - event.start_time).days >= 2:
-            selected_tracks = random.choice(track_sets)
-        else:
-            selected_tracks = track_sets[2]
-
         tracks = []
-        for track_data in selected_tracks:
-            track = Track.objects.create(event=event, **track_data)
-            tracks.append(track)
-
-        return tracks
-
-    def create_sessions(self, event, speakers):
-        """Create sessions for an event"""
-        session_templates = [
-            {"title": "Opening Keynote", "duration_hours": 1.5},
-            {"title": "Workshop: Getting Started with {tech}", "duration_hours": 2},
-            {"title": "Panel Discussion: The Future of {topic}", "duration_hours": 1},
-            {"title": "Case Study: Building {product}", "duration_hours": 1},
-            {"title": "Deep Dive: {tech} Best Practices", "duration_hours": 1.5},
-            {"title": "Lightning Talks", "duration_hours": 1},
-            {"title": "Hands-on Lab: {tech}", "duration_hours": 2},
-            {"title": "Fireside Chat with {name}", "duration_hours": 0.75},
-            {"title": "Closing Keynote", "duration_hours": 1},
-        ]
-
-        tech_topics = [
-            "React",
-            "Kubernetes",
-            "Machine Learning",
-            "TypeScript",
-            "GraphQL",
-            "Microservices",
-            "Flutter",
-            "Python",
-            "Cloud Architecture",
-            "Security",
-        ]
-        general_topics = [
-            "Tech",
-            "Development",
-            "Innovation",
-            "Digital Transformation",
-        ]
-
-        tracks = list(event.tracks.all())
-        if not tracks:
-            return []
-
-        sessions = []
-        
-        # Calculate event duration in days
-        event_duration = event.end_time - event.start_time
-        days = event_duration.days if event_duration.days > 0 else 1
-
-        # Create sessions per day per track
-        for day in range(days):
-            # Calculate day boundaries
-            day_start = event.start_time + timedelta(days=day)
-            day_start = day_start.replace(hour=9, minute=0, second=0, microsecond=0)
-            
-            # Day ends at 6 PM or event end time, whichever is earlier
-            day_end_6pm = day_start.replace(hour=18, minute=0, second=0, microsecond=0)
-            day_end = min(day_end_6pm, event.end_time)
-            
-            # Skip if day_start is already past event end
-            if day_start >= event.end_time:
-                continue
-            
-            # Ensure we don't start before event start time
-            if day_start < event.start_time:
-                day_start = event.start_time
-
-            for track in tracks:
-                current_time = day_start
-                attempts = 0
-                max_attempts = 10  # Prevent infinite loops
-                successful_sessions = 0
-                max_sessions_per_day = 4  # Limit sessions per track per day
-
-                while current_time < day_end and successful_sessions < max_sessions_per_day and attempts < max_attempts:
-                    attempts += 1
-                    
-                    template = random.choice(session_templates)
-                    duration_hours = template["duration_hours"]
-
-                    # Format title
-                    title = template["title"]
-                    if "{tech}" in title:
-                        title = title.format(tech=random.choice(tech_topics))
-                    elif "{topic}" in title:
-                        title = title.format(topic=random.choice(general_topics))
-                    elif "{product}" in title:
-                        title = title.format(product="Scalable Systems")
-                    elif "{name}" in title:
-                        speaker = random.choice(speakers)
-                        title = title.format(name=speaker.name.split()[0])
-
-                    # Generate description
-                    description = "An in-depth session covering key concepts and practical applications. Learn from industry experts and gain hands-on experience."
-
-                    session_start = current_time
-                    session_end = session_start + timedelta(hours=duration_hours)
-
-                    # Validate session is within event boundaries
-                    if session_start < event.start_time or session_end > event.end_time:
-                        # Move forward and try again
-                        current_time = current_time + timedelta(minutes=30)
-                        continue
-                    
-                    # Check if session fits in the day
-                    if session_end > day_end:
-                        # No more room today for this track
-                        break
-
-                    # Select 1-2 random speakers
-                    num_speakers = random.randint(1, min(2, len(speakers)))
-                    session_speakers = random.sample(speakers, k=num_speakers)
-
-                    try:
-                        session = Session.objects.create(
-                            event=event,
-                            track=track,
-                            title=title,
-                            description=description,
-                            start_time=session_start,
-                            end_time=session_end,
-                            room=f"Room {random.choice(['A', 'B', 'C', 'D'])}",
-                        )
-                        session.speakers.set(session_speakers)
-                        sessions.append(session)
-                        successful_sessions += 1
-
-                        # Move to next time slot with 15 min break
-                        current_time = session_end + timedelta(minutes=15)
-                        attempts = 0  # Reset attempts after success
-                        
-                    except Exception:
-                        # If creation fails, move forward by 30 minutes and try again
-                        current_time = current_time + timedelta(minutes=30)
-
-        return sessions
-
-    def create_registrations(self, events):
-        """Create mock registrations for events"""
-        # Get attendee users
-        attendees = list(User.objects.filter(role=User.ATTENDEE))
-
-        if not attendees:
+        for event in events:
+            # Select track set based on event duration
+            if (event.end_time - event.start_time).days >= 3:
+                selected_tracks = track_sets[0] + track_sets[1][:2]
+            elif (event.end_time - event.start_time).days >= 2:
+                selected_tracks = self.rng.choice(track_sets)
+            else:
+                selected_tracks = track_sets[2]
+
+            for track_data in selected_tracks:
+                tracks.append(Track(id=make_uuid(self.rng), event=event, **track_data))
+
+        return Track.objects.bulk_create(tracks, batch_size=self.options["chunk_size"])
+
+    def create_schedules_and_registrations(self, events, tracks, speakers):
+        """
+        Create each event's sessions and registrations, in batches of about
+        --chunk-size registrations per transaction, across --workers processes.
+        """
+        global _job
+
+        attendee_ids = list(User.objects.filter(role=User.ATTENDEE).order_by("id").values_list("id", flat=True))
+        if not attendee_ids:
             self.stdout.write(
                 self.style.WARNING(
                     "  ! No attendee users found. Skipping registration creation."
                 )
             )
-            return 0
 
-        registrations_count = 0
+        per_event = self.options["registrations_per_event"]
+        tracks_by_event = {}
+        for track in tracks:
+            tracks_by_event.setdefault(track.event_id, []).append(track.id)
 
+        batches, batch, batch_rows = [], [], 0
         for event in events:
-            # Only create registrations for published and past events
-            if event.status != Event.STATUS_PUBLISHED:
-                continue
+            # Only create registrations for published events
+            registrations = 0
+            if event.status == Event.STATUS_PUBLISHED:
+                if per_event is None:
+                    # Register 30-70% of capacity
+                    per_event_count = int(event.capacity * self.rng.uniform(0.3, 0.7))
+                else:
+                    per_event_count = per_event
+                registrations = min(per_event_count, event.capacity, len(attendee_ids))
+
+            batch.append({
+                "id": event.id,
+                "start_time": event.start_time,
+                "end_time": event.end_time,
+                "tracks": tracks_by_event.get(event.id, []),
+                "registrations": registrations,
+            })
+            batch_rows += registrations + 1
+            if batch_rows >= self.options["chunk_size"]:
+                batches.append(batch)
+                batch, batch_rows = [], 0
+        if batch:
+            batches.append(batch)
+
+        _job = {
+            "seed": self.seed,
+            "now": self.now,
+            "chunk_size": self.options["chunk_size"],
+            "sessions_per_track": self.options["sessions_per_track"],
+            "speakers": [(speaker.id, speaker.name) for speaker in speakers],
+            "attendee_ids": attendee_ids,
+        }
+
+        workers = min(self.options["workers"], len(batches))
+        if workers > 1:
+            # forked workers must not share the parent's sockets (or its connection pool)
+            close_db_connections()
+            with multiprocessing.get_context("fork").Pool(workers) as pool:
+                results = list(pool.imap_unordered(fill_events, batches))
+        else:
+            results = [fill_events(batch) for batch in batches]
+
+        # registered_count is normally maintained by the counter slots; set it from the rows
+        confirmed = (
+            Registration.objects.filter(event=OuterRef("pk"), status=Registration.STATUS_CONFIRMED)
+            .order_by()
+            .values("event")
+            .annotate(total=Count("id"))
+            .values("total")
+        )
+        Event.objects.filter(pk__in=[event.id for event in events]).update(
+            registered_count=Coalesce(Subquery(confirmed[:1]), 0)
+        )
 
-            # Register 30-70% of capacity or available attendees
-            max_registrations = min(
-                int(event.capacity * random.uniform(0.3, 0.7)), len(attendees)
-            )
-            selected_attendees = random.sample(attendees, k=max_registrations)
-
-            for attendee in selected_attendees:
-                try:
-                    Registration.objects.create(
-                        event=event, attendee=attendee, status=Registration.STATUS_CONFIRMED
-                    )
-                    registrations_count += 1
-                except:
-                    # Skip if registration already exists
-                    pass
-
-            # Update registered count
-            event.registered_count = event.registrations.filter(
-                status=Registration.STATUS_CONFIRMED
-            ).count()
-            event.save(update_fields=["registered_count"])
-
-        return registrations_count
+        return tuple(map(sum, zip(*results))) if results else (0, 0)
@@ -0,0 +1,62 @@
+"""
+Django management command that imports an event's agenda from a JSON file.
+
+The file holds the body of POST /api/events/<id>/sessions/bulk: a list of
+sessions, or {"sessions": [...]}. Each session has title, start_time, end_time
+and optionally description, track (a name; missing tracks are created), room,
+speakers_ids and metadata. All conflicts are listed; nothing is imported while
+there are any, unless --partial is given.
+
+Usage:
+    python manage.py import_agenda <event uuid> agenda.json            # All or nothing
+    python manage.py import_agenda <event uuid> agenda.json --partial  # Skip conflicting sessions
+"""
+
+import json
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from events.agenda import import_agenda
+from events.models import Event
+from events.serializers import AgendaImportSerializer
+
+
+class Command(BaseCommand):
+    help = "Bulk import an event's sessions from a JSON file"
+
+    def add_arguments(self, parser):
+        parser.add_argument("event", help="Event id")
+        parser.add_argument("path", help="JSON file with the sessions")
+        parser.add_argument(
+            "--partial",
+            action="store_true",
+            help="Import the sessions without conflicts and skip the others",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            event = Event.objects.filter(pk=options["event"]).first()
+        except ValidationError:
+            event = None
+        if event is None:
+            raise CommandError(f"Event {options['event']} not found")
+        try:
+            with open(options["path"]) as f:
+                payload = json.load(f)
+        except (OSError, ValueError) as exc:
+            raise CommandError(f"Cannot read {options['path']}: {exc}")
+        if isinstance(payload, list):
+            payload = {"sessions": payload}
+
+        serializer = AgendaImportSerializer(data={**payload, "partial": options["partial"]})
+        if not serializer.is_valid():
+            raise CommandError(json.dumps(serializer.errors, indent=2))
+
+        sessions, conflicts = import_agenda(event, serializer.validated_data["sessions"], options["partial"])
+        for conflict in conflicts:
+            self.stdout.write(f"  - #{conflict['index']} {conflict['title']}: {conflict['error']}")
+        if conflicts and not sessions:
+            raise CommandError(f"{len(conflicts)} conflicts, nothing imported")
+        self.stdout.write(
+            self.style.SUCCESS(f"✓ Imported {len(sessions)} sessions ({len(conflicts)} skipped)")
+        )
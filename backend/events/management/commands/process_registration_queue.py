@@ -0,0 +1,81 @@
+"""
+Django management command that admits queued (flash-sale) registrations.
+
+Events with `queued_registration` enabled only record registration requests; this
+worker drains them in FIFO batches of REGISTRATION_QUEUE_BATCH_SIZE, one
+transaction per batch. Several workers can run side by side.
+
+Usage:
+    python manage.py process_registration_queue                   # Run until interrupted
+    python manage.py process_registration_queue --once            # Drain the current queue and exit
+    python manage.py process_registration_queue --batch-size 500  # Admit 500 requests per transaction
+"""
+
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, close_old_connections
+from events.models import RegistrationRequest
+
+
+class Command(BaseCommand):
+    help = "Admit queued registration requests in batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=settings.REGISTRATION_QUEUE_BATCH_SIZE,
+            help="Requests admitted per transaction (default: REGISTRATION_QUEUE_BATCH_SIZE)",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=0.5,
+            help="Seconds to sleep when the queue is empty (default: 0.5)",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Exit once no pending requests are left",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+
+        while True:
+            try:
+                processed = self.process_round(batch_size)
+            except DatabaseError as exc:
+                # e.g. the database restarted; drop the broken connection and carry on
+                self.stderr.write(self.style.ERROR(f"  - Queue round failed: {exc}"))
+                close_old_connections()
+                time.sleep(options["interval"])
+                continue
+            if processed:
+                self.stdout.write(f"  - Processed {processed} registration requests")
+                continue
+            if options["once"]:
+                break
+            time.sleep(options["interval"])
+
+        self.stdout.write(self.style.SUCCESS("✓ Registration queue drained"))
+
+    def process_round(self, batch_size):
+        """One batch per event with pending requests, so a busy event can't starve the others"""
+        event_ids = (
+            RegistrationRequest.objects.filter(status=RegistrationRequest.STATUS_PENDING)
+            .order_by()
+            .values_list("event_id", flat=True)
+            .distinct()
+        )
+        processed = 0
+        for event_id in list(event_ids):
+            try:
+                processed += RegistrationRequest.process_batch(event_id, batch_size)
+            except DatabaseError as exc:
+                # the batch rolled back and stays pending; keep serving the other events
+                self.stderr.write(self.style.ERROR(f"  - Batch for event {event_id} failed: {exc}"))
+                close_old_connections()
+        return processed
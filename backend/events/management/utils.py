@@ -0,0 +1,9 @@
+from django.db import connections
+
+
+def close_db_connections():
+    """Close every open connection (and pool) so processes forked next open their own."""
+    for conn in connections.all(initialized_only=True):
+        conn.close()
+        if hasattr(conn, "close_pool"):
+            conn.close_pool()
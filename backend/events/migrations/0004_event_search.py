@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:41
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0003_venue_city'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='search_vector',
+            field=models.GeneratedField(db_persist=True, expression=django.contrib.postgres.search.SearchVector('title', 'description', config='english'), output_field=django.contrib.postgres.search.SearchVectorField()),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['status', 'start_time'], name='events_even_status_189ced_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='events_even_search__5f308c_gin'),
+        ),
+        migrations.AddIndex(
+            model_name='venue',
+            index=models.Index(fields=['city'], name='events_venu_city_614bce_idx'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:46
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0004_event_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventCounterSlot',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('slot', models.PositiveSmallIntegerField()),
+                ('count', models.IntegerField(default=0)),
+                ('allotment', models.PositiveIntegerField(default=0)),
+                ('event', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='counter_slots', to='events.event')),
+            ],
+            options={
+                'unique_together': {('event', 'slot')},
+            },
+        ),
+    ]
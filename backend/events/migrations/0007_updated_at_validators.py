@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-17 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0006_registration_queue'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='eventcounterslot',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='registration',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
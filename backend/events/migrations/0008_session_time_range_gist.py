@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-17 10:05
+
+import django.contrib.postgres.fields.ranges
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    # sessions can be large; build and drop the indexes without blocking writes
+    atomic = False
+
+    dependencies = [
+        ('events', '0007_updated_at_validators'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='session',
+            index=django.contrib.postgres.indexes.GistIndex(fields=['time_range'], name='session_time_range_gist'),
+        ),
+        # the GiST index serves the range lookups; the btree one from db_index=True only costs writes
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AlterField(
+                    model_name='session',
+                    name='time_range',
+                    field=django.contrib.postgres.fields.ranges.DateTimeRangeField(blank=True, editable=False, null=True),
+                ),
+            ],
+            database_operations=[
+                migrations.RunSQL(
+                    'DROP INDEX CONCURRENTLY IF EXISTS "events_session_time_range_be8f8e2d";',
+                    reverse_sql='CREATE INDEX CONCURRENTLY IF NOT EXISTS "events_session_time_range_be8f8e2d" '
+                    'ON "events_session" USING btree ("time_range");',
+                ),
+            ],
+        ),
+    ]
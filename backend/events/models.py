@@ -1,13 +1,19 @@
+import json
+import random
 import uuid
 
 from django.conf import settings
 from django.contrib.postgres.constraints import ExclusionConstraint
 from django.contrib.postgres.fields import DateTimeRangeField
-from django.contrib.postgres.indexes import GistIndex
+from django.contrib.postgres.indexes import GinIndex, GistIndex
+from django.contrib.postgres.search import SearchVector, SearchVectorField
 from django.core.exceptions import ValidationError
-from django.db import models, transaction
+from django.db import IntegrityError, connection, models, transaction
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 
+from .realtime import AVAILABILITY_CHANNEL, notify_availability_changed
+
 User = settings.AUTH_USER_MODEL
 
 
@@ -50,10 +56,43 @@ class Venue(models.Model):
 
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["city"]),
+        ]
+
     def __str__(self):
         return self.name
 
 
+class EventQuerySet(models.QuerySet):
+    def with_live_counts(self):
+        """Annotate `pending_registrations` so `live_registered_count` needs no extra query."""
+        return self.annotate(pending_registrations=EventCounterSlot.pending_for(models.OuterRef("pk")))
+
+    def availability(self):
+        """{event id: {capacity, registered_count, remaining}} from one values query."""
+        qs = self if "pending_registrations" in self.query.annotations else self.with_live_counts()
+        rows = qs.order_by().values_list("id", "capacity", "registered_count", "pending_registrations")
+        availability = {}
+        for event_id, capacity, registered_count, pending in rows:
+            registered_count += pending
+            availability[str(event_id)] = {
+                "capacity": capacity,
+                "registered_count": registered_count,
+                "remaining": max(capacity - registered_count, 0),
+            }
+        return availability
+
+    def with_available_seats(self, available=True):
+        qs = self.alias(
+            live_count=models.F("registered_count") + EventCounterSlot.pending_for(models.OuterRef("pk"))
+        )
+        if available:
+            return qs.filter(live_count__lt=models.F("capacity"))
+        return qs.filter(live_count__gte=models.F("capacity"))
+
+
 class Event(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     STATUS_DRAFT = "draft"
@@ -76,18 +115,33 @@ class Event(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_DRAFT)
     metadata = models.JSONField(default=dict, blank=True)
     
+    # registrations up to the last counter compaction; see EventCounterSlot
     registered_count = models.PositiveIntegerField(default=0, editable=False)
 
+    # flash-sale mode: registrations are queued and admitted in batches by a worker
+    queued_registration = models.BooleanField(default=False)
+
+    # full-text document over title/description, maintained by Postgres itself
+    search_vector = models.GeneratedField(
+        expression=SearchVector("title", "description", config="english"),
+        output_field=SearchVectorField(),
+        db_persist=True,
+    )
+
     # organizer relationship - tie events to a user who manages them
     organizer = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name="organized_events")
 
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = EventQuerySet.as_manager()
+
     class Meta:
         indexes = [
             models.Index(fields=["start_time"]),
             models.Index(fields=["status"]),
+            models.Index(fields=["status", "start_time"]),
+            GinIndex(fields=["search_vector"]),
         ]
 
     def clean(self):
@@ -97,10 +151,208 @@ class Event(models.Model):
     # def get_total_registrations(self):
     #     return self.registrations.count(filter=models.Q(status=Registration.STATUS_CONFIRMED))
 
+    @property
+    def live_registered_count(self):
+        """registered_count plus the counter-slot deltas not yet compacted into it."""
+        pending = getattr(self, "pending_registrations", None)
+        if pending is None:
+            pending = self.counter_slots.aggregate(total=models.Sum("count"))["total"] or 0
+        return self.registered_count + pending
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # save() compares against it to tell whether the seats need re-splitting
+        instance._loaded_capacity = instance.__dict__.get("capacity")
+        return instance
+
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        self._loaded_capacity = self.__dict__.get("capacity")
+
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        update_fields = kwargs.get("update_fields")
+        if not adding and update_fields is None:
+            # registered_count is owned by counter compaction; never write back a stale copy
+            kwargs["update_fields"] = [
+                f.name for f in self._meta.concrete_fields
+                if not f.primary_key and not f.generated and f.name != "registered_count"
+            ]
+        super().save(*args, **kwargs)
+
+        # (re)split the remaining seats across counter slots when capacity or the base count changes;
+        # other edits leave the slots, their row locks and the availability NOTIFY alone
+        if update_fields is None:
+            resplit = adding or self.capacity != getattr(self, "_loaded_capacity", None)
+        else:
+            resplit = bool({"capacity", "registered_count"} & set(update_fields))
+        if resplit:
+            self.registered_count = EventCounterSlot.compact(self.pk)
+            # the slot counts are folded into registered_count now
+            self.pending_registrations = 0
+        self._loaded_capacity = self.capacity
+
     def __str__(self):
         return self.title
 
 
+class EventCounterSlot(models.Model):
+    """
+    One stripe of an event's registration counter.
+
+    Registrations and cancellations bump a random slot instead of the Event row, so
+    writers for a hot event only contend when they land on the same slot. Each slot
+    owns an `allotment` of the seats left at the last compaction and accepts a
+    registration only while `count < allotment`; the allotments partition the
+    remaining capacity, so the event can't be oversold without a global lock.
+    `compact()` folds the slot counts into `Event.registered_count` and re-splits
+    the remaining seats.
+    """
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name="counter_slots")
+    slot = models.PositiveSmallIntegerField()
+    # net registrations since the last compaction; goes negative after cancellations
+    count = models.IntegerField(default=0)
+    allotment = models.PositiveIntegerField(default=0)
+    # last change of this slot; seat counts are part of event responses' ETag and Last-Modified.
+    # The SQL below uses statement_timestamp(): now() repeats the transaction's start time
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ("event", "slot")
+
+    # takes one seat from a random slot with room left; Registration.REGISTER_SQL embeds it
+    ACQUIRE_SQL = """
+        UPDATE events_eventcounterslot SET count = count + 1, updated_at = statement_timestamp()
+        WHERE id = (
+            SELECT id FROM events_eventcounterslot
+            WHERE event_id = %s AND count < allotment
+            ORDER BY random() LIMIT 1
+            FOR UPDATE {lock_mode}
+        )
+        RETURNING slot
+    """
+
+    RELEASE_SQL = """
+        UPDATE events_eventcounterslot SET count = count - 1, updated_at = statement_timestamp()
+        WHERE id = (
+            SELECT id FROM events_eventcounterslot
+            WHERE event_id = %s
+            ORDER BY random() LIMIT 1
+            FOR UPDATE SKIP LOCKED
+        )
+        RETURNING slot
+    """
+
+    def __str__(self):
+        return f"EventCounterSlot({self.event_id}#{self.slot}: {self.count}/{self.allotment})"
+
+    @classmethod
+    def pending_for(cls, event_ref):
+        """Subquery expression summing the slot counts of `event_ref`."""
+        totals = (
+            cls.objects.filter(event=event_ref)
+            .order_by()
+            .values("event")
+            .annotate(total=models.Sum("count"))
+            .values("total")
+        )
+        return Coalesce(models.Subquery(totals[:1]), 0)
+
+    @classmethod
+    def changed_at_for(cls, event_ref):
+        """Subquery expression for the last time a slot of `event_ref` changed."""
+        latest = (
+            cls.objects.filter(event=event_ref)
+            .order_by()
+            .values("event")
+            .annotate(latest=models.Max("updated_at"))
+            .values("latest")
+        )
+        return models.Subquery(latest[:1])
+
+    @classmethod
+    def release(cls, event_id):
+        """Give one seat back to a random slot."""
+        with connection.cursor() as cursor:
+            cursor.execute(cls.RELEASE_SQL, [event_id])
+            if cursor.fetchone() is not None:
+                return
+
+        # every slot is busy: wait on one of them rather than spin
+        slot = random.randrange(settings.REGISTRATION_COUNTER_SLOTS)
+        updated = cls.objects.filter(event_id=event_id, slot=slot).update(
+            count=models.F("count") - 1, updated_at=timezone.now()
+        )
+        if not updated:
+            cls.compact(event_id)
+            cls.objects.filter(event_id=event_id, slot=0).update(
+                count=models.F("count") - 1, updated_at=timezone.now()
+            )
+
+    @classmethod
+    def acquire_many(cls, event_id, wanted):
+        """
+        Take up to `wanted` seats in one go, for batch admission. Locks all of the
+        event's slots until the surrounding transaction ends. Returns the number of
+        seats granted.
+        """
+        slots = list(cls.objects.select_for_update().filter(event_id=event_id).order_by("slot"))
+        if not slots:
+            cls.compact(event_id)
+            slots = list(cls.objects.select_for_update().filter(event_id=event_id).order_by("slot"))
+
+        granted, touched = 0, []
+        now = timezone.now()
+        for slot in slots:
+            take = min(slot.allotment - slot.count, wanted - granted)
+            if take > 0:
+                slot.count += take
+                slot.updated_at = now
+                granted += take
+                touched.append(slot)
+        cls.objects.bulk_update(touched, ["count", "updated_at"])
+        return granted
+
+    @classmethod
+    def compact(cls, event_id):
+        """
+        Fold slot counts into Event.registered_count and re-split the remaining seats
+        across REGISTRATION_COUNTER_SLOTS slots. Briefly locks the event and all of its
+        slots. Returns the compacted registered_count.
+        """
+        num_slots = settings.REGISTRATION_COUNTER_SLOTS
+
+        with transaction.atomic():
+            event = Event.objects.select_for_update().only("capacity", "registered_count").get(pk=event_id)
+            slots = {s.slot: s for s in cls.objects.select_for_update().filter(event_id=event_id)}
+
+            registered = max(event.registered_count + sum(s.count for s in slots.values()), 0)
+            remaining = max(event.capacity - registered, 0)
+            Event.objects.filter(pk=event_id).update(registered_count=registered)
+
+            to_update, to_create = [], []
+            now = timezone.now()
+            for index in range(num_slots):
+                allotment = remaining // num_slots + (1 if index < remaining % num_slots else 0)
+                if index in slots:
+                    slots[index].count = 0
+                    slots[index].allotment = allotment
+                    slots[index].updated_at = now
+                    to_update.append(slots[index])
+                else:
+                    to_create.append(cls(event_id=event_id, slot=index, allotment=allotment))
+
+            cls.objects.bulk_update(to_update, ["count", "allotment", "updated_at"])
+            cls.objects.bulk_create(to_create)
+            cls.objects.filter(event_id=event_id, slot__gte=num_slots).delete()
+            notify_availability_changed(event_id)
+
+        return registered
+
+
 class Track(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name="tracks")
@@ -146,7 +398,7 @@ class Session(models.Model):
     end_time = models.DateTimeField()
 
     # Range field used for exclusion constraint; not editable directly
-    time_range = DateTimeRangeField(null=True, blank=True, editable=False, db_index=True)
+    time_range = DateTimeRangeField(null=True, blank=True, editable=False)
 
     speakers = models.ManyToManyField(Speaker, related_name="sessions", blank=True)
     room = models.CharField(max_length=64, blank=True)
@@ -158,6 +410,8 @@ class Session(models.Model):
         ordering = ["start_time"]
         indexes = [
             models.Index(fields=["track", "start_time"]),
+            # `time_range &&` lookups across tracks, e.g. a speaker's other sessions
+            GistIndex(fields=["time_range"], name="session_time_range_gist"),
         ]
         constraints = [
             # Prevent overlapping sessions in the same track
@@ -210,6 +464,7 @@ class Registration(models.Model):
 
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_CONFIRMED)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     canceled_at = models.DateTimeField(null=True, blank=True)
     metadata = models.JSONField(default=dict, blank=True)
 
@@ -220,46 +475,278 @@ class Registration(models.Model):
             models.Index(fields=["status"]),
         ]
 
+    # One round trip for the whole registration: take a seat from a counter slot,
+    # then insert the registration or re-activate a cancelled one. The INSERT reads
+    # from `seat`, so nothing is written when the event has no seat left; the final
+    # SELECT reports whether a seat was taken and what (if anything) was upserted.
+    REGISTER_SQL = """
+        WITH seat AS ({acquire}),
+        upsert AS (
+            INSERT INTO events_registration (id, event_id, attendee_id, status, created_at, updated_at, canceled_at, metadata)
+            SELECT %s, %s, %s, %s, %s, %s, NULL, %s::jsonb FROM seat
+            ON CONFLICT (event_id, attendee_id) DO UPDATE
+                SET status = EXCLUDED.status,
+                    updated_at = EXCLUDED.updated_at,
+                    canceled_at = NULL,
+                    metadata = events_registration.metadata || EXCLUDED.metadata
+                WHERE events_registration.status = %s
+            RETURNING id, event_id, attendee_id, status, created_at, updated_at, canceled_at, metadata, (xmax = 0) AS created
+        )
+        SELECT (SELECT count(*) FROM seat), upsert.*, {notify}
+        FROM (SELECT 1) AS one LEFT JOIN upsert ON true
+    """
+    # tries of REGISTER_SQL before giving up on an event that still has seats
+    REGISTER_ATTEMPTS = 8
+    REGISTER_NOTIFY_SQL = (
+        f"CASE WHEN upsert.id IS NOT NULL THEN pg_notify('{AVAILABILITY_CHANNEL}', upsert.event_id::text) END"
+    )
+
     def cancel(self):
         if self.status != self.STATUS_CANCELLED:
             with transaction.atomic():
+                canceled_at = timezone.now()
+                # conditional update so two concurrent cancels release only one seat
+                updated = Registration.objects.filter(pk=self.pk).exclude(
+                    status=self.STATUS_CANCELLED
+                ).update(status=self.STATUS_CANCELLED, canceled_at=canceled_at, updated_at=canceled_at)
+                if updated:
+                    EventCounterSlot.release(self.event_id)
+                    notify_availability_changed(self.event_id)
                 self.status = self.STATUS_CANCELLED
-                self.canceled_at = timezone.now()
-                self.save(update_fields=["status", "canceled_at"])
-                self.event.registered_count = models.F("registered_count") - 1
-                self.event.save(update_fields=["registered_count"])
+                self.canceled_at = self.updated_at = canceled_at
 
     def __str__(self):
         return f"Registration({self.attendee}, {self.event}, {self.status})"
 
+    @classmethod
+    def register(cls, event_id, attendee, metadata=None):
+        """
+        Register `attendee` for an event, or re-activate their cancelled registration,
+        with a single statement (see REGISTER_SQL). No Event row lock is taken; the
+        only lock held is on one counter slot for the duration of that statement.
+        Returns (registration, created). Raises ValidationError with code
+        "already_registered", "capacity_reached" or "registration_busy" (retryable:
+        seats are left, but every attempt lost its slot to other requests), and
+        Event.DoesNotExist for an unknown event.
+        """
+        try:
+            event_id = uuid.UUID(str(event_id))
+        except ValueError:
+            raise Event.DoesNotExist("Event matching query does not exist.")
+        attendee_id = getattr(attendee, "pk", attendee)
+        now = timezone.now()
+        params = [
+            event_id,
+            uuid.uuid4(), event_id, attendee_id, cls.STATUS_CONFIRMED, now, now,
+            json.dumps(metadata or {}),
+            cls.STATUS_CANCELLED,
+        ]
+
+        for attempt in range(cls.REGISTER_ATTEMPTS):
+            # first try slots nobody holds; when every slot with room is busy, wait on one
+            lock_mode = "SKIP LOCKED" if attempt % 2 == 0 else ""
+            sql = cls.REGISTER_SQL.format(
+                acquire=EventCounterSlot.ACQUIRE_SQL.format(lock_mode=lock_mode),
+                notify=cls.REGISTER_NOTIFY_SQL if settings.EVENT_AVAILABILITY_NOTIFY else "NULL",
+            )
+            with transaction.atomic():
+                with connection.cursor() as cursor:
+                    cursor.execute(sql, params)
+                    seats_taken, *row, _ = cursor.fetchone()
+                if row[0] is not None:
+                    return cls._from_register_row(row[:-1]), row[-1]
+                if seats_taken:
+                    # the upsert hit an active registration; leaving the block gives the seat back
+                    raise ValidationError("Already registered and active", code="already_registered")
+
+            # no seat taken: full, every slot with room busy (or the slot waited on
+            # filled up meanwhile), or the event has no slots yet
+            if cls.objects.filter(event_id=event_id, attendee_id=attendee_id).exclude(
+                status=cls.STATUS_CANCELLED
+            ).exists():
+                raise ValidationError("Already registered and active", code="already_registered")
+            slots = EventCounterSlot.objects.filter(event_id=event_id)
+            if not slots.exists():
+                EventCounterSlot.compact(event_id)
+            elif not slots.filter(count__lt=models.F("allotment")).exists():
+                raise ValidationError("Event capacity reached", code="capacity_reached")
+        # seats are left, but other registrations kept taking the slots first
+        raise ValidationError("Registration is busy, try again shortly", code="registration_busy")
+
+    @classmethod
+    def _from_register_row(cls, row):
+        field_names = ["id", "event_id", "attendee_id", "status", "created_at", "updated_at", "canceled_at", "metadata"]
+        values = list(row)
+        # jsonb comes back undecoded; Django normally converts it in the query compiler
+        if isinstance(values[-1], str):
+            values[-1] = json.loads(values[-1])
+        return cls.from_db(connection.alias, field_names, values)
+
     @classmethod
     def create_atomic(cls, event_id, attendee):
         """
-        Convenience helper for an atomic registration flow:
-        - SELECT ... FOR UPDATE the event row
-        - check capacity
-        - insert registration (unique constraint prevents duplicates)
-        - increment registered_count
+        Convenience wrapper around register() for callers that only want the instance.
         Returns Registration instance on success, raises ValidationError on failure.
         """
-        from django.db import IntegrityError
+        registration, _ = cls.register(event_id, attendee)
+        return registration
 
-        with transaction.atomic():
-            # event_id is now a UUID
-            ev = Event.objects.select_for_update().get(id=event_id)
-            if ev.registered_count >= ev.capacity:
-                raise ValidationError("Event capacity reached")
 
-            # create registration; unique_together ensures duplicate prevention at DB level
+class RegistrationRequest(models.Model):
+    """
+    A registration waiting in an event's admission queue (Event.queued_registration).
+
+    During a flash sale the API only appends a row here and answers 202; the
+    process_registration_queue worker admits pending requests in FIFO batches, many
+    attendees per transaction, so database concurrency stays bounded no matter how
+    many clients hit the endpoint at once. Clients poll the request for the result.
+    """
+
+    STATUS_PENDING = "pending"
+    STATUS_CONFIRMED = "confirmed"
+    STATUS_REJECTED = "rejected"
+    STATUS_CHOICES = [
+        (STATUS_PENDING, "Pending"),
+        (STATUS_CONFIRMED, "Confirmed"),
+        (STATUS_REJECTED, "Rejected"),
+    ]
+
+    REASON_CAPACITY = "Event capacity reached"
+    REASON_ALREADY_REGISTERED = "Already registered and active"
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name="registration_requests")
+    attendee = models.ForeignKey(User, on_delete=models.CASCADE, related_name="registration_requests")
+    registration = models.ForeignKey(
+        "Registration", on_delete=models.SET_NULL, null=True, blank=True, related_name="requests"
+    )
+
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    reason = models.CharField(max_length=128, blank=True)
+    metadata = models.JSONField(default=dict, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["event", "status", "created_at"]),
+        ]
+        constraints = [
+            # one pending request per attendee and event; repeated clicks reuse it
+            models.UniqueConstraint(
+                fields=["event", "attendee"],
+                condition=models.Q(status="pending"),
+                name="unique_pending_registration_request",
+            ),
+        ]
+
+    def __str__(self):
+        return f"RegistrationRequest({self.attendee_id}, {self.event_id}, {self.status})"
+
+    @classmethod
+    def enqueue(cls, event_id, attendee, metadata=None):
+        """
+        Append a request to the event's queue, or return the attendee's pending one.
+        Returns (request, created). Raises ValidationError with code "queue_full" once
+        REGISTRATION_QUEUE_LIMIT requests are already waiting for the event.
+        """
+        pending = cls.objects.filter(event_id=event_id, status=cls.STATUS_PENDING)
+        existing = pending.filter(attendee=attendee).first()
+        if existing:
+            return existing, False
+        if pending.count() >= settings.REGISTRATION_QUEUE_LIMIT:
+            raise ValidationError("Registration queue is full, try again shortly", code="queue_full")
+
+        for _ in range(3):
             try:
-                reg = cls.objects.create(event=ev, attendee=attendee, status=cls.STATUS_CONFIRMED)
+                with transaction.atomic():
+                    return cls.objects.create(event_id=event_id, attendee=attendee, metadata=metadata or {}), True
             except IntegrityError:
-                raise ValidationError("Attendee already registered for this event")
-
-            # increment denormalized counter (kept safe by select_for_update)
-            ev.registered_count = models.F("registered_count") + 1
-            ev.save(update_fields=["registered_count"])
-            
-            # refresh the event object to resolve F() expression if caller needs the real value
-            ev.refresh_from_db(fields=["registered_count"])
-            return reg
\ No newline at end of file
+                # lost a race against the same attendee's other request; reuse it, or
+                # queue this one after all if a worker has processed it meanwhile
+                existing = pending.filter(attendee=attendee).first()
+                if existing:
+                    return existing, False
+        raise ValidationError("Registration queue is busy, try again shortly", code="queue_full")
+
+    @classmethod
+    def process_batch(cls, event_id, batch_size):
+        """
+        Admit up to `batch_size` pending requests of one event in a single transaction:
+        seats are taken with one EventCounterSlot.acquire_many() call, registrations are
+        bulk inserted or re-activated, and the rest are rejected. Safe to run from
+        several workers at once (rows are claimed with SKIP LOCKED). Returns the number
+        of requests processed.
+        """
+        now = timezone.now()
+        with transaction.atomic():
+            requests = list(
+                cls.objects.select_for_update(skip_locked=True)
+                .filter(event_id=event_id, status=cls.STATUS_PENDING)
+                .order_by("created_at", "id")[:batch_size]
+            )
+            if not requests:
+                return 0
+
+            existing = {
+                reg.attendee_id: reg
+                for reg in Registration.objects.select_for_update().filter(
+                    event_id=event_id, attendee_id__in=[req.attendee_id for req in requests]
+                )
+            }
+            wanted = []
+            for req in requests:
+                reg = existing.get(req.attendee_id)
+                if reg and reg.status != Registration.STATUS_CANCELLED:
+                    req.status, req.reason, req.registration = cls.STATUS_REJECTED, cls.REASON_ALREADY_REGISTERED, reg
+                else:
+                    wanted.append(req)
+
+            granted = EventCounterSlot.acquire_many(event_id, len(wanted)) if wanted else 0
+
+            to_create, to_reactivate = [], []
+            for req in wanted[:granted]:
+                reg = existing.get(req.attendee_id)
+                if reg:
+                    reg.status = Registration.STATUS_CONFIRMED
+                    reg.canceled_at = None
+                    reg.metadata = {**reg.metadata, **req.metadata}
+                    reg.updated_at = now
+                    to_reactivate.append(reg)
+                else:
+                    reg = Registration(
+                        event_id=event_id, attendee_id=req.attendee_id,
+                        status=Registration.STATUS_CONFIRMED, metadata=req.metadata,
+                    )
+                    to_create.append(reg)
+                req.status, req.registration = cls.STATUS_CONFIRMED, reg
+            for req in wanted[granted:]:
+                req.status, req.reason = cls.STATUS_REJECTED, cls.REASON_CAPACITY
+
+            # a direct registration of the same attendee may have been inserted since the
+            # read above; skip those rows instead of failing the whole batch
+            Registration.objects.bulk_create(to_create, ignore_conflicts=True)
+            if to_create:
+                inserted = set(
+                    Registration.objects.filter(pk__in=[reg.pk for reg in to_create]).values_list("pk", flat=True)
+                )
+                lost = {reg.attendee_id for reg in to_create if reg.pk not in inserted}
+                if lost:
+                    current = {
+                        reg.attendee_id: reg
+                        for reg in Registration.objects.filter(event_id=event_id, attendee_id__in=lost)
+                    }
+                    for req in wanted[:granted]:
+                        if req.attendee_id in lost:
+                            req.status, req.reason = cls.STATUS_REJECTED, cls.REASON_ALREADY_REGISTERED
+                            req.registration = current.get(req.attendee_id)
+                            granted -= 1
+                            EventCounterSlot.release(event_id)
+            Registration.objects.bulk_update(to_reactivate, ["status", "updated_at", "canceled_at", "metadata"])
+            for req in requests:
+                req.processed_at = now
+            cls.objects.bulk_update(requests, ["status", "reason", "registration", "processed_at"])
+            if granted:
+                notify_availability_changed(event_id)
+
+        return len(requests)
@@ -0,0 +1,138 @@
+"""
+Live availability push.
+
+Registration writes NOTIFY the `event_availability` channel with the event id.
+Each ASGI process keeps one dedicated LISTEN connection (in a background thread)
+and fans changes out to every Server-Sent Events subscriber of that event, so a
+thousand people watching a sale cost one database listener and one availability
+query per burst of changes, not a thousand polling requests.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from collections import defaultdict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connection, connections
+
+logger = logging.getLogger(__name__)
+
+AVAILABILITY_CHANNEL = "event_availability"
+
+
+def notify_availability_changed(*event_ids):
+    """Queue a NOTIFY per event; Postgres delivers it when the transaction commits."""
+    if not settings.EVENT_AVAILABILITY_NOTIFY:
+        return
+    with connection.cursor() as cursor:
+        for event_id in set(event_ids):
+            cursor.execute("SELECT pg_notify(%s, %s)", [AVAILABILITY_CHANNEL, str(event_id)])
+
+
+class AvailabilityHub:
+    """
+    Per-process fan-out of availability changes to SSE subscribers.
+
+    The LISTEN thread collects notified event ids for a short coalescing window,
+    then hands them to the event loop, which loads the new availability of the
+    subscribed ones in a single query and pushes it to every subscriber queue.
+    """
+
+    coalesce_window = 0.2
+    queue_size = 100
+
+    def __init__(self):
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+        self._loop = None
+        self._thread = None
+
+    def subscribe(self, event_ids):
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        queue.event_ids = frozenset(event_ids)
+        with self._lock:
+            for event_id in queue.event_ids:
+                self._subscribers[event_id].add(queue)
+            self._ensure_listening()
+        return queue
+
+    def unsubscribe(self, queue):
+        with self._lock:
+            for event_id in queue.event_ids:
+                watchers = self._subscribers.get(event_id)
+                if watchers is not None:
+                    watchers.discard(queue)
+                    if not watchers:
+                        del self._subscribers[event_id]
+
+    def _ensure_listening(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._loop = asyncio.get_running_loop()
+        self._thread = threading.Thread(target=self._listen, name="availability-listener", daemon=True)
+        self._thread.start()
+
+    def _listen(self):
+        backoff = 1
+        while True:
+            try:
+                self._listen_once()
+                backoff = 1
+            except Exception:
+                logger.exception("Availability listener lost its connection; reconnecting")
+                time.sleep(backoff)
+                backoff = min(backoff * 2, 30)
+
+    def _listen_once(self):
+        # opened outside Django's connection pool: it stays in LISTEN for the life of the process
+        wrapper = connections["default"]
+        conn = wrapper.Database.connect(**wrapper.get_connection_params(), autocommit=True)
+        try:
+            conn.execute(f"LISTEN {AVAILABILITY_CHANNEL}")
+            while True:
+                changed = {notify.payload for notify in conn.notifies(timeout=30, stop_after=1)}
+                if not changed:
+                    continue
+                # give a burst of registrations a moment to land, then publish once
+                time.sleep(self.coalesce_window)
+                changed.update(notify.payload for notify in conn.notifies(timeout=0))
+                self._loop.call_soon_threadsafe(self._schedule_publish, changed)
+        finally:
+            conn.close()
+
+    def _schedule_publish(self, changed):
+        asyncio.ensure_future(self._publish(changed))
+
+    async def _publish(self, changed):
+        with self._lock:
+            watched = [event_id for event_id in changed if event_id in self._subscribers]
+        if not watched:
+            return
+
+        availability = await sync_to_async(load_availability)(watched)
+        with self._lock:
+            deliveries = [
+                (queue, event_id, data)
+                for event_id, data in availability.items()
+                for queue in self._subscribers.get(event_id, ())
+            ]
+        for queue, event_id, data in deliveries:
+            try:
+                queue.put_nowait({"id": event_id, **data})
+            except asyncio.QueueFull:
+                # slow consumer: drop the stale update, a newer one will follow
+                pass
+
+
+def load_availability(event_ids, queryset=None):
+    from .models import Event
+
+    if queryset is None:
+        queryset = Event.objects.filter(status=Event.STATUS_PUBLISHED)
+    return queryset.filter(pk__in=event_ids).availability()
+
+
+availability_hub = AvailabilityHub()
@@ -0,0 +1,272 @@
+"""
+Read-only fast path for the hot list endpoints.
+
+Row serializers build the same JSON as the ModelSerializers in serializers.py
+straight from `.values()` rows, without instantiating models or running DRF's
+per-field `to_representation`. Each class compiles its column list and one
+extractor per output field once; serializing a row is then a single dict
+comprehension. events/tests.py checks the output byte for byte against the
+ModelSerializers. Views switch to them with settings.API_FAST_SERIALIZATION.
+"""
+
+from collections import defaultdict
+from operator import itemgetter
+from types import SimpleNamespace
+
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Session, Speaker
+
+
+def format_datetime(value):
+    """DRF's DateTimeField representation: current timezone, ISO 8601, `Z` for UTC."""
+    value = value.astimezone(timezone.get_current_timezone()).isoformat()
+    if value.endswith('+00:00'):
+        value = value[:-6] + 'Z'
+    return value
+
+
+class Column:
+    """A model column, optionally converted; None stays None like in DRF."""
+
+    def __init__(self, name, column=None, convert=None):
+        self.name = name
+        self.column = column or name
+        self.convert = convert
+
+    def columns(self, prefix):
+        return [prefix + self.column]
+
+    def extractor(self, prefix):
+        get = itemgetter(prefix + self.column)
+        convert = self.convert
+        if convert is None:
+            return get
+
+        def extract(row):
+            value = get(row)
+            return None if value is None else convert(value)
+        return extract
+
+
+class Computed:
+    """
+    A value computed from several columns, e.g. a live count or a display name.
+    With `root=True` the columns are read from the top-level row even inside a Nested.
+    """
+
+    def __init__(self, name, columns, func, root=False):
+        self.name = name
+        self.source_columns = columns
+        self.func = func
+        self.root = root
+
+    def columns(self, prefix):
+        if self.root:
+            return list(self.source_columns)
+        return [prefix + column for column in self.source_columns]
+
+    def extractor(self, prefix):
+        get = itemgetter(*self.columns(prefix))
+        func = self.func
+        if len(self.source_columns) == 1:
+            return lambda row: func(get(row))
+        return lambda row: func(*get(row))
+
+
+class Nested:
+    """A related record embedded as an object, read from the same row through `prefix`."""
+
+    def __init__(self, name, row_serializer_class, prefix):
+        self.name = name
+        self.row_serializer_class = row_serializer_class
+        self.prefix = prefix
+
+    def columns(self, prefix):
+        return self.row_serializer_class(prefix + self.prefix).columns
+
+    def extractor(self, prefix):
+        nested = self.row_serializer_class(prefix + self.prefix)
+        pk = itemgetter(nested.columns[0])
+        to_representation = nested.to_representation
+        return lambda row: None if pk(row) is None else to_representation(row)
+
+
+class Attached:
+    """A value added to each row by `RowSerializer.serialize` (e.g. from a second query)."""
+
+    def __init__(self, name):
+        self.name = name
+
+    def columns(self, prefix):
+        return []
+
+    def extractor(self, prefix):
+        return itemgetter(self.name)
+
+
+class RowSerializer:
+    """
+    Declare `fields` in the output order of the matching ModelSerializer. The
+    first field must be the primary key. `only` restricts the output (and the
+    columns read) to the named fields.
+    """
+    fields = ()
+
+    def __init__(self, prefix='', only=None):
+        fields = [field for field in self.fields if only is None or field.name in only]
+        self.columns = list(dict.fromkeys(column for field in fields for column in field.columns(prefix)))
+        self._extractors = [(field.name, field.extractor(prefix)) for field in fields]
+
+    @classmethod
+    def field_names(cls):
+        return [field.name for field in cls.fields]
+
+    def prepare(self, queryset, extra=()):
+        """
+        Turn a model queryset into the `.values()` rows this serializer reads; `extra`
+        columns (e.g. the pagination ordering) are fetched but not output.
+        """
+        return queryset.prefetch_related(None).values(*dict.fromkeys([*self.columns, *extra]))
+
+    def narrow(self, queryset, extra=()):
+        """
+        Restrict a model queryset to the columns and joins these fields read, for the
+        ModelSerializer path: `.only()` those columns and `select_related` only the
+        relations they go through.
+        """
+        columns = [
+            column for column in dict.fromkeys([*self.columns, *extra])
+            if column not in queryset.query.annotations
+        ]
+        relations = {column.rsplit('__', 1)[0] for column in columns if '__' in column}
+        queryset = queryset.select_related(None)
+        if relations:
+            queryset = queryset.select_related(*relations)
+        return queryset.only(*columns)
+
+    def to_representation(self, row):
+        return {name: extract(row) for name, extract in self._extractors}
+
+    def serialize(self, rows):
+        return [self.to_representation(row) for row in rows]
+
+
+class VenueRows(RowSerializer):
+    fields = (
+        Column('id', convert=str),
+        Column('name'),
+        Column('address'),
+        Column('city'),
+        Column('capacity'),
+        Column('metadata'),
+        Column('created_at', convert=format_datetime),
+    )
+
+
+class SpeakerRows(RowSerializer):
+    fields = (
+        Column('id', convert=str),
+        Column('name'),
+        Column('bio'),
+        Column('avatar_url'),
+        Column('contact_email'),
+        Column('metadata'),
+        Column('created_at', convert=format_datetime),
+    )
+
+
+class EventRows(RowSerializer):
+    """EventSerializer; reads the `pending_registrations` annotation (EventQuerySet.with_live_counts)."""
+    fields = (
+        Column('id', convert=str),
+        Nested('venue_details', VenueRows, 'venue__'),
+        Computed('registered_count', ('registered_count', 'pending_registrations'), int.__add__),
+        Column('title'),
+        Column('slug'),
+        Column('description'),
+        Column('start_time', convert=format_datetime),
+        Column('end_time', convert=format_datetime),
+        Column('capacity'),
+        Column('status'),
+        Column('metadata'),
+        Column('queued_registration'),
+        Column('created_at', convert=format_datetime),
+        Column('updated_at', convert=format_datetime),
+        Column('venue'),
+        Column('organizer'),
+    )
+
+
+class RegistrationEventRows(RowSerializer):
+    """RegistrationSerializer.event_details (raw ids and datetimes), nested under `event__`."""
+    fields = (
+        Column('id'),
+        Column('title'),
+        Column('description'),
+        Column('start_time'),
+        Column('end_time'),
+        Nested('venue_details', VenueRows, 'venue__'),
+        Column('capacity'),
+        # the pending count is an annotation on the registration row
+        Computed(
+            'registered_count', ('event__registered_count', 'event_pending_registrations'), int.__add__, root=True
+        ),
+    )
+
+
+def _full_name(first_name, last_name, username):
+    # mirrors User.get_full_name()
+    return f"{first_name} {last_name}".strip() or username
+
+
+class RegistrationRows(RowSerializer):
+    """RegistrationSerializer; reads the `event_pending_registrations` annotation."""
+    fields = (
+        Column('id', convert=str),
+        Column('event'),
+        Nested('event_details', RegistrationEventRows, 'event__'),
+        Column('attendee'),
+        Computed('attendee_name', ('attendee__first_name', 'attendee__last_name', 'attendee__username'), _full_name),
+        Column('status'),
+        Column('canceled_at', convert=format_datetime),
+        Column('created_at', convert=format_datetime),
+        Column('metadata'),
+    )
+
+
+class SessionRows(RowSerializer):
+    """SessionSerializer; speakers are fetched for the whole page with one extra query."""
+    time_range_field = Session._meta.get_field('time_range')
+
+    fields = (
+        Column('id', convert=str),
+        Attached('speakers'),
+        Column('title'),
+        Column('description'),
+        Column('start_time', convert=format_datetime),
+        Column('end_time', convert=format_datetime),
+        Column('time_range', convert=lambda value: SessionRows.time_range_field.value_to_string(
+            SimpleNamespace(time_range=value)
+        )),
+        Column('room'),
+        Column('metadata'),
+        Column('created_at', convert=format_datetime),
+        Column('event'),
+        Column('track'),
+    )
+
+    def serialize(self, rows):
+        rows = list(rows)
+        speakers = defaultdict(list)
+        if rows:
+            speaker_rows = SpeakerRows()
+            # same join and filter as prefetch_related('speakers')
+            for row in Speaker.objects.filter(sessions__in=[row['id'] for row in rows]).values(
+                *speaker_rows.columns, session_id=F('sessions')
+            ):
+                speakers[row['session_id']].append(speaker_rows.to_representation(row))
+        for row in rows:
+            row['speakers'] = speakers.get(row['id'], [])
+        return super().serialize(rows)
@@ -1,19 +1,34 @@
 from django.contrib.auth import get_user_model
-from django.db import IntegrityError, transaction
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import IntegrityError
+from django.utils import timezone
 from rest_framework import serializers
+from rest_framework.exceptions import Throttled
 
-from .models import Event, Registration, Session, Speaker, Track, Venue
+from .models import (Event, Registration, RegistrationRequest, Session,
+                     Speaker, Track, Venue)
 
 User = get_user_model()
 
 
+class OmitFieldsMixin:
+    """Drop the fields listed in context['omit_fields'] (used by the normalized list shape)."""
+
+    def get_fields(self):
+        fields = super().get_fields()
+        for name in self.context.get('omit_fields', ()):
+            fields.pop(name, None)
+        return fields
+
+
 class VenueSerializer(serializers.ModelSerializer):
     class Meta:
         model = Venue
         fields = '__all__'
 
-class EventSerializer(serializers.ModelSerializer):
+class EventSerializer(OmitFieldsMixin, serializers.ModelSerializer):
     venue_details = serializers.SerializerMethodField(read_only=True)
+    registered_count = serializers.IntegerField(source='live_registered_count', read_only=True)
     venue_id = serializers.PrimaryKeyRelatedField(
         queryset=Venue.objects.all(),
         source='venue',
@@ -24,7 +39,7 @@ class EventSerializer(serializers.ModelSerializer):
     class Meta:
         model = Event
         read_only_fields = ('registered_count', 'created_at', 'updated_at')
-        fields = '__all__'
+        exclude = ('search_vector',)
     
     def get_venue_details(self, obj):
         if obj.venue:
@@ -62,7 +77,7 @@ class SpeakerSerializer(serializers.ModelSerializer):
         model = Speaker
         fields = '__all__'
 
-class SessionSerializer(serializers.ModelSerializer):
+class SessionSerializer(OmitFieldsMixin, serializers.ModelSerializer):
     speakers = serializers.SerializerMethodField(read_only=True)
     speakers_ids = serializers.PrimaryKeyRelatedField(
         many=True,
@@ -92,14 +107,56 @@ class SessionSerializer(serializers.ModelSerializer):
         if event and start and end:
             if start < event.start_time or end > event.end_time:
                 raise serializers.ValidationError("Session times must be inside parent event times")
+        self.validate_speakers_free(data, start, end)
         return data
 
+    def validate_speakers_free(self, data, start, end):
+        """Reject speakers booked into another session, in any track or event, at the same time."""
+        if 'speakers' in data:
+            speakers = data['speakers']
+        elif self.instance is not None and ('start_time' in data or 'end_time' in data):
+            speakers = list(self.instance.speakers.all())
+        else:
+            return
+        if not (speakers and start and end and start < end):
+            return
+        busy = Session.speakers.through.objects.filter(
+            speaker__in=speakers, session__time_range__overlap=(start, end),
+        ).exclude(session_id=getattr(self.instance, 'pk', None)).values_list('speaker__name', 'session__title')[:10]
+        if busy:
+            raise serializers.ValidationError({
+                "speakers_ids": [f"{name} has another session at that time: {title}" for name, title in busy],
+            })
+
+class AgendaSessionSerializer(serializers.Serializer):
+    """One session of a bulk agenda import; the track is given by name and created if missing."""
+    title = serializers.CharField(max_length=128)
+    description = serializers.CharField(allow_blank=True, required=False, default='')
+    start_time = serializers.DateTimeField()
+    end_time = serializers.DateTimeField()
+    track = serializers.CharField(max_length=128, allow_null=True, required=False, default=None)
+    room = serializers.CharField(max_length=64, allow_blank=True, required=False, default='')
+    # checked in one query by the import, not one per id like PrimaryKeyRelatedField
+    speakers_ids = serializers.ListField(child=serializers.UUIDField(), required=False, default=list)
+    metadata = serializers.JSONField(required=False, default=dict)
+
+    def validate(self, data):
+        if data['start_time'] >= data['end_time']:
+            raise serializers.ValidationError("start_time must be before end_time")
+        return data
+
+class AgendaImportSerializer(serializers.Serializer):
+    MAX_SESSIONS = 2000
+
+    sessions = AgendaSessionSerializer(many=True, allow_empty=False, max_length=MAX_SESSIONS)
+    partial = serializers.BooleanField(required=False, default=False)
+
 class VenueSerializer(serializers.ModelSerializer):
     class Meta:
         model = Venue
         fields = '__all__'
 
-class RegistrationSerializer(serializers.ModelSerializer):
+class RegistrationSerializer(OmitFieldsMixin, serializers.ModelSerializer):
     attendee_name = serializers.CharField(source="attendee.get_full_name", read_only=True)
     event_details = serializers.SerializerMethodField(read_only=True)
     
@@ -121,10 +178,17 @@ class RegistrationSerializer(serializers.ModelSerializer):
                 'end_time': obj.event.end_time,
                 'venue_details': VenueSerializer(obj.event.venue).data if obj.event.venue else None,
                 'capacity': obj.event.capacity,
-                'registered_count': obj.event.registered_count,
+                'registered_count': self.get_event_registered_count(obj),
             }
         return None
 
+    def get_event_registered_count(self, obj):
+        # registration querysets annotate the event's pending slot counts to avoid a query per row
+        pending = getattr(obj, 'event_pending_registrations', None)
+        if pending is None:
+            return obj.event.live_registered_count
+        return obj.event.registered_count + pending
+
     def create(self, validated_data):
         request = self.context['request']
         
@@ -136,54 +200,86 @@ class RegistrationSerializer(serializers.ModelSerializer):
 
         event_pk = self.context['view'].kwargs.get('event_pk')
         try:
-            event = Event.objects.get(pk=event_pk)
+            registration, _ = Registration.register(
+                event_pk,
+                validated_data['attendee'],
+                metadata=validated_data.get('metadata'),
+            )
         except Event.DoesNotExist:
             raise serializers.ValidationError({"event": "Event not found"})
-        
-        # concurrency-safe registration
-        from django.db import transaction
-        from django.db.models import F
-
-        with transaction.atomic():
-            # lock the event row
-            ev = Event.objects.select_for_update().get(pk=event.pk)
-            if ev.registered_count >= ev.capacity:
-                raise serializers.ValidationError({"non_field_errors": ["Event capacity reached"]})
-            try:
-                # Check for existing registration
-                existing_reg = Registration.objects.filter(
-                    event=ev,
-                    attendee=validated_data['attendee']
-                ).first()
-
-                if existing_reg:
-                    if existing_reg.status == 'cancelled':
-                        # Reactivate cancelled registration
-                        existing_reg.status = validated_data.get('status', 'confirmed')
-                        existing_reg.canceled_at = None
-                        existing_reg.metadata = {
-                            **existing_reg.metadata,  # Keep existing metadata
-                            **validated_data.get('metadata', {})  # Update with new metadata
-                        }
-                        existing_reg.save()
-                        # Increment count since this is effectively a new registration
-                        ev.registered_count = F('registered_count') + 1
-                        ev.save(update_fields=['registered_count'])
-                        ev.refresh_from_db(fields=['registered_count'])
-                        return existing_reg
-                    else:
-                        raise serializers.ValidationError({"non_field_errors": ["Already registered and active"]})
-
-                # Create new registration if no existing one found
-                validated_data['event'] = ev
-                reg = Registration.objects.create(**validated_data)
-                
-                # increment count for new registration
-                ev.registered_count = F('registered_count') + 1
-                ev.save(update_fields=['registered_count'])
-                # refresh ev to avoid F expression
-                ev.refresh_from_db(fields=['registered_count'])
-                return reg
-
-            except IntegrityError:
-                raise serializers.ValidationError({"non_field_errors": ["Registration failed due to database constraints"]})
\ No newline at end of file
+        except DjangoValidationError as exc:
+            if exc.code == "registration_busy":
+                # seats are left; a retry will get one
+                raise Throttled(wait=1, detail=exc.messages[0])
+            raise serializers.ValidationError({"non_field_errors": exc.messages})
+        except IntegrityError:
+            raise serializers.ValidationError({"non_field_errors": ["Registration failed due to database constraints"]})
+        return registration
+
+class IncludedEventSerializer(serializers.ModelSerializer):
+    """An event side-loaded once per response in the normalized shape; its venue is referenced by id."""
+    registered_count = serializers.IntegerField(source='live_registered_count', read_only=True)
+
+    class Meta:
+        model = Event
+        fields = ('id', 'title', 'description', 'start_time', 'end_time', 'venue', 'capacity', 'registered_count')
+
+class RegistrationRequestSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = RegistrationRequest
+        fields = ('id', 'event', 'attendee', 'status', 'reason', 'registration', 'metadata', 'created_at', 'processed_at')
+        read_only_fields = ('id', 'event', 'attendee', 'status', 'reason', 'registration', 'created_at', 'processed_at')
+
+    def create(self, validated_data):
+        validated_data["attendee"] = self.context['request'].user
+
+        try:
+            registration_request, _ = RegistrationRequest.enqueue(
+                validated_data['event'].pk,
+                validated_data['attendee'],
+                metadata=validated_data.get('metadata'),
+            )
+        except DjangoValidationError as exc:
+            raise Throttled(detail=exc.messages[0])
+        return registration_request
+
+class EventScheduleSerializer(serializers.Serializer):
+    """
+    An event's full agenda (GET /events/{id}/schedule): the event, its tracks,
+    its sessions grouped by day and then track, and every speaker once, with
+    sessions referencing speakers by id. Three queries whatever the agenda's size:
+    tracks, sessions, and the sessions' speakers in one prefetch.
+    """
+
+    def to_representation(self, event):
+        tracks = list(event.tracks.order_by('name', 'id'))
+        sessions = list(event.sessions.order_by('start_time', 'id').prefetch_related('speakers'))
+
+        speakers = {}
+        session_context = {**self.context, 'omit_fields': ('event', 'speakers')}
+        track_order = {track.pk: position for position, track in enumerate(tracks)}
+        days = {}
+        for session, data in zip(sessions, SessionSerializer(sessions, many=True, context=session_context).data):
+            session_speakers = list(session.speakers.all())
+            for speaker in session_speakers:
+                speakers.setdefault(speaker.pk, speaker)
+            data['speakers'] = [str(speaker.pk) for speaker in session_speakers]
+            day = timezone.localtime(session.start_time).date().isoformat()
+            days.setdefault(day, {}).setdefault(session.track_id, []).append(data)
+
+        return {
+            'event': EventSerializer(event, context=self.context).data,
+            'tracks': TrackSerializer(tracks, many=True).data,
+            'days': [
+                {
+                    'date': day,
+                    # tracks in track order, sessions without a track last
+                    'tracks': [
+                        {'track': str(track_id) if track_id else None, 'sessions': by_track[track_id]}
+                        for track_id in sorted(by_track, key=lambda t: track_order.get(t, len(tracks)))
+                    ],
+                }
+                for day, by_track in sorted(days.items())
+            ],
+            'speakers': SpeakerSerializer(sorted(speakers.values(), key=lambda s: (s.name, str(s.pk))), many=True).data,
+        }
@@ -1,3 +1,1058 @@
-from django.test import TestCase
+import asyncio
+import json
+import os
+import tempfile
+import uuid
+from base64 import b64encode
+from datetime import timedelta
+from io import StringIO
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.db import OperationalError, connections, transaction
+from django.db.models import Count, OuterRef, Q
+from django.http import HttpResponse
+from django.test import AsyncRequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from authentication.models import User
+from authentication.tokens import ClaimsRefreshToken
+from core import routers
+from core.middleware import concurrency_limit_middleware
+from core.renderers import ORJSONRenderer
+from core.testing import QueryBudgetMixin
+
+from .management.commands import check_query_plans
+from .models import (Event, EventCounterSlot, Registration,
+                     RegistrationRequest, Session, Speaker, Track, Venue)
+from .realtime import AVAILABILITY_CHANNEL, AvailabilityHub
+from .rows import EventRows, RegistrationRows, SessionRows
+from .serializers import EventSerializer, RegistrationSerializer, SessionSerializer
+from .views import EventViewSet, availability_stream
+
+
+# set up by the test runner as a mirror of the test database; see ReplicaRoutingTests
+connections.settings["replica"] = {
+    **connections["default"].settings_dict, "OPTIONS": {},
+    "TEST": {**connections["default"].settings_dict["TEST"], "MIRROR": "default"},
+}
+
+
+def make_event(**overrides):
+    """A published two-hour event starting tomorrow in a venue of its own."""
+    start = overrides.pop('start_time', timezone.now() + timedelta(days=1))
+    fields = {
+        'title': "Event", 'slug': "event", 'start_time': start, 'end_time': start + timedelta(hours=2),
+        'capacity': 10, 'status': Event.STATUS_PUBLISHED, **overrides,
+    }
+    if 'venue' not in fields:
+        fields['venue'] = Venue.objects.create(name="Hall", city="Jakarta")
+    return Event.objects.create(**fields)
+
+
+def api_client(user=None):
+    client = APIClient()
+    if user is not None:
+        client.force_authenticate(user)
+    return client
+
+
+class FastSerializationParityTests(TestCase):
+    """The .values() row serializers and the orjson renderer must match the DRF path byte for byte."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create(username="admin", role=User.ADMIN)
+        cls.attendees = [
+            User.objects.create(username="ana", first_name="Ana", last_name="Lima"),
+            User.objects.create(username="budi"),
+            User.objects.create(username="chen", first_name="Chen"),
+        ]
+        venues = [
+            Venue.objects.create(name="Hall Ünïcode", address="Jl. Sudirman 1", city="Jakarta",
+                                 capacity=500, metadata={"floors": 2}),
+            Venue.objects.create(name="Annex", city="Bandung", metadata={}),
+        ]
+        start = timezone.now().replace(microsecond=0) + timedelta(days=3)
+        cls.events = [
+            Event.objects.create(
+                title=f"Event {i}", slug=f"event-{i}", description="Line separated \"quoted\" text",
+                start_time=start + timedelta(days=i), end_time=start + timedelta(days=i, hours=8),
+                capacity=10 + i, venue=venues[i % 2], status=Event.STATUS_PUBLISHED,
+                metadata={"tags": ["a", "ü"], "nested": {"n": None, "f": 1.5}},
+                organizer=cls.admin if i % 2 else None,
+            )
+            for i in range(4)
+        ]
+        cls.event = cls.events[0]
+
+        for attendee in cls.attendees:
+            Registration.register(cls.event.pk, attendee, metadata={"seat": attendee.username})
+        Registration.objects.get(attendee=cls.attendees[1]).cancel()
+        Registration.register(cls.events[1].pk, cls.attendees[0])
+
+        track = Track.objects.create(event=cls.event, name="Main")
+        speakers = [Speaker.objects.create(name=f"Speaker {i}", metadata={"i": i}) for i in range(2)]
+        for i in range(3):
+            session = Session.objects.create(
+                event=cls.event, track=track if i < 2 else None, title=f"Talk {i}",
+                start_time=cls.event.start_time + timedelta(hours=i),
+                end_time=cls.event.start_time + timedelta(hours=i, minutes=45),
+                room="A1" if i else "",
+            )
+            session.speakers.set(speakers[:i])
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def get(self, url, fast):
+        # the schedule response cache would hand the second request the first one's body
+        caches[settings.RESPONSE_CACHE_ALIAS].clear()
+        with override_settings(API_FAST_SERIALIZATION=fast):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response
+
+    def assertSameResponse(self, url):
+        slow, fast = self.get(url, fast=False), self.get(url, fast=True)
+        self.assertEqual(fast.content, slow.content)
+        return fast
+
+    def test_event_list(self):
+        self.assertSameResponse("/api/events")
+        self.assertSameResponse("/api/events?has_capacity=true&city=Jakarta")
+
+    def test_event_list_pages(self):
+        first = self.assertSameResponse("/api/events?page_size=2")
+        second = self.assertSameResponse(first.data["next"])
+        self.assertSameResponse(second.data["previous"])
+
+    def test_event_list_in_other_timezone(self):
+        with timezone.override("Asia/Jakarta"):
+            self.assertSameResponse("/api/events")
+
+    def test_session_list(self):
+        response = self.assertSameResponse(f"/api/events/{self.event.pk}/sessions")
+        self.assertEqual([len(s["speakers"]) for s in response.data["results"]], [0, 1, 2])
+
+    def test_registration_lists(self):
+        self.assertSameResponse(f"/api/events/{self.event.pk}/registrations")
+        self.client.force_authenticate(self.attendees[0])
+        self.assertSameResponse("/api/my-registrations")
+
+    def test_sparse_fieldsets(self):
+        response = self.assertSameResponse("/api/events?fields=id,title,venue_details&page_size=2")
+        self.assertEqual(list(response.data["results"][0]), ["id", "venue_details", "title"])
+        self.assertSameResponse(f"/api/events/{self.event.pk}/registrations?exclude=event_details,metadata")
+        self.assertSameResponse(f"/api/events/{self.event.pk}/sessions?fields=id,title,speakers")
+
+    def test_sparse_fieldsets_reject_unknown_fields(self):
+        response = self.client.get("/api/events?fields=id,nope")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("nope", response.data["fields"])
+
+    def test_row_serializers_match_model_serializers(self):
+        cases = [
+            (EventRows, EventSerializer, Event.objects.with_live_counts().select_related("venue")),
+            (SessionRows, SessionSerializer, Session.objects.prefetch_related("speakers").order_by("id")),
+            (RegistrationRows, RegistrationSerializer, Registration.objects.select_related(
+                "attendee", "event", "event__venue"
+            ).annotate(event_pending_registrations=EventCounterSlot.pending_for(OuterRef("event_id"))).order_by("id")),
+        ]
+        renderer = JSONRenderer()
+        for row_serializer_class, serializer_class, queryset in cases:
+            with self.subTest(serializer_class.__name__):
+                row_serializer = row_serializer_class()
+                rows = row_serializer.serialize(row_serializer.prepare(queryset))
+                self.assertEqual(
+                    renderer.render(rows),
+                    renderer.render(serializer_class(queryset, many=True).data),
+                )
+
+    def test_orjson_renderer_matches_json_renderer(self):
+        payloads = [
+            EventSerializer(Event.objects.with_live_counts().select_related("venue"), many=True).data,
+            RegistrationSerializer(Registration.objects.select_related("attendee", "event__venue"), many=True).data,
+            {"detail": "Line\u2028separator\u2029", "ids": ["x"], "count": 3, "ratio": 0.25, "flag": None, 7: "int key"},
+        ]
+        for payload in payloads:
+            self.assertEqual(ORJSONRenderer().render(payload), JSONRenderer().render(payload))
+
+    def test_orjson_renderer_falls_back_for_indent(self):
+        payload = {"a": [1, 2]}
+        self.assertEqual(
+            ORJSONRenderer().render(payload, "application/json; indent=4"),
+            JSONRenderer().render(payload, "application/json; indent=4"),
+        )
+
+
+class CursorPaginationTests(TestCase):
+    def test_tampered_cursor_is_not_found(self):
+        start = timezone.now() + timedelta(days=1)
+        for i in range(3):
+            make_event(title=f"Event {i}", slug=f"event-{i}", start_time=start + timedelta(hours=i))
+        client = api_client()
+        next_page = client.get("/api/events?page_size=2").data["next"]
+        self.assertEqual(len(client.get(next_page).data["results"]), 1)
+
+        for position in (["not-a-date", "x"], [start.isoformat(), "not-a-uuid"], [None, None]):
+            cursor = b64encode(json.dumps({"p": position}).encode()).decode()
+            self.assertEqual(client.get("/api/events", {"cursor": cursor}).status_code, 404)
+
+
+class NormalizedShapeTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create(username="admin", role=User.ADMIN)
+        cls.attendees = [User.objects.create(username=name) for name in ("ana", "budi")]
+        hall, annex = Venue.objects.create(name="Hall", city="Jakarta"), Venue.objects.create(name="Annex")
+        cls.events = [make_event(slug=f"event-{i}", venue=venue) for i, venue in enumerate((hall, hall, annex))]
+        for event in cls.events:
+            Registration.register(event.pk, cls.attendees[0])
+        Registration.register(cls.events[0].pk, cls.attendees[1])
+        cls.venue_ids = {str(hall.pk), str(annex.pk)}
+
+    def get(self, url, user=None):
+        response = api_client(user).get(url, {"shape": "normalized"})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_events_reference_their_venues_once(self):
+        body = self.get("/api/events")
+        self.assertEqual(set(body["included"]), {"venues"})
+        self.assertEqual(set(body["included"]["venues"]), self.venue_ids)
+        self.assertEqual(len(body["results"]), 3)
+        for row in body["results"]:
+            self.assertNotIn("venue_details", row)
+            self.assertEqual(body["included"]["venues"][row["venue"]]["id"], row["venue"])
+
+    def test_registrations_reference_their_events_and_venues_once(self):
+        body = self.get("/api/my-registrations", self.attendees[0])
+        included = body["included"]
+        self.assertEqual(set(included["events"]), {str(event.pk) for event in self.events})
+        self.assertEqual(set(included["venues"]), self.venue_ids)
+        for row in body["results"]:
+            self.assertNotIn("event_details", row)
+            self.assertEqual(included["events"][row["event"]]["id"], row["event"])
+        self.assertEqual({event["venue"] for event in included["events"].values()}, self.venue_ids)
+
+        body = self.get(f"/api/events/{self.events[0].pk}/registrations", self.admin)
+        self.assertEqual(len(body["results"]), 2)
+        self.assertEqual(list(body["included"]["events"]), [str(self.events[0].pk)])
+        self.assertEqual(body["included"]["events"][str(self.events[0].pk)]["registered_count"], 2)
+
+
+class EventSearchFilterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create(username="admin", role=User.ADMIN)
+        jakarta = Venue.objects.create(name="Hall", city="Jakarta")
+        bandung = Venue.objects.create(name="Annex", city="Bandung")
+        start = timezone.localtime().replace(hour=10, minute=0, second=0, microsecond=0)
+        cls.today = start.date()
+        for title, description, venue, days, status in [
+            ("Tech Conference", "Talks about Django", jakarta, 1, Event.STATUS_PUBLISHED),
+            ("Music Festival", "Bands all night", bandung, 5, Event.STATUS_PUBLISHED),
+            ("Tech Meetup", "Lightning talks", bandung, 10, Event.STATUS_PUBLISHED),
+            ("Tech Draft", "", jakarta, 12, Event.STATUS_DRAFT),
+        ]:
+            make_event(title=title, slug=title.lower().replace(" ", "-"), description=description, venue=venue,
+                       start_time=start + timedelta(days=days), status=status)
+
+    def titles(self, client=None, **params):
+        response = (client or api_client()).get("/api/events", params)
+        self.assertEqual(response.status_code, 200)
+        return [event["title"] for event in response.data["results"]]
+
+    def test_q_matches_word_prefixes_of_title_and_description(self):
+        self.assertEqual(self.titles(q="conf"), ["Tech Conference"])
+        self.assertEqual(self.titles(q="tech meet"), ["Tech Meetup"])
+        self.assertEqual(self.titles(q="djangos"), ["Tech Conference"])
+        self.assertEqual(self.titles(q="talk"), ["Tech Conference", "Tech Meetup"])
+        self.assertEqual(len(self.titles(q="?!")), 3)
+
+    def test_city_and_start_range(self):
+        self.assertEqual(self.titles(city="Bandung"), ["Music Festival", "Tech Meetup"])
+        # a plain start_before date includes that whole day
+        day = self.today + timedelta(days=5)
+        self.assertEqual(self.titles(start_after=day.isoformat(), start_before=day.isoformat()), ["Music Festival"])
+        self.assertEqual(
+            self.titles(start_after=(timezone.now() + timedelta(days=6)).isoformat(), city="Bandung"), ["Tech Meetup"],
+        )
+
+    def test_status_is_applied_within_what_the_caller_may_see(self):
+        admin = api_client(self.admin)
+        self.assertEqual(self.titles(admin, status=Event.STATUS_DRAFT), ["Tech Draft"])
+        self.assertEqual(self.titles(status=Event.STATUS_DRAFT), [])
+
+    def test_invalid_status_and_dates_are_rejected(self):
+        client = api_client()
+        for params in ({"status": "open"}, {"start_after": "tomorrow"}, {"start_before": "2024-02-30"}):
+            with self.subTest(params=params):
+                response = client.get("/api/events", params)
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(list(response.data), list(params))
+
+
+class RegistrationContentionTests(TestCase):
+    # an ACQUIRE_SQL that never gets a slot, as when every try loses its slot to other requests
+    NO_SEAT_SQL = "SELECT slot FROM events_eventcounterslot WHERE event_id = %s AND false"
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.event = make_event()
+        cls.attendee = User.objects.create(username="ana")
+
+    def test_losing_every_slot_is_retryable_while_seats_are_left(self):
+        with mock.patch.object(EventCounterSlot, "ACQUIRE_SQL", self.NO_SEAT_SQL):
+            with self.assertRaises(ValidationError) as raised:
+                Registration.register(self.event.pk, self.attendee)
+            self.assertEqual(raised.exception.code, "registration_busy")
+
+            response = api_client(self.attendee).post(f"/api/events/{self.event.pk}/registrations", {}, format="json")
+            self.assertEqual(response.status_code, 429)
+
+            EventCounterSlot.objects.filter(event=self.event).update(allotment=0)
+            with self.assertRaises(ValidationError) as raised:
+                Registration.register(self.event.pk, self.attendee)
+            self.assertEqual(raised.exception.code, "capacity_reached")
+
+    def test_queued_request_loses_to_a_direct_registration_without_failing_the_batch(self):
+        request = RegistrationRequest.objects.create(event=self.event, attendee=self.attendee)
+        acquire_many = EventCounterSlot.acquire_many
+
+        def direct_registration_lands_meanwhile(event_id, wanted):
+            Registration.register(event_id, self.attendee)
+            return acquire_many(event_id, wanted)
+
+        with mock.patch.object(EventCounterSlot, "acquire_many", side_effect=direct_registration_lands_meanwhile):
+            self.assertEqual(RegistrationRequest.process_batch(self.event.pk, 10), 1)
+
+        request.refresh_from_db()
+        self.assertEqual(request.status, RegistrationRequest.STATUS_REJECTED)
+        self.assertEqual(request.reason, RegistrationRequest.REASON_ALREADY_REGISTERED)
+        self.assertEqual(request.registration, Registration.objects.get(event=self.event, attendee=self.attendee))
+        self.assertEqual(Event.objects.get(pk=self.event.pk).live_registered_count, 1)
+
+
+class EventUpdateTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create(username="admin", role=User.ADMIN)
+        cls.event = make_event()
+        Registration.register(cls.event.pk, User.objects.create(username="ana"))
+
+    def slots(self):
+        return list(EventCounterSlot.objects.filter(event=self.event).order_by("slot").values_list("count", "allotment"))
+
+    def test_edits_report_the_live_count_and_only_capacity_changes_resplit_the_slots(self):
+        client = api_client(self.admin)
+        before = self.slots()
+        response = client.patch(f"/api/events/{self.event.pk}", {"title": "Renamed"}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["registered_count"], 1)
+        self.assertEqual(self.slots(), before)
+
+        response = client.patch(f"/api/events/{self.event.pk}", {"capacity": 20}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["registered_count"], 1)
+        self.assertEqual(Event.objects.get(pk=self.event.pk).registered_count, 1)
+        self.assertEqual(sum(allotment for _, allotment in self.slots()), 19)
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.event = make_event()
+        cls.attendee = User.objects.create(username="ana")
+        cls.registration, _ = Registration.register(cls.event.pk, cls.attendee)
+
+    def setUp(self):
+        caches[settings.RESPONSE_CACHE_ALIAS].clear()
+        self.urls = ["/api/events", f"/api/events/{self.event.pk}", "/api/my-registrations"]
+        self.client = api_client(self.attendee)
+
+    def validators(self):
+        """{url: (ETag, Last-Modified)}, after checking that replaying them answers 304."""
+        validators = {}
+        for url in self.urls:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            etag, last_modified = response["ETag"], response["Last-Modified"]
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+            self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 304)
+            validators[url] = etag, last_modified
+        return validators
+
+    def assertChanged(self, change):
+        before = self.validators()
+        change()
+        after = self.validators()
+        for url in self.urls:
+            with self.subTest(url=url, change=change.__name__):
+                self.assertNotEqual(after[url][0], before[url][0])
+                # If-None-Match wins over If-Modified-Since, which has one-second resolution
+                response = self.client.get(
+                    url, HTTP_IF_NONE_MATCH=before[url][0], HTTP_IF_MODIFIED_SINCE=before[url][1],
+                )
+                self.assertEqual(response.status_code, 200)
+
+    def test_registration_and_cancellation_change_the_validators(self):
+        def register():
+            Registration.register(self.event.pk, self.attendee)
+
+        def cancel():
+            Registration.objects.get(pk=self.registration.pk).cancel()
+
+        self.assertChanged(cancel)
+        self.assertChanged(register)
+
+    def test_venue_and_session_edits_change_the_validators(self):
+        def edit_venue():
+            self.event.venue.name = "Main hall"
+            self.event.venue.save()
+
+        def edit_session():
+            Session.objects.create(
+                event=self.event, title="Keynote", start_time=self.event.start_time,
+                end_time=self.event.start_time + timedelta(hours=1),
+            )
+
+        self.assertChanged(edit_venue)
+        self.assertChanged(edit_session)
+
+
+class AvailabilityBatchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create(username="admin", role=User.ADMIN)
+        cls.event = make_event()
+        cls.draft = make_event(slug="draft", status=Event.STATUS_DRAFT, capacity=5)
+        Registration.register(cls.event.pk, User.objects.create(username="ana"))
+
+    def get(self, ids, user=None):
+        return api_client(user).get("/api/events/availability", {"ids": ",".join(map(str, ids))})
+
+    def test_reports_the_visible_events_and_skips_the_rest(self):
+        ids = [self.event.pk, self.draft.pk, uuid.uuid4()]
+        response = self.get(ids)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, {str(self.event.pk): {"capacity": 10, "registered_count": 1, "remaining": 9}})
+        self.assertEqual(set(self.get(ids, self.admin).data), {str(self.event.pk), str(self.draft.pk)})
+
+    def test_malformed_missing_or_too_many_ids_are_rejected(self):
+        limit = EventViewSet.MAX_AVAILABILITY_IDS
+        for ids in (["not-a-uuid"], [], [uuid.uuid4() for _ in range(limit + 1)]):
+            with self.subTest(count=len(ids)):
+                response = self.get(ids)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn("ids", response.data)
+        self.assertEqual(self.get([uuid.uuid4() for _ in range(limit)]).status_code, 200)
+
+
+class AvailabilityNotifyTests(TransactionTestCase):
+    # NOTIFYs are delivered on commit, so these tests commit instead of running in a transaction
+    def test_registering_and_cancelling_notify_the_event_id(self):
+        event = make_event()
+        wrapper = connections["default"]
+        listener = wrapper.Database.connect(**wrapper.get_connection_params(), autocommit=True)
+        self.addCleanup(listener.close)
+        listener.execute(f"LISTEN {AVAILABILITY_CHANNEL}")
+
+        registration, _ = Registration.register(event.pk, User.objects.create(username="ana"))
+        registration.cancel()
+        payloads = [notify.payload for notify in listener.notifies(timeout=5, stop_after=2)]
+        self.assertEqual(payloads, [str(event.pk)] * 2)
+
+
+class AvailabilityStreamTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.event = make_event()
+        cls.draft = make_event(slug="draft", status=Event.STATUS_DRAFT)
+
+    def setUp(self):
+        # a hub of the test's own without the LISTEN thread; the tests publish to it directly
+        self.hub = AvailabilityHub()
+        self.hub._ensure_listening = lambda: None
+        patcher = mock.patch("events.views.availability_hub", self.hub)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def open_stream(self, ids):
+        return availability_stream(AsyncRequestFactory().get("/api/events/availability/stream", {"ids": ids}))
+
+    async def next_message(self, stream):
+        event, data = (await anext(stream)).decode().splitlines()[:2]
+        return event, json.loads(data.removeprefix("data: "))
+
+    async def test_stream_starts_with_the_availability_of_published_events_then_pushes_changes(self):
+        ids = f"{self.event.pk},{self.draft.pk},{uuid.uuid4()}"
+        response = await self.open_stream(ids)
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        stream = response.streaming_content
+        available = {"id": str(self.event.pk), "capacity": 10, "registered_count": 0, "remaining": 10}
+        self.assertEqual(await self.next_message(stream), ("event: availability", available))
+        # unknown and unpublished ids are neither reported nor watched
+        self.assertEqual(set(self.hub._subscribers), {str(self.event.pk)})
+
+        await sync_to_async(Registration.register)(self.event.pk, await User.objects.acreate(username="ana"))
+        await self.hub._publish({str(self.event.pk), str(self.draft.pk)})
+        available.update(registered_count=1, remaining=9)
+        self.assertEqual(await self.next_message(stream), ("event: availability", available))
+
+    async def test_malformed_ids_are_rejected(self):
+        self.assertEqual((await self.open_stream("not-a-uuid")).status_code, 400)
+
+
+class GenerateMockEventsTests(TransactionTestCase):
+    # --reset TRUNCATEs, which Postgres refuses while a TestCase's transaction has FK checks pending
+    def setUp(self):
+        User.objects.bulk_create(User(username=f"attendee-{i}") for i in range(20))
+
+    def generate(self):
+        call_command(
+            "generate_mock_events", "--reset", "--seed", "7", "--events", "4", "--registrations-per-event", "5",
+            stdout=StringIO(),
+        )
+        return {
+            model.__name__: set(model.objects.values_list("id", flat=True))
+            for model in (Venue, Speaker, Event, Track, Session, Registration)
+        }
+
+    def test_same_seed_generates_the_same_rows(self):
+        first = self.generate()
+        self.assertTrue(all(first.values()))
+        self.assertEqual(self.generate(), first)
+
+    def test_registered_counts_match_the_copied_rows_and_registering_still_works(self):
+        self.generate()
+        events = Event.objects.annotate(
+            confirmed=Count("registrations", filter=Q(registrations__status=Registration.STATUS_CONFIRMED)),
+        )
+        self.assertTrue(any(event.confirmed for event in events))
+        for event in events:
+            self.assertEqual(event.registered_count, event.confirmed)
+
+        event = events.filter(status=Event.STATUS_PUBLISHED).first()
+        registration, created = Registration.register(event.pk, User.objects.create(username="late"))
+        self.assertTrue(created)
+        self.assertEqual(Event.objects.get(pk=event.pk).live_registered_count, event.confirmed + 1)
+
+
+class BenchmarkRegistrationsTests(TransactionTestCase):
+    # the benchmark's client threads use connections of their own, so its rows have to be committed
+    def test_reactivating_a_cancelled_registration_answers_201(self):
+        event, attendee = make_event(), User.objects.create(username="ana")
+        client = api_client(attendee)
+        url = f"/api/events/{event.pk}/registrations"
+        registration_id = client.post(url, {}, format="json").data["id"]
+        self.assertEqual(client.delete(f"{url}/{registration_id}").status_code, 204)
+        # _Worker.record keeps track of registrations from their 201s
+        response = client.post(url, {}, format="json")
+        self.assertEqual((response.status_code, response.data["id"]), (201, registration_id))
+
+    def test_short_threaded_run_does_not_oversell(self):
+        out = StringIO()
+        call_command(
+            "benchmark_registrations", "--duration", "0.5", "--mode", "threads", "--concurrency", "4",
+            "--capacity", "5", "--users", "12", "--cancel-ratio", "0.5", stdout=out,
+        )
+        output = out.getvalue()
+        self.assertIn("✓ No oversell", output)
+        self.assertNotIn("✗", output)
+        self.assertIn("register 201", output)
+        self.assertIn("cancel 204", output)
+        # a client cancelling a registration it no longer holds
+        self.assertNotIn("cancel 404", output)
+        self.assertFalse(Event.objects.exists())
+
+
+class QueryBudgetTests(QueryBudgetMixin, TestCase):
+    """SQL query and wall-time budgets of every events route (see core/testing.py)."""
+    urlconf = "events.urls"
+    unmeasured = {"events-availability-stream": "streams until the client disconnects"}
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create(username="admin", role=User.ADMIN)
+        cls.attendee = User.objects.create(username="ana", first_name="Ana", last_name="Lima")
+        cls.start = timezone.now().replace(microsecond=0) + timedelta(days=30)
+        cls.venue = Venue.objects.create(name="Hall", city="Jakarta", capacity=5000)
+        cls.event = Event.objects.create(
+            title="Main event", slug="main-event", start_time=cls.start,
+            end_time=cls.start + timedelta(days=60), capacity=5000, venue=cls.venue,
+            status=Event.STATUS_PUBLISHED, organizer=cls.admin,
+        )
+        cls.registration, _ = Registration.register(cls.event.pk, cls.attendee)
+        cls.track = Track.objects.create(event=cls.event, name="Track seed")
+        cls.speaker = Speaker.objects.create(name="Speaker seed")
+        cls.session = Session.objects.create(
+            event=cls.event, track=cls.track, title="Talk seed",
+            start_time=cls.start, end_time=cls.start + timedelta(minutes=30),
+        )
+        cls.session.speakers.set([cls.speaker])
+        cls.registration_request = RegistrationRequest.objects.create(event=cls.event, attendee=cls.admin)
+        cls.rows = 0
+
+    def grow(self, n):
+        for _ in range(n):
+            i = self.rows = self.rows + 1
+            venue = Venue.objects.create(name=f"Hall {i}", city="Bandung")
+            event = Event.objects.create(
+                title=f"Event {i}", slug=f"event-{i}", start_time=self.start + timedelta(days=i),
+                end_time=self.start + timedelta(days=i, hours=8), capacity=100, venue=venue,
+                status=Event.STATUS_PUBLISHED,
+            )
+            user = User.objects.create(username=f"user-{i}", first_name="User", last_name=str(i))
+            Registration.register(self.event.pk, user)
+            Registration.register(event.pk, self.attendee)
+            RegistrationRequest.objects.create(event=self.event, attendee=user)
+
+            track = Track.objects.create(event=self.event, name=f"Track {i}")
+            speakers = [Speaker.objects.create(name=f"Speaker {i}.{j}") for j in range(2)]
+            session = Session.objects.create(
+                event=self.event, track=track, title=f"Talk {i}",
+                start_time=self.start + timedelta(hours=i), end_time=self.start + timedelta(hours=i, minutes=45),
+            )
+            session.speakers.set(speakers)
+
+    def budget_requests(self):
+        event_url = f"/api/events/{self.event.pk}"
+
+        def new_attendee():
+            self.rows += 1
+            return User.objects.create(username=f"new-{self.rows}")
+
+        def cancel():
+            attendee = new_attendee()
+            registration, _ = Registration.register(self.event.pk, attendee)
+            return "DELETE", f"/api/my-registrations/{registration.pk}", None, attendee
+
+        def get(path, user=self.admin):
+            return lambda: ("GET", path, None, user)
+
+        def import_agenda():
+            track = f"Import {new_attendee().pk}"
+            speaker = Speaker.objects.create(name=track)
+            day = self.start + timedelta(days=50)
+            return "POST", f"{event_url}/sessions/bulk", {"sessions": [
+                {"title": f"Imported {i}", "track": track, "start_time": day + timedelta(hours=i),
+                 "end_time": day + timedelta(hours=i, minutes=50), "speakers_ids": [speaker.pk]}
+                for i in range(3)
+            ]}, self.admin
+
+        return {
+            "GET api-root": get("/api/"),
+            "GET events-list": get("/api/events", None),
+            "GET events-list normalized": get("/api/events?shape=normalized", None),
+            "GET events-list fields": get("/api/events?fields=id,title,venue_details", None),
+            "POST events-list": lambda: ("POST", "/api/events", {
+                "title": "Created", "slug": f"created-{self.rows}", "start_time": self.start,
+                "end_time": self.start + timedelta(hours=2), "capacity": 10, "venue": self.venue.pk,
+            }, self.admin),
+            "GET events-detail": get(event_url, None),
+            "PATCH events-detail": lambda: ("PATCH", event_url, {"description": "Edited"}, self.admin),
+            "GET events-availability": get(f"{event_url}/availability"),
+            "GET events-schedule": get(f"{event_url}/schedule", None),
+            "GET events-availability-batch": lambda: (
+                "GET", f"/api/events/availability?ids={','.join(str(pk) for pk in Event.objects.values_list('pk', flat=True))}",
+                None, None,
+            ),
+            "GET events-cache-stats": get("/api/events/cache-stats", self.admin),
+            "GET events-recommendations": get("/api/events/recommendations", None),
+            "GET speakers-list": get("/api/speakers"),
+            "GET speakers-detail": get(f"/api/speakers/{self.speaker.pk}"),
+            "GET speakers-conflicts": get("/api/speakers/conflicts"),
+            "GET speakers-conflicts event": get(f"/api/speakers/conflicts?event={self.event.pk}"),
+            "GET venues-list": get("/api/venues"),
+            "GET venues-detail": get(f"/api/venues/{self.venue.pk}"),
+            "GET venues-city-choices": get("/api/venues/city-choices", None),
+            "GET my-registrations-list": get("/api/my-registrations", self.attendee),
+            "GET my-registrations-list normalized": get("/api/my-registrations?shape=normalized", self.attendee),
+            "GET my-registrations-detail": get(f"/api/my-registrations/{self.registration.pk}", self.attendee),
+            "DELETE my-registrations-detail": cancel,
+            "GET event-tracks-list": get(f"{event_url}/tracks"),
+            "GET event-tracks-detail": get(f"{event_url}/tracks/{self.track.pk}"),
+            "GET event-sessions-list": get(f"{event_url}/sessions"),
+            "GET event-sessions-detail": get(f"{event_url}/sessions/{self.session.pk}"),
+            "POST event-sessions-bulk": import_agenda,
+            "GET event-registrations-list": get(f"{event_url}/registrations", self.admin),
+            "GET event-registrations-list normalized": get(f"{event_url}/registrations?shape=normalized", self.admin),
+            "POST event-registrations-list": lambda: ("POST", f"{event_url}/registrations", {}, new_attendee()),
+            "GET event-registrations-detail": get(f"{event_url}/registrations/{self.registration.pk}", self.attendee),
+            "GET event-registration-requests-list": get(f"{event_url}/registration-requests", self.admin),
+            "GET event-registration-requests-detail": get(
+                f"{event_url}/registration-requests/{self.registration_request.pk}", self.admin,
+            ),
+        }
+
+
+class CheckQueryPlansTests(TestCase):
+    def test_only_the_later_of_two_identical_indexes_is_redundant(self):
+        command = check_query_plans.Command()
+        index = check_query_plans.IndexInfo(
+            "events_event", "a_idx", False, False, False, False, "btree", False, ["start_time"], 8192, 1,
+        )
+        twin, wider = index._replace(name="b_idx"), index._replace(name="c_idx", columns=["start_time", "id"])
+        self.assertEqual([i.name for i in (index, twin) if command.is_redundant(i, [index, twin])], ["b_idx"])
+        self.assertEqual(command.covering_index(index, [index, twin, wider]), wider)
+
+
+class ConcurrencyLimitTests(TestCase):
+    def test_requests_beyond_the_cap_wait_their_turn(self):
+        in_flight = peak = 0
+
+        async def view(request):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return HttpResponse()
+
+        with override_settings(MAX_CONCURRENT_REQUESTS=2):
+            middleware = concurrency_limit_middleware(view)
+
+        async def burst():
+            return await asyncio.gather(*(middleware(None) for _ in range(6)))
+
+        self.assertEqual([response.status_code for response in asyncio.run(burst())], [200] * 6)
+        self.assertEqual(peak, 2)
+
+
+@override_settings(METRICS_ENABLED=True, METRICS_TOKEN='')
+class MetricsTests(TestCase):
+    def test_requests_are_recorded_by_route(self):
+        admin = User.objects.create(username="admin", role=User.ADMIN)
+        event = make_event()
+        client = api_client(admin)
+        self.assertEqual(client.post(f"/api/events/{event.pk}/registrations", {}, format="json").status_code, 201)
+
+        # a plain Django view: the admin's JWT is checked there, not by DRF
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {ClaimsRefreshToken.for_user(admin).access_token}")
+        body = client.get("/api/metrics").content.decode()
+        route = 'route="event-registrations-list"'
+        self.assertIn(f'http_requests_total{{method="POST",{route},status="201"}}', body)
+        self.assertRegex(body, rf'http_request_db_queries_count{{{route}}} [1-9]')
+        self.assertRegex(body, rf'http_request_db_lock_wait_seconds_count{{{route}}} [1-9]')
+        self.assertRegex(body, rf'http_response_size_bytes_sum{{{route}}} [1-9]')
+
+    def test_only_admins_read_metrics_without_a_token(self):
+        attendee = User.objects.create(username="attendee", role=User.ATTENDEE)
+        client = api_client()
+        self.assertEqual(client.get("/api/metrics").status_code, 403)
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {ClaimsRefreshToken.for_user(attendee).access_token}")
+        self.assertEqual(client.get("/api/metrics").status_code, 403)
+
+    @override_settings(METRICS_TOKEN='scrape-token')
+    def test_token_is_required_when_set(self):
+        client = api_client()
+        self.assertEqual(client.get("/api/metrics").status_code, 401)
+        client.credentials(HTTP_AUTHORIZATION="Bearer scrape-token")
+        self.assertEqual(client.get("/api/metrics").status_code, 200)
+
+    @override_settings(METRICS_ENABLED=False)
+    def test_metrics_are_off_by_default(self):
+        self.assertEqual(api_client().get("/api/metrics").status_code, 404)
+
+
+class SlowQueryTests(TestCase):
+    def test_slow_queries_are_logged_with_route_call_site_and_plan(self):
+        admin = User.objects.create(username="admin", role=User.ADMIN)
+        make_event()
+        with tempfile.TemporaryDirectory() as log_dir, override_settings(
+            SLOW_QUERY_MS=0.001, SLOW_QUERY_EXPLAIN_RATE=1, SLOW_QUERY_LOG=f"{log_dir}/slow.log",
+        ):
+            client = api_client(admin)
+            self.assertEqual(client.get("/api/events").status_code, 200)
+            response = client.get("/api/slow-queries?route=events-list&order=max")
+
+        self.assertEqual(response.status_code, 200)
+        results = response.data["results"]
+        self.assertTrue(results)
+        self.assertTrue(all(result["routes"] == ["events-list"] for result in results))
+        call_sites = " ".join(site for result in results for site in result["call_sites"])
+        self.assertIn("events/views.py", call_sites)
+        self.assertTrue(any("Buffers" in (result["plan"] or "") for result in results))
+
+        attendee = api_client(User.objects.create(username="ana"))
+        self.assertEqual(attendee.get("/api/slow-queries").status_code, 403)
+
+    def test_each_process_logs_to_its_own_file_and_all_are_read(self):
+        admin = User.objects.create(username="admin", role=User.ADMIN)
+        make_event()
+        other = {
+            "at": timezone.now().isoformat(), "duration_ms": 5000.0, "route": "events-list", "method": "GET",
+            "call_site": None, "sql": "SELECT pg_sleep(%s)",
+        }
+        with tempfile.TemporaryDirectory() as log_dir, override_settings(
+            SLOW_QUERY_MS=0.001, SLOW_QUERY_EXPLAIN_RATE=0, SLOW_QUERY_LOG=f"{log_dir}/slow.log",
+        ):
+            Path(log_dir, "slow.1.log.1").write_text(json.dumps(other) + "\n")
+            expired = Path(log_dir, "slow.2.log")
+            expired.write_text("")
+            os.utime(expired, (0, 0))
+
+            client = api_client(admin)
+            self.assertEqual(client.get("/api/events").status_code, 200)
+            self.assertEqual(sorted(os.listdir(log_dir)), sorted(["slow.1.log.1", f"slow.{os.getpid()}.log"]))
+            results = client.get("/api/slow-queries?order=max").data["results"]
+
+        self.assertEqual(results[0]["sql"], other["sql"])
+        self.assertGreater(len(results), 1)
+
+
+@override_settings(DATABASE_REPLICAS=["replica"], DATABASE_ROUTERS=["core.routers.ReplicaRouter"])
+class ReplicaRoutingTests(TransactionTestCase):
+    """
+    The "replica" alias, a second connection to the test database, stands in for a
+    replica (core/routers.py). The router keeps reads inside a transaction on the
+    primary, so these tests commit instead of running in one.
+    """
+    databases = {"default", "replica"}
+
+    def setUp(self):
+        self.event = make_event()
+        self.attendee = User.objects.create(username="ana")
+        caches[settings.RESPONSE_CACHE_ALIAS].clear()
+        caches[settings.REPLICA_PIN_CACHE_ALIAS].clear()
+        routers._lag_checks.clear()
+        self.client = api_client()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {ClaimsRefreshToken.for_user(self.attendee).access_token}")
+
+    def get(self, path):
+        """The response and whether any query of it ran on the replica."""
+        with CaptureQueriesContext(connections["replica"]) as replica:
+            response = self.client.get(path)
+        self.assertEqual(response.status_code, 200)
+        return response, bool(replica.captured_queries)
+
+    def test_safe_requests_read_from_the_replica(self):
+        self.assertTrue(self.get("/api/events")[1])
+
+    def test_writes_and_reads_in_a_transaction_use_the_primary(self):
+        router = routers.ReplicaRouter()
+        token = routers.begin_request(True)
+        try:
+            self.assertEqual(router.db_for_write(Event), "default")
+            with transaction.atomic():
+                self.assertEqual(router.db_for_read(Event), "default")
+            self.assertEqual(router.db_for_read(Event), "replica")
+        finally:
+            routers.end_request(token)
+
+    def test_a_successful_write_pins_the_user_to_the_primary(self):
+        self.assertTrue(self.get("/api/my-registrations")[1])
+        response = self.client.post(f"/api/events/{self.event.pk}/registrations", {}, format="json")
+        self.assertEqual(response.status_code, 201)
+
+        response, on_replica = self.get("/api/my-registrations")
+        self.assertFalse(on_replica)
+        self.assertEqual([r["event"] for r in response.data["results"]], [self.event.pk])
+        # other users still read from the replica
+        self.client.credentials()
+        self.assertTrue(self.get("/api/events")[1])
+
+    def test_a_lagging_or_unreachable_replica_falls_back_to_the_primary(self):
+        with mock.patch.object(routers, "LAG_SQL", f"SELECT {settings.REPLICA_MAX_LAG_SECONDS + 1}"):
+            self.assertEqual(routers.replica_lag("replica"), settings.REPLICA_MAX_LAG_SECONDS + 1)
+            self.assertFalse(self.get("/api/events")[1])
+
+        routers._lag_checks.clear()
+        with mock.patch.object(connections["replica"], "cursor", side_effect=OperationalError):
+            self.assertIsNone(routers.replica_lag("replica"))
+            response, on_replica = self.get("/api/events")
+        self.assertFalse(on_replica)
+        self.assertEqual([e["id"] for e in response.data["results"]], [str(self.event.pk)])
+
+
+class ScheduleTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        start = timezone.now().replace(hour=9, minute=0, second=0, microsecond=0) + timedelta(days=10)
+        cls.event = make_event(title="Conf", slug="conf", start_time=start, end_time=start + timedelta(days=2))
+        cls.tracks = [Track.objects.create(event=cls.event, name=name) for name in ("A", "B")]
+        cls.speakers = [Speaker.objects.create(name=name) for name in ("Budi", "Ana")]
+        for hour, (day, track, speakers) in enumerate([(0, 1, [0]), (0, 0, [0, 1]), (1, None, [1]), (1, 0, [])]):
+            session = Session.objects.create(
+                event=cls.event, track=cls.tracks[track] if track is not None else None,
+                title=f"Day {day} track {track}", start_time=start + timedelta(days=day, hours=hour),
+                end_time=start + timedelta(days=day, hours=hour, minutes=45),
+            )
+            session.speakers.set([cls.speakers[i] for i in speakers])
+
+    def test_schedule_groups_sessions_by_day_and_track(self):
+        caches[settings.RESPONSE_CACHE_ALIAS].clear()
+        response = api_client().get(f"/api/events/{self.event.pk}/schedule")
+        self.assertEqual(response.status_code, 200)
+        data = response.data
+        a, b = (str(track.pk) for track in self.tracks)
+
+        self.assertEqual(data["event"]["id"], str(self.event.pk))
+        self.assertEqual([track["name"] for track in data["tracks"]], ["A", "B"])
+        self.assertEqual(
+            [(day_data["date"] is not None, [t["track"] for t in day_data["tracks"]]) for day_data in data["days"]],
+            [(True, [a, b]), (True, [a, None])],
+        )
+        self.assertEqual([speaker["name"] for speaker in data["speakers"]], ["Ana", "Budi"])
+        first = data["days"][0]["tracks"][0]["sessions"][0]
+        self.assertEqual(sorted(first["speakers"]), sorted(str(speaker.pk) for speaker in self.speakers))
+        self.assertNotIn("event", first)
+
+    def test_schedule_is_cached_until_the_agenda_changes(self):
+        caches[settings.RESPONSE_CACHE_ALIAS].clear()
+        client = api_client()
+        url = f"/api/events/{self.event.pk}/schedule"
+        client.get(url)
+        with self.assertNumQueries(1):
+            etag = client.get(url)["ETag"]
+        self.assertEqual(client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        Registration.register(self.event.pk, User.objects.create(username="ana"))
+        self.assertEqual(client.get(url).data["event"]["registered_count"], 1)
+        Session.objects.filter(speakers=self.speakers[1]).delete()
+        self.assertEqual([speaker["name"] for speaker in client.get(url).data["speakers"]], ["Budi"])
+
+
+class AgendaImportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.organizer = User.objects.create(username="org", role=User.ORGANIZER)
+        cls.start = timezone.now().replace(minute=0, second=0, microsecond=0) + timedelta(days=10)
+        cls.event = make_event(
+            title="Conf", slug="conf", start_time=cls.start, end_time=cls.start + timedelta(hours=8),
+        )
+        cls.track = Track.objects.create(event=cls.event, name="Main")
+        cls.speaker = Speaker.objects.create(name="Ana")
+        cls.existing = Session.objects.create(
+            event=cls.event, track=cls.track, title="Keynote",
+            start_time=cls.start, end_time=cls.start + timedelta(hours=1),
+        )
+
+    def setUp(self):
+        self.client = api_client(self.organizer)
+        self.url = f"/api/events/{self.event.pk}/sessions/bulk"
+
+    def session(self, title, hour, hours=1, track="Main", speakers=()):
+        start = self.start + timedelta(hours=hour)
+        return {
+            "title": title, "track": track, "start_time": start, "end_time": start + timedelta(hours=hours),
+            "speakers_ids": [str(pk) for pk in speakers],
+        }
+
+    def test_import_creates_sessions_tracks_and_speakers_in_bulk(self):
+        sessions = [self.session(f"Talk {hour}", hour, speakers=[self.speaker.pk]) for hour in range(1, 8)]
+        sessions += [self.session("Workshop", 0, hours=3, track="Lab"), self.session("Lunch", 3, track=None)]
+        with self.assertNumQueries(11):
+            response = self.client.post(self.url, {"sessions": sessions}, format="json")
+
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(response.data["created"], 9)
+        self.assertEqual(self.event.sessions.count(), 10)
+        self.assertEqual(self.speaker.sessions.count(), 7)
+        lab = self.event.tracks.get(name="Lab")
+        self.assertEqual(lab.sessions.get().time_range.lower, self.start)
+        schedule = self.client.get(f"/api/events/{self.event.pk}/schedule").data
+        self.assertEqual(len(schedule["tracks"]), 2)
+
+    def test_all_conflicts_are_reported_and_nothing_is_inserted(self):
+        unknown = "00000000-0000-0000-0000-000000000000"
+        sessions = [
+            self.session("Overlaps keynote", 0.5),
+            self.session("Fine", 1),
+            self.session("Overlaps fine", 1.5),
+            self.session("After the event", 7.5),
+            self.session("Unknown speaker", 3, speakers=[unknown]),
+            self.session("Other track", 1.5, track="Lab"),
+        ]
+        response = self.client.post(self.url, {"sessions": sessions}, format="json")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            [(conflict["index"], conflict.get("conflicts_with")) for conflict in response.data["conflicts"]],
+            [
+                (0, {"id": str(self.existing.pk), "title": "Keynote"}),
+                (2, {"index": 1, "title": "Fine"}),
+                (3, None),
+                (4, None),
+            ],
+        )
+        self.assertEqual(self.event.sessions.count(), 1)
+
+        response = self.client.post(self.url, {"sessions": sessions, "partial": True}, format="json")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["created"], 2)
+        self.assertEqual(len(response.data["conflicts"]), 4)
+        self.assertEqual(set(self.event.sessions.values_list("title", flat=True)), {"Keynote", "Fine", "Other track"})
+
+
+class SpeakerConflictTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.organizer = User.objects.create(username="org", role=User.ORGANIZER)
+        cls.start = timezone.now().replace(minute=0, second=0, microsecond=0) + timedelta(days=10)
+        cls.events = [
+            make_event(
+                title=f"Conf {i}", slug=f"conf-{i}", start_time=cls.start, end_time=cls.start + timedelta(hours=8),
+            )
+            for i in range(2)
+        ]
+        cls.ana, cls.budi = Speaker.objects.create(name="Ana"), Speaker.objects.create(name="Budi")
+        cls.sessions = []
+        for event, hour, speakers in [(0, 0, [cls.ana]), (1, 0.5, [cls.ana, cls.budi]), (0, 2, [cls.budi]), (1, 2, [])]:
+            session = Session.objects.create(
+                event=cls.events[event], title=f"Talk {len(cls.sessions)}",
+                start_time=cls.start + timedelta(hours=hour), end_time=cls.start + timedelta(hours=hour + 1),
+            )
+            session.speakers.set(speakers)
+            cls.sessions.append(session)
+
+    def setUp(self):
+        self.client = api_client(self.organizer)
+
+    def conflicts(self, query=""):
+        response = self.client.get(f"/api/speakers/conflicts{query}")
+        self.assertEqual(response.status_code, 200)
+        return [
+            (conflict["speaker"]["name"], sorted(session["title"] for session in conflict["sessions"]))
+            for conflict in response.data["results"]
+        ]
+
+    def test_overlapping_sessions_of_a_speaker_are_found_across_events(self):
+        self.assertEqual(self.conflicts(), [("Ana", ["Talk 0", "Talk 1"])])
+        self.assertEqual(self.conflicts(f"?event={self.events[1].pk}"), [("Ana", ["Talk 0", "Talk 1"])])
+        self.assertEqual(self.conflicts(f"?speaker={self.budi.pk}"), [])
+        self.assertEqual(self.client.get("/api/speakers/conflicts?event=nope").status_code, 400)
+
+    def test_double_booking_is_rejected_on_write(self):
+        url = f"/api/events/{self.events[1].pk}/sessions"
+        response = self.client.patch(
+            f"{url}/{self.sessions[3].pk}", {"speakers_ids": [str(self.budi.pk)]}, format="json",
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data["speakers_ids"], ["Budi has another session at that time: Talk 2"])
+        response = self.client.patch(
+            f"{url}/{self.sessions[3].pk}", {"speakers_ids": [str(self.ana.pk)]}, format="json",
+        )
+        self.assertEqual(response.status_code, 200)
+
+        start = self.start + timedelta(hours=2, minutes=30)
+        response = self.client.post(f"{url}/bulk", {"sessions": [
+            {"title": title, "start_time": start, "end_time": start + timedelta(hours=1), "speakers_ids": [str(self.budi.pk)]}
+            for title in ("Panel", "Panel again")
+        ]}, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            [(conflict["index"], conflict["conflicts_with"]["title"]) for conflict in response.data["conflicts"]],
+            [(0, "Talk 2"), (1, "Talk 2")],
+        )
@@ -2,8 +2,10 @@ from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 from rest_framework_nested import routers
 
-from .views import (EventViewSet, MyRegistrationViewSet, RegistrationViewSet,
-                    SessionViewSet, SpeakerViewSet, TrackViewSet, VenueViewSet)
+from .views import (EventViewSet, MyRegistrationViewSet,
+                    RegistrationRequestViewSet, RegistrationViewSet,
+                    SessionViewSet, SpeakerViewSet, TrackViewSet, VenueViewSet,
+                    availability_stream)
 
 router = DefaultRouter(trailing_slash=False)
 router.register(r'events', EventViewSet, basename='events')
@@ -15,8 +17,10 @@ events_router = routers.NestedDefaultRouter(router, r'events', lookup='event')
 events_router.register(r'tracks', TrackViewSet, basename='event-tracks')
 events_router.register(r'sessions', SessionViewSet, basename='event-sessions')
 events_router.register(r'registrations', RegistrationViewSet, basename='event-registrations')
+events_router.register(r'registration-requests', RegistrationRequestViewSet, basename='event-registration-requests')
 
 urlpatterns = [
+    path('events/availability/stream', availability_stream, name='events-availability-stream'),
     path(r'', include(router.urls)),
     path(r'', include(events_router.urls)),
 ]
\ No newline at end of file
@@ -1,26 +1,184 @@
-from datetime import datetime, timezone
+import asyncio
+import json
+import uuid
 
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from authentication.models import User
+from core.conditional import conditional_get, latest, make_etag
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError
+from django.db.models import Count, Max, OuterRef
+from django.http import JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
-from rest_framework import mixins, viewsets
+from rest_framework import generics, mixins, serializers, status, viewsets
 from rest_framework.decorators import action
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.reverse import reverse
 
-from .models import Event, Registration, Session, Speaker, Track, Venue
+from .agenda import import_agenda, speaker_conflicts
+from .cache import cache_stats, read_through
+from .filters import EventSearchFilter, parse_id_list_param
+from .models import (Event, EventCounterSlot, Registration,
+                     RegistrationRequest, Session, Speaker, Track, Venue)
 from .permissions import IsOrganizerOrAdmin, IsOwnerOrReadOnly
-from .serializers import (EventSerializer, RegistrationSerializer,
-                          SessionSerializer, SpeakerSerializer,
-                          TrackSerializer, VenueSerializer)
+from .realtime import availability_hub, load_availability
+from .rows import EventRows, RegistrationRows, SessionRows
+from .serializers import (AgendaImportSerializer, EventScheduleSerializer,
+                          EventSerializer, IncludedEventSerializer,
+                          RegistrationRequestSerializer,
+                          RegistrationSerializer, SessionSerializer,
+                          SpeakerSerializer, TrackSerializer, VenueSerializer)
 
 
-class EventViewSet(viewsets.ModelViewSet):
+def _by_id(serializer_class, instances):
+    return {str(item['id']): item for item in serializer_class(instances, many=True).data}
+
+
+class FastListMixin:
+    """
+    Serve list responses from `row_serializer_class` (events/rows.py), which reads
+    .values() rows instead of model instances, when API_FAST_SERIALIZATION is on.
+    """
+    row_serializer_class = None
+
+    def list(self, request, *args, **kwargs):
+        if not settings.API_FAST_SERIALIZATION or self.row_serializer_class is None:
+            return super().list(request, *args, **kwargs)
+
+        row_serializer = self.get_row_serializer()
+        queryset = row_serializer.prepare(
+            self.filter_queryset(self.get_queryset()), extra=getattr(self, 'cursor_ordering', ())
+        )
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(row_serializer.serialize(page))
+        return Response(row_serializer.serialize(queryset))
+
+    def get_row_serializer(self):
+        return self.row_serializer_class()
+
+
+class SparseFieldsMixin:
+    """
+    `?fields=a,b` or `?exclude=c,d` on list and retrieve: only the named top-level
+    fields are output, and only the columns and joins they need are queried (the
+    sources come from the view's `row_serializer_class`, see events/rows.py), so
+    large text/JSON columns and unused related tables are never fetched.
+    """
+
+    def get_sparse_fields(self):
+        """Names of the fields to output, in output order, or None for all of them."""
+        if self.action not in ('list', 'retrieve'):
+            return None
+        params = self.request.query_params
+        fields, exclude = params.get('fields'), params.get('exclude')
+        if not fields and not exclude:
+            return None
+
+        available = self.row_serializer_class.field_names()
+        fields = [name.strip() for name in (fields or '').split(',') if name.strip()]
+        exclude = [name.strip() for name in (exclude or '').split(',') if name.strip()]
+        unknown = [name for name in fields + exclude if name not in available]
+        if unknown:
+            raise serializers.ValidationError({
+                'fields': f"Unknown field(s): {', '.join(unknown)}. Available: {', '.join(available)}."
+            })
+        return tuple(name for name in available if (not fields or name in fields) and name not in exclude)
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        selected = self.get_sparse_fields()
+        if selected is not None:
+            omitted = [name for name in self.row_serializer_class.field_names() if name not in selected]
+            context['omit_fields'] = (*context.get('omit_fields', ()), *omitted)
+        return context
+
+    def get_row_serializer(self):
+        return self.row_serializer_class(only=self.get_sparse_fields())
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        selected = self.get_sparse_fields()
+        # normalized lists side-load related records from the rows, so keep those whole
+        if selected is None or (hasattr(self, 'is_normalized') and self.is_normalized()):
+            return queryset
+        return self.row_serializer_class(only=selected).narrow(
+            queryset, extra=getattr(self, 'cursor_ordering', ())
+        )
+
+
+class NormalizedListMixin:
+    """
+    Opt-in normalized list shape, `?shape=normalized`: rows reference related
+    records by id instead of nesting them (`normalized_fields` are dropped from
+    each row), and every referenced record is serialized once in an `included`
+    map keyed by id. Views implement `get_included(rows)`.
+    """
+    normalized_fields = ()
+
+    def is_normalized(self):
+        return self.action == 'list' and self.request.query_params.get('shape') == 'normalized'
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if self.is_normalized():
+            context['omit_fields'] = (*context.get('omit_fields', ()), *self.normalized_fields)
+        return context
+
+    def list(self, request, *args, **kwargs):
+        if not self.is_normalized():
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        rows = list(queryset) if page is None else page
+        data = self.get_serializer(rows, many=True).data
+        included = self.get_included(rows)
+        if page is None:
+            return Response({'results': data, 'included': included})
+
+        response = self.get_paginated_response(data)
+        response.data['included'] = included
+        return response
+
+
+class NormalizedRegistrationsMixin(NormalizedListMixin):
+    """Registration lists side-load their events and the events' venues."""
+    normalized_fields = ('event_details',)
+
+    def get_included(self, rows):
+        events = {}
+        for registration in rows:
+            event = registration.event
+            # the row's annotation gives the event's live count without another query
+            event.pending_registrations = registration.event_pending_registrations
+            events[event.pk] = event
+        venues = {event.venue_id: event.venue for event in events.values() if event.venue_id}
+        return {
+            'events': _by_id(IncludedEventSerializer, list(events.values())),
+            'venues': _by_id(VenueSerializer, list(venues.values())),
+        }
+
+
+class EventViewSet(NormalizedListMixin, SparseFieldsMixin, FastListMixin, viewsets.ModelViewSet):
     serializer_class = EventSerializer
+    row_serializer_class = EventRows
     permission_classes = [IsOrganizerOrAdmin]
+    filter_backends = [EventSearchFilter]
+    cursor_ordering = ('start_time', 'id')
+    normalized_fields = ('venue_details',)
+    MAX_AVAILABILITY_IDS = 300
 
     def get_queryset(self):
         user = self.request.user
-        base_queryset = Event.objects.select_related('venue').all()
+        base_queryset = (
+            Event.objects.with_live_counts()
+            .select_related('venue')
+            .defer('search_vector')
+            .order_by('start_time')
+        )
 
         # Admin and organizers can see all events
         if user.is_authenticated and user.role in [User.ADMIN, User.ORGANIZER]:
@@ -29,28 +187,123 @@ class EventViewSet(viewsets.ModelViewSet):
         # Unauthenticated users and regular users (attendees) can only see published events
         return base_queryset.filter(status=Event.STATUS_PUBLISHED)
 
+    def get_included(self, rows):
+        venues = {event.venue_id: event.venue for event in rows if event.venue_id}
+        return {'venues': _by_id(VenueSerializer, list(venues.values()))}
+
     def get_permissions(self):
-        if self.action in ['list', 'retrieve']:
+        if self.action in ['list', 'retrieve', 'schedule']:
             return [AllowAny()]
         if self.action in ['create', 'update', 'partial_update', 'destroy']:
             return [IsOrganizerOrAdmin()]
         return super().get_permissions()
 
+    def list(self, request, *args, **kwargs):
+        # validators over the whole filtered set, so any page goes stale with any change
+        stamp = self.filter_queryset(self.get_queryset()).order_by().aggregate(
+            count=Count('id', distinct=True),
+            updated_at=Max('updated_at'),
+            seats_changed_at=Max('counter_slots__updated_at'),
+        )
+        return conditional_get(
+            request,
+            make_etag(stamp['count'], stamp['updated_at'], stamp['seats_changed_at']),
+            latest(stamp['updated_at'], stamp['seats_changed_at']),
+            lambda: super(EventViewSet, self).list(request, *args, **kwargs),
+        )
+
+    def get_version_stamp(self):
+        """The event's version (updated_at) and live seat count, in one query; 404 when not visible."""
+        stamp = generics.get_object_or_404(
+            self.get_queryset()
+            .annotate(seats_changed_at=EventCounterSlot.changed_at_for(OuterRef('pk')))
+            .values('id', 'updated_at', 'registered_count', 'pending_registrations', 'seats_changed_at'),
+            pk=self.kwargs['pk'],
+        )
+        return stamp, stamp['registered_count'] + stamp['pending_registrations']
+
+    def retrieve(self, request, *args, **kwargs):
+        # the serialized event is cached per version; seat counts change on every
+        # registration, so they come live from the version lookup instead
+        stamp, registered_count = self.get_version_stamp()
+
+        def respond():
+            data = read_through(
+                'event', stamp['id'], stamp['updated_at'],
+                lambda: self.get_serializer(self.get_object()).data,
+                variant=','.join(self.get_sparse_fields() or ()),
+            )
+            if 'registered_count' in data:
+                data = {**data, 'registered_count': registered_count}
+            return Response(data)
+
+        return conditional_get(
+            request,
+            make_etag(stamp['id'], stamp['updated_at'], registered_count),
+            latest(stamp['updated_at'], stamp['seats_changed_at']),
+            respond,
+        )
+
+    @action(detail=True, methods=['get'])
+    def schedule(self, request, pk=None):
+        """
+        The event's whole agenda in one document: the event, its tracks, sessions
+        grouped by day and track, and each speaker once. Cached per event version
+        like retrieve, with the seat count filled in live.
+        """
+        stamp, registered_count = self.get_version_stamp()
+
+        def respond():
+            data = read_through(
+                'schedule', stamp['id'], stamp['updated_at'],
+                lambda: EventScheduleSerializer(self.get_object(), context=self.get_serializer_context()).data,
+            )
+            return Response({**data, 'event': {**data['event'], 'registered_count': registered_count}})
+
+        return conditional_get(
+            request,
+            make_etag('schedule', stamp['id'], stamp['updated_at'], registered_count),
+            latest(stamp['updated_at'], stamp['seats_changed_at']),
+            respond,
+        )
+
+    @action(detail=False, methods=['get'], url_path='cache-stats')
+    def cache_stats(self, request):
+        """Hit/miss counters of the response cache in this server process (admin only)"""
+        if getattr(request.user, 'role', None) != User.ADMIN:
+            return Response({"error": "Permission denied"}, status=status.HTTP_403_FORBIDDEN)
+        return Response(cache_stats.snapshot())
+
     @action(detail=True, methods=['get'])
     def availability(self, request, pk=None):
         event = self.get_object()
+        registered_count = event.live_registered_count
         return Response({
             'capacity': event.capacity,
-            'registered_count': event.registered_count,
-            'remaining': max(event.capacity - event.registered_count, 0)
+            'registered_count': registered_count,
+            'remaining': max(event.capacity - registered_count, 0)
         })
     
+    @action(detail=False, methods=['get'], permission_classes=[AllowAny],
+            url_path='availability', url_name='availability-batch')
+    def availability_batch(self, request):
+        """
+        Availability for many events at once: ?ids=<uuid>,<uuid>,...
+        One values() query, no model instances or serializers.
+        """
+        try:
+            ids = parse_id_list_param(request.query_params.get('ids', ''), self.MAX_AVAILABILITY_IDS)
+        except ValueError as exc:
+            return Response({"ids": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(self.get_queryset().filter(pk__in=ids).availability())
+
     @action(detail=False, methods=['get'], permission_classes=[AllowAny])
     def recommendations(self, request):
         """Return the nearest 4 upcoming published events"""
         from django.utils import timezone
         
-        upcoming_events = Event.objects.select_related('venue').filter(
+        upcoming_events = Event.objects.with_live_counts().select_related('venue').filter(
             status=Event.STATUS_PUBLISHED,
             start_time__gte=timezone.now()
         ).order_by('start_time')[:4]
@@ -58,9 +311,33 @@ class EventViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(upcoming_events, many=True)
         return Response(serializer.data)
 
-class TrackViewSet(viewsets.ModelViewSet):
+class EventScheduleCacheMixin:
+    """Serve the list of an event's children from the versioned response cache."""
+    cache_kind = None
+
+    def list(self, request, *args, **kwargs):
+        try:
+            stamp = Event.objects.filter(pk=self.kwargs.get('event_pk')).values_list('id', 'updated_at').first()
+        except ValidationError:
+            stamp = None
+        if stamp is None:
+            return super().list(request, *args, **kwargs)
+
+        event_id, version = stamp
+        data = read_through(
+            self.cache_kind, event_id, version,
+            lambda: super(EventScheduleCacheMixin, self).list(request, *args, **kwargs).data,
+            # one entry per page / page size
+            variant=request.build_absolute_uri(),
+        )
+        return Response(data)
+
+
+class TrackViewSet(EventScheduleCacheMixin, viewsets.ModelViewSet):
     serializer_class = TrackSerializer
     permission_classes = [IsOrganizerOrAdmin]
+    cache_kind = 'tracks'
+    cursor_ordering = ('name', 'id')
 
     def get_queryset(self):
         event_id = self.kwargs.get('event_pk')
@@ -74,14 +351,36 @@ class SpeakerViewSet(viewsets.ModelViewSet):
     queryset = Speaker.objects.all()
     serializer_class = SpeakerSerializer
     permission_classes = [IsOrganizerOrAdmin]
+    cursor_ordering = ('created_at', 'id')
     
     def get_queryset(self):
         return Speaker.objects.all()
 
+    @action(detail=False, methods=['get'])
+    def conflicts(self, request):
+        """
+        Speakers booked into overlapping sessions, in any track or event.
+        ?speaker=<id>, ?event=<id>, ?limit=<n> (default 100, max 1000)
+        """
+        filters = {}
+        for param in ('speaker', 'event'):
+            value = request.query_params.get(param)
+            if value:
+                try:
+                    filters[f'{param}_id'] = uuid.UUID(value)
+                except ValueError:
+                    return Response({param: "Must be a valid UUID."}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = min(max(int(request.query_params.get('limit', 100)), 1), 1000)
+        except ValueError:
+            return Response({"limit": "Must be an integer."}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'results': speaker_conflicts(limit=limit, **filters)})
+
 class VenueViewSet(viewsets.ModelViewSet):
     queryset = Venue.objects.all()
     serializer_class = VenueSerializer
     permission_classes = [IsOrganizerOrAdmin]
+    cursor_ordering = ('created_at', 'id')
     
     def get_queryset(self):
         return Venue.objects.all()
@@ -92,9 +391,12 @@ class VenueViewSet(viewsets.ModelViewSet):
         choices = [{"value": choice[0], "label": choice[1]} for choice in Venue.CITY_CHOICES]
         return Response(choices)
 
-class SessionViewSet(viewsets.ModelViewSet):
+class SessionViewSet(EventScheduleCacheMixin, SparseFieldsMixin, FastListMixin, viewsets.ModelViewSet):
     serializer_class = SessionSerializer
+    row_serializer_class = SessionRows
     permission_classes = [IsOrganizerOrAdmin]
+    cache_kind = 'sessions'
+    cursor_ordering = ('start_time', 'id')
 
     def get_queryset(self):
         event_id = self.kwargs.get('event_pk')
@@ -105,14 +407,46 @@ class SessionViewSet(viewsets.ModelViewSet):
         event = get_object_or_404(Event, pk=self.kwargs.get('event_pk'))
         serializer.save(event=event)
 
-class RegistrationViewSet(viewsets.ModelViewSet):
+    @action(detail=False, methods=['post'], url_path='bulk')
+    def bulk(self, request, event_pk=None):
+        """
+        Import a whole agenda: {"sessions": [...], "partial": false}. Every conflict
+        (outside the event, unknown speaker, overlap in a track) is reported at once
+        with the index of its session; nothing is inserted unless `partial` is set,
+        which inserts the sessions without conflicts.
+        """
+        event = get_object_or_404(Event, pk=event_pk)
+        serializer = AgendaImportSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            sessions, conflicts = import_agenda(
+                event, serializer.validated_data['sessions'], serializer.validated_data['partial'],
+            )
+        except IntegrityError:
+            # a session added concurrently overlaps one of the imported ones
+            return Response(
+                {"error": "The track schedule changed during the import, please retry"},
+                status=status.HTTP_409_CONFLICT,
+            )
+        if conflicts and not sessions:
+            return Response({"created": 0, "conflicts": conflicts}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(
+            {"created": len(sessions), "sessions": [str(session.pk) for session in sessions], "conflicts": conflicts},
+            status=status.HTTP_201_CREATED,
+        )
+
+class RegistrationViewSet(NormalizedRegistrationsMixin, SparseFieldsMixin, FastListMixin, viewsets.ModelViewSet):
     """ViewSet for managing registrations within an event context"""
     serializer_class = RegistrationSerializer
+    row_serializer_class = RegistrationRows
     permission_classes = [IsAuthenticated, IsOwnerOrReadOnly]
+    cursor_ordering = ('created_at', 'id')
 
     def get_queryset(self):
         event_id = self.kwargs.get('event_pk')
-        qs = Registration.objects.select_related("attendee", "event", "event__venue").filter(event_id=event_id)
+        qs = Registration.objects.select_related("attendee", "event", "event__venue").filter(
+            event_id=event_id
+        ).annotate(event_pending_registrations=EventCounterSlot.pending_for(OuterRef("event_id")))
         
         # organizers/admins can see all, others only their own
         user = self.request.user
@@ -124,42 +458,130 @@ class RegistrationViewSet(viewsets.ModelViewSet):
         except:
             return Registration.objects.none()
 
+    def create(self, request, *args, **kwargs):
+        event_pk = self.kwargs.get('event_pk')
+        try:
+            queued = Event.objects.filter(pk=event_pk).values_list('queued_registration', flat=True).first()
+        except ValidationError:
+            queued = False
+        if not queued:
+            return super().create(request, *args, **kwargs)
+
+        # flash-sale mode: accept into the event's queue; the worker admits it later
+        serializer = RegistrationRequestSerializer(data=request.data, context=self.get_serializer_context())
+        serializer.is_valid(raise_exception=True)
+        registration_request = serializer.save(event=Event(pk=event_pk))
+        location = reverse(
+            'event-registration-requests-detail',
+            kwargs={'event_pk': event_pk, 'pk': registration_request.pk},
+            request=request,
+        )
+        return Response(
+            RegistrationRequestSerializer(registration_request).data,
+            status=status.HTTP_202_ACCEPTED,
+            headers={'Location': location},
+        )
+
     def perform_destroy(self, instance):
-        # treat destroy as cancel: decrement with locks
-        from django.db import transaction
-        with transaction.atomic():
-            ev = Event.objects.select_for_update().get(pk=instance.event.pk)
-            if instance.status != 'cancelled':
-                instance.status = 'cancelled'
-                instance.canceled_at = datetime.now(timezone.utc)
-                instance.save()
-                ev.registered_count = max(ev.registered_count - 1, 0)
-                ev.save(update_fields=['registered_count'])
-
-
-class MyRegistrationViewSet(mixins.ListModelMixin,
+        # treat destroy as cancel: the seat goes back to the event's counter slots
+        instance.cancel()
+
+
+class RegistrationRequestViewSet(viewsets.ReadOnlyModelViewSet):
+    """Poll queued registration requests of an event (see Event.queued_registration)"""
+    serializer_class = RegistrationRequestSerializer
+    permission_classes = [IsAuthenticated]
+    cursor_ordering = ('created_at', 'id')
+
+    def get_queryset(self):
+        event_id = self.kwargs.get('event_pk')
+        qs = RegistrationRequest.objects.filter(event_id=event_id)
+
+        # organizers/admins can see all, others only their own
+        if getattr(self.request.user, 'role', None) in ['admin', 'organizer']:
+            return qs
+        return qs.filter(attendee=self.request.user)
+
+
+class MyRegistrationViewSet(NormalizedRegistrationsMixin,
+                            SparseFieldsMixin,
+                            FastListMixin,
+                            mixins.ListModelMixin,
                             mixins.RetrieveModelMixin,
                             mixins.DestroyModelMixin,
                             viewsets.GenericViewSet):
     """ViewSet for viewing and cancelling user's own registrations"""
     serializer_class = RegistrationSerializer
+    row_serializer_class = RegistrationRows
     permission_classes = [IsAuthenticated]
+    cursor_ordering = ('created_at', 'id')
 
     def get_queryset(self):
         """Return only the current user's registrations"""
         return Registration.objects.select_related(
             "attendee", "event", "event__venue"
-        ).filter(attendee=self.request.user)
+        ).filter(attendee=self.request.user).annotate(
+            event_pending_registrations=EventCounterSlot.pending_for(OuterRef("event_id"))
+        )
+
+    def list(self, request, *args, **kwargs):
+        # per-user version: the user's registrations plus the events (and seats) they embed
+        stamp = Registration.objects.filter(attendee=request.user).aggregate(
+            count=Count('id', distinct=True),
+            updated_at=Max('updated_at'),
+            events_updated_at=Max('event__updated_at'),
+            seats_changed_at=Max('event__counter_slots__updated_at'),
+        )
+        return conditional_get(
+            request,
+            make_etag(request.user.pk, *stamp.values()),
+            latest(stamp['updated_at'], stamp['events_updated_at'], stamp['seats_changed_at']),
+            lambda: super(MyRegistrationViewSet, self).list(request, *args, **kwargs),
+        )
 
     def perform_destroy(self, instance):
         """Allow users to cancel their own registrations"""
-        # treat destroy as cancel: decrement with locks
-        from django.db import transaction
-        with transaction.atomic():
-            ev = Event.objects.select_for_update().get(pk=instance.event.pk)
-            if instance.status != 'cancelled':
-                instance.status = 'cancelled'
-                instance.canceled_at = datetime.now(timezone.utc)
-                instance.save()
-                ev.registered_count = max(ev.registered_count - 1, 0)
-                ev.save(update_fields=['registered_count'])
\ No newline at end of file
+        # treat destroy as cancel: the seat goes back to the event's counter slots
+        instance.cancel()
+
+
+AVAILABILITY_STREAM_HEARTBEAT = 15
+
+
+def _sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def availability_stream(request):
+    """
+    Server-Sent Events stream of seat availability: ?ids=<uuid>,<uuid>,...
+    Sends the current numbers for each published event, then one message per
+    change. Needs the ASGI server (core.asgi) to stream.
+    """
+    try:
+        ids = parse_id_list_param(request.GET.get('ids', ''), EventViewSet.MAX_AVAILABILITY_IDS)
+    except ValueError as exc:
+        return JsonResponse({"ids": str(exc)}, status=400)
+
+    snapshot = await sync_to_async(load_availability)(ids)
+    queue = availability_hub.subscribe(snapshot.keys())
+
+    async def stream():
+        try:
+            for event_id, data in snapshot.items():
+                yield _sse('availability', {"id": event_id, **data})
+            while True:
+                try:
+                    update = await asyncio.wait_for(queue.get(), timeout=AVAILABILITY_STREAM_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    # comment line keeps proxies from closing an idle stream
+                    yield ": keep-alive\n\n"
+                    continue
+                yield _sse('availability', update)
+        finally:
+            availability_hub.unsubscribe(queue)
+
+    response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
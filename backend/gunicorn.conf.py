@@ -0,0 +1,54 @@
+"""
+Production server profile.
+
+Usage:
+    gunicorn core.asgi:application
+
+gunicorn reads this file from the working directory. It preforks WEB_CONCURRENCY
+uvicorn workers from a master that has already imported Django (`preload_app`),
+so workers start fast and share the loaded code copy-on-write. Nothing connects
+to the database at import time, so no connection is inherited across the fork.
+Each worker serves up to MAX_CONCURRENT_REQUESTS requests at once, drawing
+database connections from its own pool (DB_POOL_MAX_SIZE). See "Production
+Server" in README.md for sizing.
+"""
+
+import glob
+import multiprocessing
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+worker_class = 'uvicorn_worker.UvicornWorker'
+# one event loop per core; the requests inside a worker do the waiting on Postgres
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count()))
+preload_app = True
+
+# recycle workers now and then so slow leaks can't accumulate; jitter avoids restarting them all at once
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 10000))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', 1000))
+
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+# the availability stream holds connections open; give them time to finish on reload
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+
+accesslog = '-'
+errorlog = '-'
+
+
+# request metrics (core/metrics.py): with PROMETHEUS_MULTIPROC_DIR set, workers
+# write their counters there and any worker serves the sum at /api/metrics
+metrics_dir = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+
+
+def on_starting(server):
+    # counters left over from a previous run would be added to this one's
+    if metrics_dir:
+        for path in glob.glob(os.path.join(metrics_dir, '*.db')):
+            os.remove(path)
+
+
+def child_exit(server, worker):
+    if metrics_dir:
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
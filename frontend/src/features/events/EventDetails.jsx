@@ -50,6 +50,21 @@ const EventDetails = () => {
     }
   }, [id, user]);
 
+  useEffect(() => {
+    // Keep the seat counter live instead of re-fetching the event
+    return eventsAPI.subscribeAvailability([id], (update) =>
+      setEvent((prev) =>
+        prev
+          ? {
+              ...prev,
+              capacity: update.capacity,
+              registered_count: update.registered_count,
+            }
+          : prev
+      )
+    );
+  }, [id]);
+
   const fetchEventDetails = async () => {
     setLoading(true);
     try {
@@ -129,10 +144,20 @@ const EventDetails = () => {
 
     setRegistering(true);
     try {
-      await registrationsAPI.create(id, {
+      const response = await registrationsAPI.create(id, {
         attendee: user.id,
         status: "confirmed",
       });
+      if (response.status === 202) {
+        message.info("High demand: you're in the queue, hang tight...");
+        const result = await registrationsAPI.waitForRequest(
+          id,
+          response.data.id
+        );
+        if (result.status !== "confirmed") {
+          throw new Error(result.reason || "Registration was not accepted");
+        }
+      }
       message.success(`Successfully registered for ${event.title}`);
       // Refresh user registrations
       await fetchUserRegistrations();
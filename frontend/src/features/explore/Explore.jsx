@@ -33,6 +33,8 @@ const Explore = () => {
   const navigate = useNavigate();
   const { user } = useAuth();
   const [events, setEvents] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [cityChoices, setCityChoices] = useState([]);
   const [loading, setLoading] = useState(true);
   const [registering, setRegistering] = useState({});
@@ -45,22 +47,43 @@ const Explore = () => {
   });
 
   useEffect(() => {
-    fetchEvents();
     fetchCityChoices();
     if (user?.role === "attendee") {
       fetchUserRegistrations();
     }
   }, [user]);
 
+  useEffect(() => {
+    // Debounce so typing in the search box doesn't fire a request per keystroke
+    const timer = setTimeout(() => fetchEvents(), 300);
+    return () => clearTimeout(timer);
+  }, [filters]);
+
+  const buildEventParams = () => {
+    // Only show published events for explore page; the rest is filtered server-side
+    const params = { status: "published" };
+    if (filters.search) {
+      params.q = filters.search;
+    }
+    if (filters.city) {
+      params.city = filters.city;
+    }
+    if (filters.dateRange && filters.dateRange[0] && filters.dateRange[1]) {
+      params.start_after = filters.dateRange[0].startOf("day").toISOString();
+      params.start_before = filters.dateRange[1].endOf("day").toISOString();
+    }
+    return params;
+  };
+
+  const getCursor = (nextLink) =>
+    nextLink ? new URL(nextLink).searchParams.get("cursor") : null;
+
   const fetchEvents = async () => {
     setLoading(true);
     try {
-      const response = await eventsAPI.getAll();
-      // Only show published events for explore page
-      const publishedEvents = response.data.filter(
-        (event) => event.status === "published"
-      );
-      setEvents(publishedEvents);
+      const response = await eventsAPI.getPage(buildEventParams());
+      setEvents(response.data.results);
+      setNextCursor(getCursor(response.data.next));
     } catch (error) {
       message.error(
         "Failed to fetch events: " +
@@ -71,6 +94,25 @@ const Explore = () => {
     }
   };
 
+  const fetchMoreEvents = async () => {
+    setLoadingMore(true);
+    try {
+      const response = await eventsAPI.getPage({
+        ...buildEventParams(),
+        cursor: nextCursor,
+      });
+      setEvents((prev) => [...prev, ...response.data.results]);
+      setNextCursor(getCursor(response.data.next));
+    } catch (error) {
+      message.error(
+        "Failed to fetch events: " +
+          (error.response?.data?.message || error.message)
+      );
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const fetchCityChoices = async () => {
     try {
       const response = await venuesAPI.getCityChoices();
@@ -108,10 +150,20 @@ const Explore = () => {
 
     setRegistering((prev) => ({ ...prev, [event.id]: true }));
     try {
-      await registrationsAPI.create(event.id, {
+      const response = await registrationsAPI.create(event.id, {
         attendee: user.id,
         status: "confirmed",
       });
+      if (response.status === 202) {
+        message.info("High demand: you're in the queue, hang tight...");
+        const result = await registrationsAPI.waitForRequest(
+          event.id,
+          response.data.id
+        );
+        if (result.status !== "confirmed") {
+          throw new Error(result.reason || "Registration was not accepted");
+        }
+      }
       message.success(`Successfully registered for ${event.title}`);
       // Refresh user registrations and events
       fetchUserRegistrations();
@@ -139,51 +191,6 @@ const Explore = () => {
     });
   };
 
-  const filterEvents = () => {
-    let filtered = [...events];
-
-    // Apply search filter
-    if (filters.search) {
-      filtered = filtered.filter(
-        (event) =>
-          event.title.toLowerCase().includes(filters.search.toLowerCase()) ||
-          event.description
-            ?.toLowerCase()
-            .includes(filters.search.toLowerCase())
-      );
-    }
-
-    // Apply city filter
-    if (filters.city) {
-      filtered = filtered.filter(
-        (event) => event.venue_details?.city === filters.city
-      );
-    }
-
-    // Apply date range filter
-    if (filters.dateRange && filters.dateRange[0] && filters.dateRange[1]) {
-      filtered = filtered.filter((event) => {
-        const eventStart = dayjs(event.start_time);
-        return (
-          eventStart.isAfter(filters.dateRange[0]) &&
-          eventStart.isBefore(filters.dateRange[1])
-        );
-      });
-    }
-
-    return filtered;
-  };
-
-  const filteredEvents = filterEvents();
-
-  if (loading) {
-    return (
-      <div style={{ textAlign: "center", padding: "100px 0" }}>
-        <Spin size="large" />
-      </div>
-    );
-  }
-
   return (
     <Layout style={{ background: "white", minHeight: "calc(100vh - 64px)" }}>
       <Sider
@@ -237,95 +244,104 @@ const Explore = () => {
       </Sider>
 
       <Content style={{ padding: "24px", minHeight: "100%" }}>
-        <Row gutter={[24, 24]}>
-          {filteredEvents.length > 0 ? (
-            filteredEvents.map((event) => (
-              <Col xs={24} sm={12} md={8} lg={8} xl={6} key={event.id}>
-                <Card
-                  hoverable
-                  cover={
-                    <img
-                      alt={event.title}
-                      src={`https://placehold.co/300x200?text=${encodeURIComponent(
-                        event.title
-                      )}`}
-                      style={{ height: 200, objectFit: "cover" }}
-                    />
-                  }
-                  onClick={() => navigate(`/events/${event.id}`)}
-                  actions={
-                    user?.role === "attendee"
-                      ? [
-                          <Button
-                            type="primary"
-                            onClick={(e) => handleRegister(event, e)}
-                            loading={registering[event.id]}
-                            disabled={
-                              event.registered_count >= event.capacity ||
-                              isUserRegistered(event.id)
-                            }
-                          >
-                            {event.registered_count >= event.capacity
-                              ? "Full"
-                              : isUserRegistered(event.id)
-                              ? "Registered"
-                              : "Register"}
-                          </Button>,
-                        ]
-                      : undefined
-                  }
-                >
-                  <Meta
-                    title={event.title}
-                    description={
-                      <>
-                        <div style={{ marginBottom: 8 }}>
-                          {event.description
-                            ? event.description.substring(0, 80) +
-                              (event.description.length > 80 ? "..." : "")
-                            : "No description available"}
-                        </div>
-                      </>
+        <Spin spinning={loading}>
+          <Row gutter={[24, 24]}>
+            {events.length > 0 ? (
+              events.map((event) => (
+                <Col xs={24} sm={12} md={8} lg={8} xl={6} key={event.id}>
+                  <Card
+                    hoverable
+                    cover={
+                      <img
+                        alt={event.title}
+                        src={`https://placehold.co/300x200?text=${encodeURIComponent(
+                          event.title
+                        )}`}
+                        style={{ height: 200, objectFit: "cover" }}
+                      />
                     }
-                  />
-                  <div style={{ marginTop: 12 }}>
-                    <Text type="secondary" style={{ fontSize: 12 }}>
-                      📅 {dayjs(event.start_time).format("MMM D, YYYY")}
-                    </Text>
-                  </div>
-                  <div style={{ marginTop: 4 }}>
-                    <Text type="secondary" style={{ fontSize: 12 }}>
-                      📍 {event.venue_details?.name || "TBA"}
-                    </Text>
-                  </div>
-                  <div style={{ marginTop: 4 }}>
-                    <Text type="secondary" style={{ fontSize: 12 }}>
-                      🏙️ {event.venue_details?.city || "TBA"}
-                    </Text>
-                  </div>
-                  <div style={{ marginTop: 8 }}>
-                    <Tag
-                      color={
-                        event.registered_count >= event.capacity
-                          ? "red"
-                          : "green"
+                    onClick={() => navigate(`/events/${event.id}`)}
+                    actions={
+                      user?.role === "attendee"
+                        ? [
+                            <Button
+                              type="primary"
+                              onClick={(e) => handleRegister(event, e)}
+                              loading={registering[event.id]}
+                              disabled={
+                                event.registered_count >= event.capacity ||
+                                isUserRegistered(event.id)
+                              }
+                            >
+                              {event.registered_count >= event.capacity
+                                ? "Full"
+                                : isUserRegistered(event.id)
+                                ? "Registered"
+                                : "Register"}
+                            </Button>,
+                          ]
+                        : undefined
+                    }
+                  >
+                    <Meta
+                      title={event.title}
+                      description={
+                        <>
+                          <div style={{ marginBottom: 8 }}>
+                            {event.description
+                              ? event.description.substring(0, 80) +
+                                (event.description.length > 80 ? "..." : "")
+                              : "No description available"}
+                          </div>
+                        </>
                       }
-                    >
-                      {event.registered_count} / {event.capacity} registered
-                    </Tag>
-                  </div>
-                </Card>
+                    />
+                    <div style={{ marginTop: 12 }}>
+                      <Text type="secondary" style={{ fontSize: 12 }}>
+                        📅 {dayjs(event.start_time).format("MMM D, YYYY")}
+                      </Text>
+                    </div>
+                    <div style={{ marginTop: 4 }}>
+                      <Text type="secondary" style={{ fontSize: 12 }}>
+                        📍 {event.venue_details?.name || "TBA"}
+                      </Text>
+                    </div>
+                    <div style={{ marginTop: 4 }}>
+                      <Text type="secondary" style={{ fontSize: 12 }}>
+                        🏙️ {event.venue_details?.city || "TBA"}
+                      </Text>
+                    </div>
+                    <div style={{ marginTop: 8 }}>
+                      <Tag
+                        color={
+                          event.registered_count >= event.capacity
+                            ? "red"
+                            : "green"
+                        }
+                      >
+                        {event.registered_count} / {event.capacity} registered
+                      </Tag>
+                    </div>
+                  </Card>
+                </Col>
+              ))
+            ) : (
+              <Col span={24}>
+                <Empty
+                  description="No events found"
+                  style={{ margin: "48px 0" }}
+                />
               </Col>
-            ))
-          ) : (
-            <Col span={24}>
-              <Empty
-                description="No events found"
-                style={{ margin: "48px 0" }}
-              />
-            </Col>
+            )}
+          </Row>
+          {nextCursor && (
+            <div style={{ textAlign: "center", marginTop: 24 }}>
+              <Button onClick={fetchMoreEvents} loading={loadingMore}>
+                Load more
+              </Button>
+            </div>
           )}
-        </Row>
+        </Spin>
       </Content>
     </Layout>
   );
@@ -50,9 +50,23 @@ apiClient.interceptors.response.use(
   }
 );
 
+// List endpoints are cursor-paginated ({ next, previous, results }).
+// Follow the `next` links and resolve with every row, shaped like a plain list response.
+const getAllPages = async (url, params) => {
+  const response = await apiClient.get(url, { params });
+  const results = [...response.data.results];
+  let next = response.data.next;
+  while (next) {
+    const page = await apiClient.get(next);
+    results.push(...page.data.results);
+    next = page.data.next;
+  }
+  return { ...response, data: results };
+};
+
 // Speakers API
 export const speakersAPI = {
-  getAll: () => apiClient.get("/speakers"),
+  getAll: () => getAllPages("/speakers"),
   getById: (id) => apiClient.get(`/speakers/${id}`),
   create: (data) => apiClient.post("/speakers", data),
   update: (id, data) => apiClient.put(`/speakers/${id}`, data),
@@ -62,7 +76,7 @@ export const speakersAPI = {
 
 // Venues API
 export const venuesAPI = {
-  getAll: () => apiClient.get("/venues"),
+  getAll: () => getAllPages("/venues"),
   getById: (id) => apiClient.get(`/venues/${id}`),
   create: (data) => apiClient.post("/venues", data),
   update: (id, data) => apiClient.put(`/venues/${id}`, data),
@@ -73,18 +87,33 @@ export const venuesAPI = {
 
 // Events API
 export const eventsAPI = {
-  getAll: () => apiClient.get("/events"),
+  getAll: (params) => getAllPages("/events", params),
+  // Single page; pass `cursor` from a previous page's `next` link to continue
+  getPage: (params) => apiClient.get("/events", { params }),
   getById: (id) => apiClient.get(`/events/${id}`),
   create: (data) => apiClient.post("/events/", data),
   update: (id, data) => apiClient.put(`/events/${id}`, data),
   partialUpdate: (id, data) => apiClient.patch(`/events/${id}`, data),
   delete: (id) => apiClient.delete(`/events/${id}`),
   getRecommendations: () => apiClient.get("/events/recommendations"),
+  // { [eventId]: { capacity, registered_count, remaining } } for many events at once
+  getAvailability: (ids) =>
+    apiClient.get("/events/availability", { params: { ids: ids.join(",") } }),
+  // Live seat updates over Server-Sent Events; returns a function that closes the stream
+  subscribeAvailability: (ids, onUpdate) => {
+    const source = new EventSource(
+      `${API_URL}/events/availability/stream?ids=${ids.join(",")}`
+    );
+    source.addEventListener("availability", (e) =>
+      onUpdate(JSON.parse(e.data))
+    );
+    return () => source.close();
+  },
 };
 
 // Sessions API
 export const sessionsAPI = {
-  getAll: (eventId) => apiClient.get(`/events/${eventId}/sessions`),
+  getAll: (eventId) => getAllPages(`/events/${eventId}/sessions`),
   getById: (eventId, sessionId) =>
     apiClient.get(`/events/${eventId}/sessions/${sessionId}`),
   create: (eventId, data) =>
@@ -99,7 +128,7 @@ export const sessionsAPI = {
 
 // Tracks API
 export const tracksAPI = {
-  getAll: (eventId) => apiClient.get(`/events/${eventId}/tracks`),
+  getAll: (eventId) => getAllPages(`/events/${eventId}/tracks`),
   getById: (eventId, trackId) =>
     apiClient.get(`/events/${eventId}/tracks/${trackId}`),
   create: (eventId, data) => apiClient.post(`/events/${eventId}/tracks`, data),
@@ -114,9 +143,9 @@ export const tracksAPI = {
 // Registrations API
 export const registrationsAPI = {
   // User's own registrations (top-level)
-  getMyRegistrations: () => apiClient.get("/my-registrations"),
+  getMyRegistrations: () => getAllPages("/my-registrations"),
   // Event-specific registrations (nested)
-  getAll: (eventId) => apiClient.get(`/events/${eventId}/registrations`),
+  getAll: (eventId) => getAllPages(`/events/${eventId}/registrations`),
   getById: (eventId, registrationId) =>
     apiClient.get(`/events/${eventId}/registrations/${registrationId}`),
   create: (eventId, data) =>
@@ -127,6 +156,21 @@ export const registrationsAPI = {
     apiClient.patch(`/events/${eventId}/registrations/${registrationId}`, data),
   delete: (eventId, registrationId) =>
     apiClient.delete(`/events/${eventId}/registrations/${registrationId}`),
+  // Queued (flash-sale) events answer a registration with 202 and a request to poll
+  getRequest: (eventId, requestId) =>
+    apiClient.get(`/events/${eventId}/registration-requests/${requestId}`),
+  waitForRequest: async (eventId, requestId, { interval = 2000, attempts = 60 } = {}) => {
+    for (let i = 0; i < attempts; i++) {
+      const response = await apiClient.get(
+        `/events/${eventId}/registration-requests/${requestId}`
+      );
+      if (response.data.status !== "pending") {
+        return response.data;
+      }
+      await new Promise((resolve) => setTimeout(resolve, interval));
+    }
+    throw new Error("Still in the queue, check My Registrations later");
+  },
   // Cancel registration (uses my-registrations endpoint)
   cancel: (registrationId) =>
     apiClient.delete(`/my-registrations/${registrationId}`),